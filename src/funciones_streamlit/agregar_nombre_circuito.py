@@ -8,14 +8,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 from utils.constantes import DISTRITOS
 
 
-def agregar_nombre_circuito():
-    """Agrega columna nombre_circuito al archivo base_mesas_electores_normalizado.csv usando el mapeo DISTRITOS"""
-
-    ruta_csv = os.path.join("utils", "data", "base_mesas_electores_normalizado.csv")
-
-    print("🔍 Leyendo archivo CSV normalizado...")
-    df = pd.read_csv(ruta_csv)
+def agregar_nombre_circuito_df(df):
+    """Agrega en memoria la columna nombre_circuito usando el mapeo DISTRITOS"""
 
+    df = df.copy()
     print(f"📊 Archivo actual: {len(df):,} filas")
     print(f"📋 Columnas actuales: {list(df.columns)}")
     print()
@@ -66,6 +62,19 @@ def agregar_nombre_circuito():
     print("\n📋 Columnas finales:")
     print(f"  {list(df_final.columns)}")
 
+    return df_final
+
+
+def agregar_nombre_circuito():
+    """Agrega columna nombre_circuito al archivo base_mesas_electores_normalizado.csv usando el mapeo DISTRITOS"""
+
+    ruta_csv = os.path.join("utils", "data", "base_mesas_electores_normalizado.csv")
+
+    print("🔍 Leyendo archivo CSV normalizado...")
+    df = pd.read_csv(ruta_csv)
+
+    df_final = agregar_nombre_circuito_df(df)
+
     # Sobrescribir el archivo normalizado con la nueva columna
     ruta_normalizado = os.path.join(
         "utils", "data", "base_mesas_electores_normalizado.csv"
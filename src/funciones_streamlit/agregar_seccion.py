@@ -23,14 +23,10 @@ def crear_mapeo_municipio_seccion():
     return mapeo_municipio_seccion
 
 
-def agregar_columna_seccion():
-    """Agrega columna 'seccion' al CSV normalizado usando el mapeo de SECCION_MUNICIPIOS"""
-
-    ruta_csv = os.path.join("utils", "data", "base_mesas_electores_normalizado.csv")
-
-    print("🔍 Leyendo archivo CSV normalizado...")
-    df = pd.read_csv(ruta_csv)
+def agregar_columna_seccion_df(df):
+    """Agrega en memoria la columna 'seccion' usando el mapeo de SECCION_MUNICIPIOS"""
 
+    df = df.copy()
     print(f"📊 Archivo actual: {len(df):,} filas")
     print(f"📋 Columnas actuales: {list(df.columns)}")
     print()
@@ -80,6 +76,19 @@ def agregar_columna_seccion():
     print("\n📋 Columnas finales:")
     print(f"  {list(df_final.columns)}")
 
+    return df_final
+
+
+def agregar_columna_seccion():
+    """Agrega columna 'seccion' al CSV normalizado usando el mapeo de SECCION_MUNICIPIOS"""
+
+    ruta_csv = os.path.join("utils", "data", "base_mesas_electores_normalizado.csv")
+
+    print("🔍 Leyendo archivo CSV normalizado...")
+    df = pd.read_csv(ruta_csv)
+
+    df_final = agregar_columna_seccion_df(df)
+
     # Crear nuevo archivo con la columna seccion
     ruta_con_seccion = os.path.join(
         "utils", "data", "base_mesas_electores_normalizado.csv"
@@ -1,6 +1,17 @@
 import pandas as pd
 import os
-import re
+import sys
+
+# Agregar la ruta del proyecto para poder importar los módulos del paquete
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from src.funciones_streamlit.claves_mesa import (
+    COLUMNAS_CLAVE_MESA,
+    grupos_por_clave,
+    grupos_por_clave_empaquetada,
+)
+from src.funciones_streamlit.perfilador import perfilar_csv, verificar_reporte
+from src.funciones_streamlit.verificar_duplicados_normalizado import normalizar_valores
 
 
 def analizar_tipos_datos():
@@ -9,118 +20,95 @@ def analizar_tipos_datos():
     ruta_csv = os.path.join("utils", "data", "base_mesas_electores.csv")
 
     print("🔍 Analizando tipos de datos en el CSV...")
-    df = pd.read_csv(ruta_csv)
+    # Una sola lectura por bloques: todas las estadísticas salen del perfil
+    reporte = perfilar_csv(ruta_csv)
+    columnas = reporte["columnas"]
 
-    print(f"📊 Total de filas: {len(df):,}")
-    print(f"📋 Columnas: {list(df.columns)}")
+    print(f"📊 Total de filas: {reporte['filas']:,}")
+    print(f"📋 Columnas: {list(columnas)}")
     print()
 
     # Análisis de cod_circ
     print("🏛️ ANÁLISIS DE COD_CIRC:")
-    cod_circ_str = df["cod_circ"].astype(str)
+    cod_circ = columnas["cod_circ"]
 
     # Longitudes de códigos
-    longitudes = cod_circ_str.str.len().value_counts().sort_index()
     print("📏 Longitudes de códigos de circuito:")
-    for longitud, count in longitudes.items():
+    for longitud, count in cod_circ["longitudes"].items():
         print(f"  {longitud} dígitos: {count:,} registros")
 
     # Patrones de formato
     print("\n🎭 Patrones de formato:")
-    patrones = {
-        "Con ceros iniciales": cod_circ_str.str.startswith("0").sum(),
-        "Solo números": cod_circ_str.str.match(r"^\d+$").sum(),
-        "Con letras": cod_circ_str.str.match(r".*[a-zA-Z].*").sum(),
-        "Con espacios": cod_circ_str.str.contains(" ").sum(),
-    }
-
-    for patron, count in patrones.items():
+    for patron, count in cod_circ["patrones"].items():
         print(f"  {patron}: {count:,}")
+    print(f"  Con letras: {cod_circ['rasgos']['con_letras']:,}")
+    print(f"  Con espacios: {cod_circ['rasgos']['con_espacios']:,}")
 
     # Ejemplos de cada tipo
     print("\n📝 Ejemplos de códigos de circuito:")
-    print(
-        "  Códigos con 2 dígitos:",
-        cod_circ_str[cod_circ_str.str.len() == 2].unique()[:5],
-    )
-    print(
-        "  Códigos con 5 dígitos:",
-        cod_circ_str[cod_circ_str.str.len() == 5].unique()[:5],
-    )
-    print(
-        "  Códigos que empiezan con 0:",
-        cod_circ_str[cod_circ_str.str.startswith("0")].unique()[:5],
-    )
-
-    # Análisis de distrito
-    print("\n🏢 ANÁLISIS DE DISTRITO:")
-    distrito_str = df["distrito"].astype(str)
-
-    valores_distrito = distrito_str.unique()
-    print(f"📊 Valores únicos de distrito: {len(valores_distrito)}")
-    print("📝 Ejemplos:", sorted(valores_distrito)[:10])
-
-    # Ver si hay .0
-    with_decimals = distrito_str.str.contains("\.0$").sum()
-    print(f"  Con decimales (.0): {with_decimals:,}")
-    print(f"  Sin decimales: {len(valores_distrito) - with_decimals:,}")
-
-    # Análisis de nro_mesa
-    print("\n🗳️ ANÁLISIS DE NRO_MESA:")
-    nro_mesa_str = df["nro_mesa"].astype(str)
-
-    valores_mesa = nro_mesa_str.unique()
-    print(f"📊 Valores únicos de nro_mesa: {len(valores_mesa)}")
-
-    with_decimals_mesa = nro_mesa_str.str.contains("\.0$").sum()
-    print(f"  Con decimales (.0): {with_decimals_mesa:,}")
-    print(f"  Sin decimales: {len(valores_mesa) - with_decimals_mesa:,}")
+    for patron, ejemplos in cod_circ["ejemplos"].items():
+        print(f"  {patron}:", ejemplos)
+
+    # Análisis de distrito y nro_mesa
+    for columna, titulo in (("distrito", "🏢 DISTRITO"), ("nro_mesa", "🗳️ NRO_MESA")):
+        perfil = columnas[columna]
+        print(f"\n{titulo}:")
+        print(f"📊 Valores únicos de {columna} (aprox.): {perfil['distintos_aprox']:,}")
+        print("📝 Ejemplos:", [e for ejemplos in perfil["ejemplos"].values() for e in ejemplos][:10])
+        print(f"  Con decimales (.0): {perfil['patrones'].get('entero_con_punto_cero', 0):,}")
+        print(f"  Sin decimales: {perfil['patrones'].get('entero', 0):,}")
 
     # Análisis de establecimiento
     print("\n🏫 ANÁLISIS DE ESTABLECIMIENTO:")
-    estab_str = df["establecimiento"].astype(str)
-
-    print(f"📊 Nombres únicos de establecimientos: {estab_str.nunique():,}")
+    establecimiento = columnas["establecimiento"]
 
-    # Buscar caracteres especiales
-    with_accents = estab_str.str.contains(r"[áéíóúÁÉÍÓÚñÑ]").sum()
-    with_numbers = estab_str.str.contains(r"\d").sum()
-    with_symbols = estab_str.str.contains(r"[^\w\s]").sum()
-
-    print(f"  Con acentos: {with_accents:,}")
-    print(f"  Con números: {with_numbers:,}")
-    print(f"  Con símbolos especiales: {with_symbols:,}")
+    print(
+        f"📊 Nombres únicos de establecimientos (aprox.): {establecimiento['distintos_aprox']:,}"
+    )
+    print(f"  Con acentos: {establecimiento['rasgos']['con_acentos']:,}")
+    print(f"  Con números: {establecimiento['rasgos']['con_numeros']:,}")
+    print(f"  Con símbolos especiales: {establecimiento['rasgos']['con_simbolos']:,}")
+    print(f"  Con espacios al inicio/fin: {establecimiento['espacios_extremos']:,}")
 
     # Análisis de tipo
     print("\n🏷️ ANÁLISIS DE TIPO:")
-    tipos_unicos = df["tipo"].unique()
-    print(f"📊 Tipos únicos: {tipos_unicos}")
+    tipos = columnas["tipo"].get("valores", {})
+    print(f"📊 Tipos únicos: {list(tipos)}")
     print("📈 Distribución:")
-    for tipo in tipos_unicos:
-        count = (df["tipo"] == tipo).sum()
+    for tipo, count in tipos.items():
         print(f"  {tipo}: {count:,} registros")
 
     # Análisis de cantidad_electores
     print("\n👥 ANÁLISIS DE CANTIDAD_ELECTORES:")
-    electores = df["cantidad_electores"]
+    electores = columnas["cantidad_electores"]["numerico"]
 
-    print(f"📊 Estadísticas:")
-    print(f"  Mínimo: {electores.min():,}")
-    print(f"  Máximo: {electores.max():,}")
-    print(f"  Promedio: {electores.mean():,.1f}")
-    print(f"  Mediana: {electores.median():,.0f}")
-    print(f"  Total: {electores.sum():,}")
+    if electores is not None:
+        print(f"📊 Estadísticas:")
+        print(f"  Mínimo: {electores['minimo']:,.0f}")
+        print(f"  Máximo: {electores['maximo']:,.0f}")
+        print(f"  Promedio: {electores['promedio']:,.1f}")
+        if electores["mediana"] is not None:
+            print(f"  Mediana: {electores['mediana']:,.0f}")
+        print(f"  Total: {electores['total']:,.0f}")
 
     # Verificar si hay valores nulos
     print("\n🚨 VERIFICACIÓN DE VALORES NULOS:")
-    nulos = df.isnull().sum()
+    nulos = {columna: perfil["nulos"] for columna, perfil in columnas.items()}
     for col, count in nulos.items():
         if count > 0:
             print(f"  {col}: {count:,} valores nulos")
 
-    if nulos.sum() == 0:
+    if sum(nulos.values()) == 0:
         print("  ✅ No hay valores nulos en el dataset")
 
+    # Reglas que la ETL puede usar para frenar una carga
+    problemas = verificar_reporte(reporte)
+    print("\n🧪 VERIFICACIÓN DE REGLAS:")
+    for problema in problemas:
+        print(f"  ⚠️ {problema}")
+    if not problemas:
+        print("  ✅ Se cumplen todas las reglas de la base de mesas")
+
     print("\n" + "=" * 60)
     print("💡 RECOMENDACIONES PARA NORMALIZACIÓN:")
     print("=" * 60)
@@ -145,6 +133,8 @@ def analizar_tipos_datos():
     print("\n5. TIPO:")
     print("   - Ya parece consistente (NATIVA/EXTRANJERA)")
 
+    return reporte
+
 
 def crear_clave_normalizada():
     """Crea una clave única con normalización de datos"""
@@ -153,61 +143,22 @@ def crear_clave_normalizada():
 
     df = pd.read_csv(ruta_csv)
 
-    # Normalizar cada columna
-    df_normalizado = df.copy()
-
-    # Normalizar cod_circ: quitar ceros iniciales
-    df_normalizado["cod_circ_norm"] = df["cod_circ"].astype(str).str.lstrip("0")
+    # Normalizar cada columna (mismas reglas que la consolidación)
+    df_normalizado = normalizar_valores(df)
 
-    # Normalizar distrito: quitar .0
-    df_normalizado["distrito_norm"] = df["distrito"].astype(str).str.replace(".0", "")
-
-    # Normalizar nro_mesa: quitar .0
-    df_normalizado["nro_mesa_norm"] = df["nro_mesa"].astype(str).str.replace(".0", "")
-
-    # Normalizar establecimiento: quitar espacios extra y estandarizar mayúsculas
-    df_normalizado["establecimiento_norm"] = (
-        df["establecimiento"].astype(str).str.strip().str.upper()
-    )
-
-    # Crear clave normalizada
-    df_normalizado["clave_normalizada"] = (
-        df_normalizado["cod_circ_norm"]
-        + "|"
-        + df_normalizado["distrito_norm"]
-        + "|"
-        + df_normalizado["establecimiento_norm"]
-        + "|"
-        + df_normalizado["nro_mesa_norm"]
-        + "|"
-        + df_normalizado["tipo"].astype(str)
-    )
+    # Clave normalizada: número de grupo de la clave empaquetada de cada mesa
+    grupos, n_grupos = grupos_por_clave_empaquetada(df_normalizado["clave_mesa"].to_numpy())
+    df_normalizado["clave_normalizada"] = grupos
 
     print("🔑 CLAVE NORMALIZADA:")
-    print(
-        "📊 Claves únicas normalizadas:", df_normalizado["clave_normalizada"].nunique()
-    )
+    print("📊 Claves únicas normalizadas:", n_grupos)
 
     # Comparar con clave original
-    df_original = df.copy()
-    df_original["clave_original"] = (
-        df["cod_circ"].astype(str)
-        + "|"
-        + df["distrito"].astype(str)
-        + "|"
-        + df["establecimiento"].astype(str)
-        + "|"
-        + df["nro_mesa"].astype(str)
-        + "|"
-        + df["tipo"].astype(str)
-    )
+    _, n_grupos_original = grupos_por_clave(df, COLUMNAS_CLAVE_MESA)
 
-    print("📊 Claves únicas originales:", df_original["clave_original"].nunique())
+    print("📊 Claves únicas originales:", n_grupos_original)
 
-    diferencia = (
-        df_normalizado["clave_normalizada"].nunique()
-        - df_original["clave_original"].nunique()
-    )
+    diferencia = n_grupos - n_grupos_original
     print(f"📈 Diferencia: {diferencia:,} claves adicionales detectadas")
 
     return df_normalizado
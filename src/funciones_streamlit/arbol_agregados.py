@@ -0,0 +1,384 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+# Jerarquía de agregación: de la provincia (raíz) a la mesa (hoja)
+NIVELES_ARBOL = ["Provincia", "Seccion", "Distrito", "Establecimiento", "Mesa"]
+
+TIPOS_POSITIVOS = {"positivo", "positivos", "valido", "validos"}
+TIPOS_BLANCOS = {"blanco", "blancos", "en blanco"}
+
+
+def _inicios_por_profundidad(indice: pd.MultiIndex, profundidad: int) -> np.ndarray:
+    """
+    Devuelve las posiciones (en el arreglo de hojas) donde empieza cada nodo
+    de la profundidad indicada. Requiere que el índice esté ordenado.
+    """
+    n = len(indice)
+    if profundidad == 0:
+        return np.zeros(1, dtype=np.int64)
+
+    cambio = np.zeros(n, dtype=bool)
+    cambio[0] = True
+    for i in range(profundidad):
+        codigos = np.asarray(indice.codes[i])
+        cambio[1:] |= codigos[1:] != codigos[:-1]
+    return np.flatnonzero(cambio)
+
+
+CLAVES_MESA = ["Seccion", "Distrito", "Establecimiento", "Mesa"]
+
+# Valor de las claves vacías (texto / número): la fila sigue sumando en todos
+# los niveles, bajo un nodo propio, en lugar de quedar fuera del árbol
+SIN_DATO = "SIN DATO"
+SIN_DATO_NUMERICO = -1
+
+
+def completar_claves(df: pd.DataFrame, claves=CLAVES_MESA) -> pd.DataFrame:
+    """Columnas clave de 'df' con los valores vacíos reemplazados por SIN_DATO."""
+    claves = list(claves)
+    completas = df[claves].copy()
+    for columna in claves:
+        if completas[columna].isna().any():
+            relleno = (
+                SIN_DATO_NUMERICO
+                if pd.api.types.is_numeric_dtype(completas[columna])
+                else SIN_DATO
+            )
+            completas[columna] = completas[columna].fillna(relleno)
+    return completas
+
+
+def _hojas_desde_filas(
+    df: pd.DataFrame,
+    claves=CLAVES_MESA,
+    col_partido="Agrupacion",
+    col_tipo="tipoVoto",
+    col_votos="votos",
+):
+    """
+    Agrupa las filas de resultados por mesa. Devuelve dos DataFrames con índice
+    (Seccion, Distrito, Establecimiento, Mesa) ordenado: votos por tipo de voto
+    (todas las filas) y votos positivos por partido.
+    """
+    claves = list(claves)
+    votos = pd.to_numeric(df[col_votos], errors="coerce").fillna(0).astype("int64")
+    tipo = df[col_tipo].astype(str).str.strip().str.lower()
+    datos = completar_claves(df, claves).assign(
+        **{col_partido: df[col_partido]}, _tipo=tipo, _votos=votos
+    )
+
+    # Hojas: votos por mesa y tipo de voto (todas las filas)
+    por_tipo = (
+        datos.groupby(claves + ["_tipo"])["_votos"].sum().unstack(fill_value=0)
+    )
+    por_tipo.columns.name = None
+
+    # Hojas: votos positivos por mesa y partido
+    es_positivo = datos["_tipo"].isin(TIPOS_POSITIVOS) & datos[col_partido].notna()
+    por_partido = (
+        datos[es_positivo]
+        .groupby(claves + [col_partido])["_votos"]
+        .sum()
+        .unstack(fill_value=0)
+        .reindex(por_tipo.index, fill_value=0)
+    )
+    por_partido.columns.name = None
+
+    return por_tipo, por_partido
+
+
+def _arbol_desde_hojas(por_tipo: pd.DataFrame, por_partido: pd.DataFrame) -> dict:
+    """Arma el árbol completo a partir de las hojas (una fila por mesa, índice ordenado)."""
+    claves = list(por_tipo.index.names)
+    indice = por_tipo.index
+    hojas_partido = por_partido.to_numpy(dtype=np.int64, copy=True)
+    hojas_tipo = por_tipo.to_numpy(dtype=np.int64, copy=True)
+
+    arbol = {
+        "niveles": list(NIVELES_ARBOL),
+        "claves": {},
+        "partidos": list(por_partido.columns),
+        "tipos": list(por_tipo.columns),
+        "votos_partido": {},
+        "votos_tipo": {},
+        "hijos": {},
+        "padre": {},
+        "posiciones": {},
+    }
+
+    if len(indice) == 0:
+        for profundidad, nivel in enumerate(NIVELES_ARBOL):
+            arbol["claves"][nivel] = pd.DataFrame(columns=claves[:profundidad])
+            arbol["votos_partido"][nivel] = hojas_partido[:0]
+            arbol["votos_tipo"][nivel] = hojas_tipo[:0]
+            arbol["posiciones"][nivel] = {}
+        return arbol
+
+    inicios = [
+        _inicios_por_profundidad(indice, profundidad)
+        for profundidad in range(len(NIVELES_ARBOL))
+    ]
+
+    # De abajo hacia arriba: cada nivel se obtiene sumando los rangos de hijos
+    arbol["votos_partido"]["Mesa"] = hojas_partido
+    arbol["votos_tipo"]["Mesa"] = hojas_tipo
+    for profundidad in range(len(NIVELES_ARBOL) - 2, -1, -1):
+        nivel = NIVELES_ARBOL[profundidad]
+        nivel_hijo = NIVELES_ARBOL[profundidad + 1]
+
+        offsets = np.searchsorted(inicios[profundidad + 1], inicios[profundidad])
+        arbol["hijos"][nivel] = np.append(offsets, len(inicios[profundidad + 1]))
+        arbol["padre"][nivel_hijo] = np.repeat(
+            np.arange(len(offsets)), np.diff(arbol["hijos"][nivel])
+        )
+
+        for clave_votos in ("votos_partido", "votos_tipo"):
+            matriz_hijos = arbol[clave_votos][nivel_hijo]
+            if matriz_hijos.shape[1] == 0:
+                arbol[clave_votos][nivel] = matriz_hijos[: len(offsets)]
+            else:
+                arbol[clave_votos][nivel] = np.add.reduceat(
+                    matriz_hijos, offsets, axis=0
+                )
+
+    # Claves de cada nodo y búsqueda inversa clave → posición
+    claves_hojas = indice.to_frame(index=False)
+    for profundidad, nivel in enumerate(NIVELES_ARBOL):
+        columnas = claves[:profundidad]
+        claves_nivel = claves_hojas.iloc[inicios[profundidad]][columnas].reset_index(
+            drop=True
+        )
+        arbol["claves"][nivel] = claves_nivel
+        if profundidad == 0:
+            # La provincia es la raíz: su clave es la tupla vacía
+            arbol["posiciones"][nivel] = {(): 0}
+            continue
+        arbol["posiciones"][nivel] = {
+            clave: posicion
+            for posicion, clave in enumerate(
+                claves_nivel.itertuples(index=False, name=None)
+            )
+        }
+
+    return arbol
+
+
+def construir_arbol_agregados(
+    df: pd.DataFrame,
+    col_seccion="Seccion",
+    col_distrito="Distrito",
+    col_escuela="Establecimiento",
+    col_mesa="Mesa",
+    col_partido="Agrupacion",
+    col_tipo="tipoVoto",
+    col_votos="votos",
+) -> dict:
+    """
+    Calcula todos los niveles de agregación (Mesa → Establecimiento → Distrito
+    → Seccion → Provincia) de abajo hacia arriba en una sola pasada.
+
+    Los nodos de cada nivel quedan ordenados, de modo que los hijos de un nodo
+    son un rango contiguo del nivel siguiente. 'hijos[nivel]' guarda esos
+    offsets (largo n+1) y 'padre[nivel]' la posición del padre de cada nodo.
+
+    Devuelve un diccionario con:
+      niveles | claves | partidos | tipos | votos_partido | votos_tipo |
+      hijos | padre | posiciones
+    """
+    por_tipo, por_partido = _hojas_desde_filas(
+        df,
+        [col_seccion, col_distrito, col_escuela, col_mesa],
+        col_partido,
+        col_tipo,
+        col_votos,
+    )
+    return _arbol_desde_hojas(por_tipo, por_partido)
+
+
+def huellas_por_mesa(
+    df: pd.DataFrame,
+    claves=CLAVES_MESA,
+    col_partido="Agrupacion",
+    col_tipo="tipoVoto",
+    col_votos="votos",
+) -> pd.Series:
+    """
+    Calcula una huella (hash de 64 bits) por mesa a partir de sus filas.
+    La suma de los hashes de fila no depende del orden de las filas, así que
+    dos versiones del archivo dan la misma huella si la mesa no cambió.
+    """
+    claves = list(claves)
+    completas = completar_claves(df, claves)
+    hashes = pd.util.hash_pandas_object(
+        pd.concat([completas, df[[col_partido, col_tipo, col_votos]]], axis=1),
+        index=False,
+    )
+    return hashes.groupby([completas[c] for c in claves]).sum()
+
+
+def comparar_huellas(huellas_previas: pd.Series, huellas_nuevas: pd.Series) -> dict:
+    """
+    Compara las huellas por mesa de dos versiones de la base.
+    Devuelve las claves de mesas 'nuevas', 'modificadas' y 'eliminadas'.
+    """
+    comunes = huellas_nuevas.index.intersection(huellas_previas.index)
+    distintas = huellas_nuevas.loc[comunes].to_numpy() != huellas_previas.loc[
+        comunes
+    ].to_numpy()
+
+    return {
+        "nuevas": huellas_nuevas.index.difference(huellas_previas.index),
+        "modificadas": comunes[distintas],
+        "eliminadas": huellas_previas.index.difference(huellas_nuevas.index),
+    }
+
+
+def _hojas_desde_arbol(arbol: dict):
+    """Reconstruye las hojas (por tipo y por partido) a partir del nivel Mesa."""
+    indice = pd.MultiIndex.from_frame(arbol["claves"]["Mesa"])
+    por_tipo = pd.DataFrame(
+        arbol["votos_tipo"]["Mesa"], index=indice, columns=arbol["tipos"]
+    )
+    por_partido = pd.DataFrame(
+        arbol["votos_partido"]["Mesa"], index=indice, columns=arbol["partidos"]
+    )
+    return por_tipo, por_partido
+
+
+def actualizar_arbol(
+    arbol: dict, df_cambios: pd.DataFrame, mesas_eliminadas=(), **columnas
+) -> dict:
+    """
+    Aplica al árbol solo las mesas nuevas o modificadas ('df_cambios' contiene
+    todas las filas de esas mesas) y quita las mesas eliminadas.
+
+    Si todas las mesas, partidos y tipos de voto ya existen en el árbol y no
+    hay mesas eliminadas, las diferencias se suman sobre la mesa y sus
+    ancestros. Si aparecen mesas o columnas nuevas, o se eliminan mesas, se
+    rearma la estructura a partir de las hojas, sin volver a recorrer las
+    filas originales. En ambos casos el árbol tiene las mismas mesas que uno
+    construido de cero con la versión nueva.
+
+    Nunca modifica 'arbol' (puede estar leyéndose desde otra sesión):
+    devuelve un árbol nuevo para reemplazar la entrada del cache.
+    """
+    tipo_nuevo, partido_nuevo = _hojas_desde_filas(df_cambios, **columnas)
+    posiciones = arbol["posiciones"]["Mesa"]
+    eliminadas = [
+        tuple(clave) for clave in mesas_eliminadas if tuple(clave) in posiciones
+    ]
+
+    filas = [posiciones.get(clave) for clave in tipo_nuevo.index]
+    estructura_igual = (
+        not eliminadas
+        and all(fila is not None for fila in filas)
+        and set(tipo_nuevo.columns) <= set(arbol["tipos"])
+        and set(partido_nuevo.columns) <= set(arbol["partidos"])
+    )
+
+    if not estructura_igual:
+        # Cambió la forma del árbol: reemplazar hojas, quitar las eliminadas y rearmar
+        por_tipo, por_partido = _hojas_desde_arbol(arbol)
+        quitar = list(tipo_nuevo.index) + eliminadas
+        por_tipo = por_tipo.drop(index=quitar, errors="ignore")
+        por_partido = por_partido.drop(index=quitar, errors="ignore")
+        por_tipo = pd.concat([por_tipo, tipo_nuevo]).fillna(0).sort_index()
+        por_partido = (
+            pd.concat([por_partido, partido_nuevo])
+            .fillna(0)
+            .reindex(por_tipo.index, fill_value=0)
+        )
+        return _arbol_desde_hojas(por_tipo, por_partido)
+
+    if not filas:
+        return arbol
+
+    # Las matrices se copian antes de sumar; claves, posiciones, hijos y
+    # padre no cambian y se comparten con el árbol anterior
+    actualizado = dict(arbol)
+    filas = np.asarray(filas, dtype=np.int64)
+    for clave_votos, nuevos, columnas_arbol in (
+        ("votos_tipo", tipo_nuevo, arbol["tipos"]),
+        ("votos_partido", partido_nuevo, arbol["partidos"]),
+    ):
+        matrices = {nivel: matriz.copy() for nivel, matriz in arbol[clave_votos].items()}
+        nuevos = nuevos.reindex(columns=columnas_arbol, fill_value=0).to_numpy(
+            dtype=np.int64
+        )
+        delta = nuevos - matrices["Mesa"][filas]
+
+        # Sumar la diferencia en la mesa y en cada ancestro
+        posiciones_nivel = filas
+        for profundidad in range(len(NIVELES_ARBOL) - 1, -1, -1):
+            nivel = NIVELES_ARBOL[profundidad]
+            if profundidad < len(NIVELES_ARBOL) - 1:
+                posiciones_nivel = arbol["padre"][NIVELES_ARBOL[profundidad + 1]][
+                    posiciones_nivel
+                ]
+            np.add.at(matrices[nivel], posiciones_nivel, delta)
+        actualizado[clave_votos] = matrices
+
+    return actualizado
+
+
+def nivel_agregado(
+    arbol: dict, nivel: str, valores: str = "partido", filas: slice = slice(None)
+) -> pd.DataFrame:
+    """
+    Devuelve un DataFrame con las claves del nivel y una columna por partido
+    (valores='partido') o por tipo de voto (valores='tipo').
+    'filas' permite pedir solo un rango de nodos.
+    """
+    if nivel not in arbol["niveles"]:
+        raise ValueError(f"Nivel desconocido: {nivel}")
+
+    if valores == "partido":
+        matriz, columnas = arbol["votos_partido"][nivel], arbol["partidos"]
+    elif valores == "tipo":
+        matriz, columnas = arbol["votos_tipo"][nivel], arbol["tipos"]
+    else:
+        raise ValueError("valores debe ser 'partido' o 'tipo'")
+
+    claves = arbol["claves"][nivel].iloc[filas]
+    votos = pd.DataFrame(matriz[filas], columns=columnas, index=claves.index)
+    return pd.concat([claves, votos], axis=1)
+
+
+def posicion_nodo(arbol: dict, nivel: str, clave) -> int | None:
+    """Devuelve la posición de un nodo a partir de su clave (tupla de la raíz al nodo)."""
+    if not isinstance(clave, tuple):
+        clave = (clave,)
+    return arbol["posiciones"][nivel].get(clave)
+
+
+def ancestro_de_mesa(arbol: dict, nivel: str) -> np.ndarray:
+    """Posición en 'nivel' del ancestro de cada mesa, subiendo por 'padre'."""
+    niveles = arbol["niveles"]
+    posiciones = np.arange(len(arbol["claves"]["Mesa"]))
+    for profundidad in range(len(niveles) - 1, niveles.index(nivel), -1):
+        posiciones = arbol["padre"][niveles[profundidad]][posiciones]
+    return posiciones
+
+
+def desglosar(
+    arbol: dict, nivel: str, clave=(), valores: str = "partido"
+) -> pd.DataFrame:
+    """
+    Devuelve los hijos directos de un nodo como DataFrame. La búsqueda es
+    un acceso por índice: no recorre las filas originales.
+
+    Ejemplo: desglosar(arbol, "Distrito", ("Sección Primera", "TIGRE"))
+    devuelve las escuelas de Tigre.
+    """
+    profundidad = arbol["niveles"].index(nivel)
+    if profundidad == len(arbol["niveles"]) - 1:
+        raise ValueError("Las mesas son el último nivel del árbol")
+
+    posicion = posicion_nodo(arbol, nivel, clave)
+    if posicion is None:
+        return pd.DataFrame()
+
+    nivel_hijo = arbol["niveles"][profundidad + 1]
+    inicio, fin = arbol["hijos"][nivel][posicion : posicion + 2]
+    return nivel_agregado(arbol, nivel_hijo, valores, filas=slice(inicio, fin))
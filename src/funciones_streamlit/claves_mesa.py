@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+
+# Columnas que identifican una mesa del padrón
+COLUMNAS_CLAVE_MESA = ["cod_circ", "distrito", "establecimiento", "nro_mesa", "tipo"]
+
+# Clave de mesa empaquetada en un int64 (de bits altos a bajos):
+#   distrito (12) | número de circuito (20) | letra del circuito (5) |
+#   número de mesa (24) | extranjera (1)
+# '0933c', '933C' y '933C ' dan el mismo circuito; 4, 4.0 y '4' el mismo
+# distrito. -1 = no se pudo armar la clave (valor vacío o no entero).
+BITS_EXTRANJERA = 1
+BITS_MESA = 24
+BITS_LETRA = 5
+BITS_CIRCUITO = 20
+BITS_DISTRITO = 12
+
+DESPLAZAMIENTO_MESA = BITS_EXTRANJERA
+DESPLAZAMIENTO_LETRA = DESPLAZAMIENTO_MESA + BITS_MESA
+DESPLAZAMIENTO_CIRCUITO = DESPLAZAMIENTO_LETRA + BITS_LETRA
+DESPLAZAMIENTO_DISTRITO = DESPLAZAMIENTO_CIRCUITO + BITS_CIRCUITO
+
+SIN_CLAVE = -1
+
+# Proyecciones de la clave para cruzar con datos que no traen todos los campos
+# (los resultados no tienen circuito ni tipo de mesa)
+MASCARA_DISTRITO = ((1 << BITS_DISTRITO) - 1) << DESPLAZAMIENTO_DISTRITO
+MASCARA_MESA = ((1 << BITS_MESA) - 1) << DESPLAZAMIENTO_MESA
+MASCARA_DISTRITO_MESA = MASCARA_DISTRITO | MASCARA_MESA
+
+
+def hash_filas(df, columnas=COLUMNAS_CLAVE_MESA):
+    """Hash de 64 bits de cada fila sobre las columnas pedidas, sin armar texto."""
+    return pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+
+
+def _iguales_al_representante(serie, representante):
+    """True donde el valor coincide con el de la primera fila de su grupo."""
+    valores = serie.to_numpy()
+    referencia = valores[representante]
+    nulos = pd.isna(valores)
+    return (valores == referencia) | (nulos & nulos[representante])
+
+
+def grupos_por_clave(df, columnas=COLUMNAS_CLAVE_MESA):
+    """
+    Número de grupo de cada fila: filas con los mismos valores en 'columnas'
+    comparten grupo. Agrupa por el hash de 64 bits de la fila y después
+    verifica columna por columna contra la primera fila del grupo; si aparece
+    una colisión de hash (prácticamente imposible) se vuelve a un groupby
+    sobre las columnas.
+
+    Retorna (grupos, cantidad de grupos). Los grupos se numeran en el orden
+    de su primera aparición.
+    """
+    if len(df) == 0:
+        return np.zeros(0, dtype=np.int64), 0
+
+    grupos, unicos = pd.factorize(hash_filas(df, columnas))
+    primera = np.full(len(unicos), len(df), dtype=np.int64)
+    np.minimum.at(primera, grupos, np.arange(len(df)))
+    representante = primera[grupos]
+
+    sin_colision = all(
+        _iguales_al_representante(df[columna], representante).all()
+        for columna in columnas
+    )
+    if not sin_colision:
+        grupos = df.groupby(columnas, sort=False, dropna=False).ngroup().to_numpy()
+        return grupos, int(grupos.max()) + 1
+
+    return grupos.astype(np.int64, copy=False), len(unicos)
+
+
+def mascara_duplicados(grupos, n_grupos):
+    """True en las filas cuya clave aparece más de una vez (keep=False)."""
+    return np.bincount(grupos, minlength=n_grupos)[grupos] > 1
+
+
+def consolidar_por_clave(df, grupos, n_grupos, columna_suma="cantidad_electores"):
+    """
+    Una fila por grupo: los valores de la primera aparición y 'columna_suma'
+    sumada sobre todas las filas del grupo. Mantiene el orden de aparición.
+    """
+    primeras = np.unique(grupos, return_index=True)[1]
+    consolidado = df.iloc[primeras].reset_index(drop=True)
+    consolidado[columna_suma] = np.bincount(
+        grupos, weights=df[columna_suma].to_numpy(), minlength=n_grupos
+    ).astype(df[columna_suma].dtype)
+    return consolidado
+
+
+def describir_clave(fila, columnas=COLUMNAS_CLAVE_MESA):
+    """Texto 'a|b|c' de una fila, solo para mostrar ejemplos."""
+    return "|".join(str(fila[columna]) for columna in columnas)
+
+
+def entero_exacto(serie) -> np.ndarray:
+    """
+    Valores enteros como float ('4', 4.0, '4.0' → 4.0). Lo que no es un
+    entero exacto ('10.05', 'abc', vacío) queda NaN en lugar de recortarse.
+    """
+    numeros = pd.to_numeric(pd.Series(serie), errors="coerce").to_numpy(dtype=np.float64, copy=True)
+    numeros[numeros != np.floor(numeros)] = np.nan
+    return numeros
+
+
+def partes_circuito(cod_circ) -> tuple:
+    """
+    (número, letra) de cada código de circuito: '0933C' → (933, 3). La letra
+    va de 1 (A) a 26 (Z), 0 si no tiene. Códigos con otro formato → NaN.
+    """
+    partes = (
+        pd.Series(cod_circ, dtype=object)
+        .astype(str)
+        .str.strip()
+        .str.upper()
+        .str.extract(r"^(\d+)(?:\.0+)?([A-Z]?)$")
+    )
+    numero = pd.to_numeric(partes[0], errors="coerce").to_numpy(dtype=np.float64)
+    letra = partes[1].fillna("").to_numpy(dtype=object)
+    codigo_letra = np.array([ord(l) - ord("A") + 1 if l else 0 for l in letra], dtype=np.float64)
+    return numero, codigo_letra
+
+
+def _cabe(valores: np.ndarray, bits: int) -> np.ndarray:
+    return ~np.isnan(valores) & (valores >= 0) & (valores < (1 << bits))
+
+
+def empaquetar_clave(distrito, cod_circ, nro_mesa, tipo) -> np.ndarray:
+    """
+    Clave int64 de cada mesa a partir de sus cuatro campos. Si 'cod_circ' o
+    'tipo' son None (datos que no los tienen, como los resultados) esos bits
+    quedan en 0: compararla solo a través de MASCARA_DISTRITO_MESA.
+    """
+    distrito = entero_exacto(distrito)
+    nro_mesa = entero_exacto(nro_mesa)
+    n = len(distrito)
+    if cod_circ is None:
+        circuito, letra = np.zeros(n), np.zeros(n)
+    else:
+        circuito, letra = partes_circuito(cod_circ)
+    if tipo is None:
+        extranjera = np.zeros(n)
+    else:
+        extranjera = (
+            pd.Series(tipo, dtype=object).astype(str).str.strip().str.upper() == "EXTRANJERA"
+        ).to_numpy(dtype=np.float64)
+
+    validas = (
+        _cabe(distrito, BITS_DISTRITO)
+        & _cabe(circuito, BITS_CIRCUITO)
+        & _cabe(letra, BITS_LETRA)
+        & _cabe(nro_mesa, BITS_MESA)
+    )
+    claves = np.full(n, SIN_CLAVE, dtype=np.int64)
+    claves[validas] = (
+        (distrito[validas].astype(np.int64) << DESPLAZAMIENTO_DISTRITO)
+        | (circuito[validas].astype(np.int64) << DESPLAZAMIENTO_CIRCUITO)
+        | (letra[validas].astype(np.int64) << DESPLAZAMIENTO_LETRA)
+        | (nro_mesa[validas].astype(np.int64) << DESPLAZAMIENTO_MESA)
+        | extranjera[validas].astype(np.int64)
+    )
+    return claves
+
+
+def clave_mesa_df(df: pd.DataFrame) -> np.ndarray:
+    """Clave empaquetada de cada fila de una base de mesas (padrón)."""
+    return empaquetar_clave(df["distrito"], df["cod_circ"], df["nro_mesa"], df["tipo"])
+
+
+def proyectar_clave(claves, mascara=MASCARA_DISTRITO_MESA) -> np.ndarray:
+    """Deja solo los campos de 'mascara' (las claves inválidas siguen en -1)."""
+    claves = np.asarray(claves, dtype=np.int64)
+    return np.where(claves == SIN_CLAVE, SIN_CLAVE, claves & mascara)
+
+
+def _campo(claves: np.ndarray, desplazamiento: int, bits: int) -> np.ndarray:
+    return (claves >> desplazamiento) & ((1 << bits) - 1)
+
+
+def desempaquetar_clave(claves) -> pd.DataFrame:
+    """Campos de cada clave en su forma canónica (cod_circ sin ceros: '933C')."""
+    claves = np.asarray(claves, dtype=np.int64)
+    letra = _campo(claves, DESPLAZAMIENTO_LETRA, BITS_LETRA)
+    sufijo = np.array(["", *[chr(ord("A") + i) for i in range(26)]], dtype=object)
+    circuito = _campo(claves, DESPLAZAMIENTO_CIRCUITO, BITS_CIRCUITO).astype(str).astype(object)
+    return pd.DataFrame(
+        {
+            "distrito": _campo(claves, DESPLAZAMIENTO_DISTRITO, BITS_DISTRITO),
+            "cod_circ": circuito + sufijo[np.minimum(letra, 26)],
+            "nro_mesa": _campo(claves, DESPLAZAMIENTO_MESA, BITS_MESA),
+            "tipo": np.where(claves & 1, "EXTRANJERA", "NATIVA"),
+        }
+    )
+
+
+def grupos_por_clave_empaquetada(claves) -> tuple:
+    """
+    Número de grupo por clave empaquetada (en orden de aparición). Las filas
+    sin clave no se juntan con nada: cada una queda en su propio grupo.
+    Retorna (grupos, cantidad de grupos).
+    """
+    claves = np.asarray(claves, dtype=np.int64)
+    grupos, unicos = pd.factorize(claves)
+    sin_clave = np.flatnonzero(claves == SIN_CLAVE)
+    if len(sin_clave) == 0:
+        return grupos.astype(np.int64, copy=False), len(unicos)
+
+    # Renumerar: el grupo de -1 se reparte en un grupo por fila
+    grupos = grupos.astype(np.int64)
+    grupo_invalido = grupos[sin_clave[0]]
+    grupos[grupos > grupo_invalido] -= 1
+    n = len(unicos) - 1
+    grupos[sin_clave] = n + np.arange(len(sin_clave))
+    return grupos, n + len(sin_clave)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+from pathlib import Path
+from functools import lru_cache
+import sys
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from utils.constantes import BASE
+from src.funciones_streamlit.arbol_agregados import (
+    SIN_DATO,
+    SIN_DATO_NUMERICO,
+    TIPOS_POSITIVOS,
+)
+from src.funciones_streamlit.funciones import obtener_arbol_agregados, version_archivo
+
+CARGOS_LEGISLATIVOS = ("DIPUTADOS PROVINCIALES", "SENADORES PROVINCIALES")
+CARGOS_CONCEJALES = ("CONCEJALES",)
+
+NIVELES_CORTE = ["Seccion", "Distrito", "Establecimiento", "Mesa"]
+
+
+def _codificar(datos: pd.DataFrame, columnas: list):
+    """
+    Asigna a cada fila un código entero compacto para la combinación de
+    'columnas'. Cada columna se factoriza por separado y los códigos se
+    combinan en un entero, sin armar claves de texto.
+
+    Devuelve (códigos por fila, DataFrame con las claves de cada código).
+    """
+    codigos, valores = [], []
+    for columna in columnas:
+        codigo, unicos = pd.factorize(datos[columna], sort=True)
+        codigos.append(codigo)
+        valores.append(unicos)
+
+    dimensiones = tuple(max(len(unicos), 1) for unicos in valores)
+    compuesto = np.ravel_multi_index(codigos, dimensiones)
+    unicos, codigo_fila = np.unique(compuesto, return_inverse=True)
+
+    partes = np.unravel_index(unicos, dimensiones)
+    claves = pd.DataFrame(
+        {
+            columna: np.asarray(valores[i])[partes[i]]
+            for i, columna in enumerate(columnas)
+        }
+    )
+    return codigo_fila, claves
+
+
+def matriz_desde_filas(
+    df: pd.DataFrame,
+    cargos_a=CARGOS_LEGISLATIVOS,
+    cargos_b=CARGOS_CONCEJALES,
+    col_cargo="Cargo",
+    col_partido="Agrupacion",
+    col_tipo="tipoVoto",
+    col_votos="votos",
+):
+    """
+    Matriz (grupo × mesa × partido) de votos positivos a partir de las filas
+    de resultados. Las mesas y los partidos se pasan a códigos enteros una
+    sola vez y los votos se acumulan con bincount.
+
+    Devuelve (matriz, claves de cada mesa, partidos) o None si no hay votos.
+    """
+    claves_mesa = list(NIVELES_CORTE)
+
+    # Solo votos positivos de los cargos comparados
+    cargo = df[col_cargo].astype(str).str.strip().str.upper()
+    grupo = np.where(
+        cargo.isin([c.upper() for c in cargos_a]),
+        0,
+        np.where(cargo.isin([c.upper() for c in cargos_b]), 1, -1),
+    )
+    tipo = df[col_tipo].astype(str).str.strip().str.lower()
+    mascara = (grupo >= 0) & tipo.isin(TIPOS_POSITIVOS).to_numpy()
+    mascara &= df[col_partido].notna().to_numpy()
+    mascara &= df[claves_mesa].notna().all(axis=1).to_numpy()
+
+    datos = df.loc[mascara, claves_mesa + [col_partido]]
+    grupo = grupo[mascara]
+    votos = pd.to_numeric(df.loc[mascara, col_votos], errors="coerce").fillna(0)
+    if datos.empty:
+        return None
+
+    # Claves enteras compactas: mesa y partido
+    codigo_mesa, mesas = _codificar(datos, claves_mesa)
+    codigo_partido, partidos = pd.factorize(datos[col_partido])
+    n_mesas, n_partidos = len(mesas), len(partidos)
+
+    plano = (grupo * n_mesas + codigo_mesa) * n_partidos + codigo_partido
+    matriz = (
+        np.bincount(plano, weights=votos.to_numpy(), minlength=2 * n_mesas * n_partidos)
+        .reshape(2, n_mesas, n_partidos)
+        .astype(np.int64)
+    )
+    return matriz, mesas, list(partidos)
+
+
+def matriz_desde_arboles(arbol_a: dict, arbol_b: dict):
+    """
+    La misma matriz (grupo × mesa × partido) tomada del nivel Mesa de dos
+    árboles de agregados ya calculados, sin volver a leer las filas. Las
+    mesas se alinean por su clave; las que tienen claves vacías (SIN_DATO)
+    quedan afuera, igual que en matriz_desde_filas.
+
+    Devuelve (matriz, claves de cada mesa, partidos) o None si no hay mesas.
+    """
+    indices = [pd.MultiIndex.from_frame(arbol["claves"]["Mesa"]) for arbol in (arbol_a, arbol_b)]
+    comunes = indices[0].intersection(indices[1])
+    mesas = comunes.to_frame(index=False)
+    completas = ~mesas.isin([SIN_DATO, SIN_DATO_NUMERICO]).any(axis=1).to_numpy()
+    comunes, mesas = comunes[completas], mesas[completas].reset_index(drop=True)
+    if len(comunes) == 0:
+        return None
+
+    partidos = list(dict.fromkeys(arbol_a["partidos"] + arbol_b["partidos"]))
+    matriz = np.zeros((2, len(comunes), len(partidos)), dtype=np.int64)
+    for grupo, (arbol, indice) in enumerate(zip((arbol_a, arbol_b), indices)):
+        filas = indice.get_indexer(comunes)
+        columnas = pd.Index(partidos).get_indexer(arbol["partidos"])
+        matriz[grupo][:, columnas] = arbol["votos_partido"]["Mesa"][filas]
+    return matriz, mesas, partidos
+
+
+def corte_por_nivel(matriz_mesas, nivel: str = "Mesa", col_partido="Agrupacion") -> pd.DataFrame:
+    """
+    Corte de boleta de una matriz (grupo × mesa × partido) en el nivel pedido:
+    solo se comparan mesas con votos en ambos grupos, y cada nodo suma las
+    mesas que tiene debajo.
+
+    Devuelve una fila por nodo del nivel pedido y partido:
+      claves del nivel | Agrupacion | votos_a | votos_b | diferencia |
+      pct_a | pct_b | diferencia_pp
+    """
+    if nivel not in NIVELES_CORTE:
+        raise ValueError(f"Nivel desconocido: {nivel}")
+
+    claves = NIVELES_CORTE[: NIVELES_CORTE.index(nivel) + 1]
+    columnas = claves + [
+        col_partido,
+        "votos_a",
+        "votos_b",
+        "diferencia",
+        "pct_a",
+        "pct_b",
+        "diferencia_pp",
+    ]
+    if matriz_mesas is None:
+        return pd.DataFrame(columns=columnas)
+    matriz, mesas, partidos = matriz_mesas
+    n_partidos = len(partidos)
+
+    # Mesas que votaron en ambos grupos
+    en_ambos = (matriz.sum(axis=2) > 0).all(axis=0)
+    matriz = matriz[:, en_ambos, :]
+    claves_nodo = mesas[en_ambos].reset_index(drop=True)
+
+    # Subir al nivel pedido sumando las mesas de cada nodo
+    if nivel != "Mesa" and len(claves_nodo) > 0:
+        codigo_nodo, nodos = _codificar(claves_nodo, claves)
+        agregada = np.zeros((2, len(nodos), n_partidos), dtype=np.int64)
+        np.add.at(agregada, (slice(None), codigo_nodo), matriz)
+        matriz = agregada
+        claves_nodo = nodos
+
+    votos_a, votos_b = matriz[0], matriz[1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_a = np.nan_to_num(votos_a / votos_a.sum(axis=1, keepdims=True)) * 100
+        pct_b = np.nan_to_num(votos_b / votos_b.sum(axis=1, keepdims=True)) * 100
+
+    n_nodos = len(claves_nodo)
+    resultado = claves_nodo.loc[np.repeat(np.arange(n_nodos), n_partidos)].reset_index(
+        drop=True
+    )
+    resultado[col_partido] = np.tile(np.asarray(partidos, dtype=object), n_nodos)
+    resultado["votos_a"] = votos_a.ravel()
+    resultado["votos_b"] = votos_b.ravel()
+    resultado["diferencia"] = resultado["votos_a"] - resultado["votos_b"]
+    resultado["pct_a"] = pct_a.ravel().round(1)
+    resultado["pct_b"] = pct_b.ravel().round(1)
+    resultado["diferencia_pp"] = (pct_a - pct_b).ravel().round(1)
+
+    # Sin filas de partidos ausentes en ambos grupos
+    resultado = resultado[(resultado["votos_a"] > 0) | (resultado["votos_b"] > 0)]
+    return resultado[columnas].reset_index(drop=True)
+
+
+def corte_de_boleta(
+    df: pd.DataFrame,
+    cargos_a=CARGOS_LEGISLATIVOS,
+    cargos_b=CARGOS_CONCEJALES,
+    nivel: str = "Mesa",
+    col_cargo="Cargo",
+    col_partido="Agrupacion",
+    col_tipo="tipoVoto",
+    col_votos="votos",
+) -> pd.DataFrame:
+    """
+    Compara, por partido, los votos de dos grupos de cargos en las mismas mesas
+    ("corte de boleta"). Cada grupo puede tener varios cargos: en provincia de
+    Buenos Aires cada sección vota diputados o senadores, así que por defecto
+    se compara el cargo legislativo de la mesa contra concejales.
+
+    Arma la matriz desde las filas (matriz_desde_filas) y la lleva al nivel
+    pedido (corte_por_nivel, que describe las columnas).
+    """
+    if nivel not in NIVELES_CORTE:
+        raise ValueError(f"Nivel desconocido: {nivel}")
+    matriz_mesas = matriz_desde_filas(
+        df, cargos_a, cargos_b, col_cargo, col_partido, col_tipo, col_votos
+    )
+    return corte_por_nivel(matriz_mesas, nivel, col_partido)
+
+
+def _arbol_de_cargos(cargos: tuple):
+    """Árbol cacheado de un grupo de hasta dos cargos (el mismo que usan las páginas)."""
+    if not 1 <= len(cargos) <= 2:
+        raise ValueError("Cada grupo de cargos debe tener uno o dos cargos")
+    cargo, cargo2 = (tuple(cargos) + (None,))[:2]
+    return obtener_arbol_agregados(cargo, cargo2)
+
+
+@lru_cache(maxsize=2)
+def _matriz_cacheada(cargos_a, cargos_b, version):
+    arbol_a = _arbol_de_cargos(cargos_a)
+    arbol_b = _arbol_de_cargos(cargos_b)
+    if arbol_a is None or arbol_b is None:
+        return None
+    return matriz_desde_arboles(arbol_a, arbol_b)
+
+
+@lru_cache(maxsize=8)
+def _corte_cacheado(cargos_a, cargos_b, nivel, version):
+    return corte_por_nivel(_matriz_cacheada(cargos_a, cargos_b, version), nivel)
+
+
+def obtener_corte_de_boleta(
+    cargos_a=CARGOS_LEGISLATIVOS, cargos_b=CARGOS_CONCEJALES, nivel="Distrito"
+):
+    """
+    Corte de boleta sobre la base completa. La matriz por mesa sale de los
+    árboles cacheados de cada grupo de cargos y se arma una vez por versión;
+    cambiar de nivel solo la vuelve a sumar.
+    """
+    return _corte_cacheado(
+        tuple(cargos_a), tuple(cargos_b), nivel, version_archivo(BASE)
+    )
@@ -1,54 +1,148 @@
 import zipfile
+import numpy as np
 import pandas as pd
 import os
 
-def procesar_base_mesas(archivo_zip, tipo):
+# Columnas del padrón que hacen falta para contar electores por mesa
+COLUMNAS_PADRON = ['cod_circ', 'nro_mesa', 'distrito', 'establecimiento', 'id_persona']
+CLAVES_MESA = ['cod_circ', 'nro_mesa']
+
+# Filas del padrón (electores) que se leen por vez
+TAMANIO_BLOQUE = 500_000
+
+
+def _acumular(acumulado, parcial):
+    """
+    Suma a los conteos acumulados por mesa los de un bloque nuevo. 'first'
+    sobre la concatenación conserva el distrito/establecimiento visto primero.
+    """
+    if acumulado is None:
+        return parcial
+    return pd.concat([acumulado, parcial]).groupby(CLAVES_MESA, sort=False).agg(
+        distrito=('distrito', 'first'),
+        establecimiento=('establecimiento', 'first'),
+        cantidad_electores=('cantidad_electores', 'sum'),
+    )
+
+
+def clave_distrito(serie):
+    """Código de distrito como texto ('61'), venga como número, float o texto."""
+    return pd.to_numeric(serie, errors='coerce').astype('Int64').astype(str)
+
+
+def _sumar_hashes(hashes, bloque):
+    """
+    Suma (módulo 2**64) el hash de cada fila del bloque al de su distrito.
+    La suma no depende del orden de las filas ni de cómo se corten los bloques.
+    """
+    columnas = bloque[COLUMNAS_PADRON]
+    # Numéricos como float: un bloque con vacíos no cambia el hash de los demás
+    numericas = columnas.select_dtypes('number').columns
+    columnas = columnas.astype({columna: 'float64' for columna in numericas})
+    filas = pd.util.hash_pandas_object(columnas, index=False).to_numpy()
+    codigos, distritos = pd.factorize(clave_distrito(bloque['distrito']))
+    sumas = np.zeros(len(distritos), dtype=np.uint64)
+    np.add.at(sumas, codigos, filas)
+    for distrito, suma in zip(distritos, sumas):
+        hashes[distrito] = (hashes.get(distrito, 0) + int(suma)) % 2**64
+
+
+def _contar_por_mesa(archivo, encoding, tamanio_bloque, hashes=None):
+    """
+    Lee el padrón por bloques y solo con las columnas necesarias, manteniendo
+    un conteo por (cod_circ, nro_mesa). La memoria depende de la cantidad de
+    mesas, no de la de electores.
+
+    Si se pasa 'hashes' (dict), se completa en la misma lectura con un hash
+    del contenido de cada distrito.
+
+    cod_circ sale siempre como texto, tal como viene en el padrón ('0012',
+    '0933C') y ordenado como texto. Antes, si todos los códigos eran
+    numéricos, pandas los leía como enteros (sin ceros iniciales y con orden
+    numérico). La normalización posterior (clave empaquetada de
+    claves_mesa) los lleva a la misma forma canónica en ambos casos.
+    """
+    acumulado = None
+    lector = pd.read_csv(
+        archivo,
+        encoding=encoding,
+        usecols=COLUMNAS_PADRON,
+        # cod_circ como texto: conserva ceros iniciales y sufijos ('0933C')
+        dtype={'cod_circ': str, 'establecimiento': str},
+        chunksize=tamanio_bloque,
+    )
+    for bloque in lector:
+        if hashes is not None:
+            _sumar_hashes(hashes, bloque)
+        parcial = bloque.groupby(CLAVES_MESA, sort=False).agg(
+            distrito=('distrito', 'first'),
+            establecimiento=('establecimiento', 'first'),
+            cantidad_electores=('id_persona', 'count'),
+        )
+        acumulado = _acumular(acumulado, parcial)
+
+    if acumulado is None:
+        return pd.DataFrame(columns=CLAVES_MESA + ['distrito', 'establecimiento', 'cantidad_electores'])
+    return acumulado.sort_index().reset_index()
+
+
+def procesar_base_mesas(archivo_zip, tipo, tamanio_bloque=TAMANIO_BLOQUE, hashes=None):
     print(f'Procesando {tipo} desde {archivo_zip}...')
-    
+
     with zipfile.ZipFile(archivo_zip, 'r') as zip_ref:
         archivos = zip_ref.namelist()
         archivo_csv = archivos[0]
         print(f'  Archivo encontrado: {archivo_csv}')
-        
-        with zip_ref.open(archivo_csv) as f:
-            encodings = ['utf-8', 'latin1', 'cp1252']
-            df = None
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(f, encoding=encoding)
-                    print(f'  Encoding exitoso: {encoding}')
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if df is None:
-                raise ValueError(f'No se pudo leer el archivo {archivo_csv}')
-    
-    print(f'  Total de electores en {tipo}: {len(df):,}')
-    
-    df_agrupado = df.groupby(['cod_circ', 'nro_mesa']).agg({
-        'distrito': 'first',
-        'establecimiento': 'first',
-        'id_persona': 'count'
-    }).reset_index()
-    
-    df_agrupado = df_agrupado.rename(columns={'id_persona': 'cantidad_electores'})
+
+        encodings = ['utf-8', 'latin1', 'cp1252']
+        df_agrupado = None
+        for encoding in encodings:
+            # Cada intento reabre el archivo: el anterior pudo quedar a mitad de lectura
+            try:
+                if hashes is not None:
+                    hashes.clear()
+                with zip_ref.open(archivo_csv) as f:
+                    df_agrupado = _contar_por_mesa(f, encoding, tamanio_bloque, hashes)
+                print(f'  Encoding exitoso: {encoding}')
+                break
+            except UnicodeDecodeError:
+                continue
+
+        if df_agrupado is None:
+            raise ValueError(f'No se pudo leer el archivo {archivo_csv}')
+
+    print(f'  Total de electores en {tipo}: {int(df_agrupado["cantidad_electores"].sum()):,}')
+
     df_agrupado['tipo'] = tipo
-    
+
     columnas_finales = ['cod_circ', 'distrito', 'establecimiento', 'nro_mesa', 'cantidad_electores', 'tipo']
     df_agrupado = df_agrupado[columnas_finales]
-    
+
     return df_agrupado
 
-print('=== CREANDO NUEVA BASE DE DATOS DE MESAS ===')
+def crear_base_mesas(archivo_nativos, archivo_extranjeros, tamanio_bloque=TAMANIO_BLOQUE, hashes=None):
+    """
+    Mesas de nativos y extranjeros con su cantidad de electores, en memoria.
+    Con 'hashes' (dict) deja en hashes['NATIVA'] y hashes['EXTRANJERA'] el
+    hash de contenido de cada distrito de cada padrón.
+    """
+    hashes_nativos = {} if hashes is not None else None
+    hashes_extranjeros = {} if hashes is not None else None
+    df_nativos = procesar_base_mesas(archivo_nativos, 'NATIVA', tamanio_bloque, hashes_nativos)
+    df_extranjeros = procesar_base_mesas(archivo_extranjeros, 'EXTRANJERA', tamanio_bloque, hashes_extranjeros)
+    if hashes is not None:
+        hashes['NATIVA'] = hashes_nativos
+        hashes['EXTRANJERA'] = hashes_extranjeros
+    return pd.concat([df_nativos, df_extranjeros], ignore_index=True)
+
 
-archivo_nativos = 'utils/data/padron_2025.zip'
-archivo_extranjeros = 'utils/data/padron_extranjeros_2025.zip'
+if __name__ == '__main__':
+    print('=== CREANDO NUEVA BASE DE DATOS DE MESAS ===')
 
-df_nativos = procesar_base_mesas(archivo_nativos, 'NATIVA')
-df_extranjeros = procesar_base_mesas(archivo_extranjeros, 'EXTRANJERA')
+    archivo_nativos = 'utils/data/padron_2025.zip'
+    archivo_extranjeros = 'utils/data/padron_extranjeros_2025.zip'
 
-df_final = pd.concat([df_nativos, df_extranjeros], ignore_index=True)
+    df_final = crear_base_mesas(archivo_nativos, archivo_extranjeros)
 
-archivo_salida = 'base_mesas_electores.csv'
-df_final.to_csv(archivo_salida, index=False, encoding='utf-8')
\ No newline at end of file
+    archivo_salida = 'base_mesas_electores.csv'
+    df_final.to_csv(archivo_salida, index=False, encoding='utf-8')
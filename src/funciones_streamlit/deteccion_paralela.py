@@ -0,0 +1,153 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import multiprocessing
+import os
+import numpy as np
+
+# Este módulo solo depende de numpy: los procesos hijos lo importan para
+# ejecutar _escanear_fragmento y no deben cargar streamlit ni pandas.
+#
+# Es para scripts por lotes, no para las páginas: el escaneo secuencial de
+# la provincia (~41.000 mesas) tarda menos que levantar el pool, y el
+# servidor de streamlit no debe crear un pool de procesos por cada clic.
+
+# Por debajo de esta cantidad de mesas se escanea en el proceso actual.
+# Medido en un solo núcleo el pool nunca gana (40.000 mesas: 0,07 s
+# secuencial contra 0,3 s con pool), así que el valor queda por encima de
+# cualquier base provincial; conviene medirlo en la máquina que lo use.
+MIN_MESAS_PARALELO = 1_000_000
+
+# Los hijos no se crean con fork: copiarían un proceso con hilos (el servidor
+# de streamlit) y podrían quedar trabados en un lock tomado por otro hilo.
+# forkserver arranca de un proceso limpio; donde no existe (Windows), spawn.
+# Con ambos métodos el script que lanzó el pool se vuelve a importar como
+# __mp_main__ (una vez en el forkserver; con spawn, en cada hijo): el
+# escaneo debe llamarse desde dentro de 'if __name__ == "__main__":'.
+METODO_INICIO = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _compartir(arreglo: np.ndarray):
+    """Copia un arreglo a memoria compartida. Devuelve (bloque, descriptor)."""
+    arreglo = np.ascontiguousarray(arreglo)
+    bloque = shared_memory.SharedMemory(create=True, size=max(arreglo.nbytes, 1))
+    np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=bloque.buf)[...] = arreglo
+    return bloque, (bloque.name, arreglo.shape, arreglo.dtype.str)
+
+
+def _abrir(descriptor):
+    nombre, forma, tipo = descriptor
+    bloque = shared_memory.SharedMemory(name=nombre)
+    return bloque, np.ndarray(forma, dtype=np.dtype(tipo), buffer=bloque.buf)
+
+
+def _desvios_fragmento(votos, denom, escuela, inicio, umbral_min, umbral_max):
+    """Desvío de todos los partidos frente a su escuela en un rango de mesas."""
+    # Las escuelas de un distrito son rangos contiguos de mesas
+    inicios = np.flatnonzero(np.r_[True, escuela[1:] != escuela[:-1]])
+    local = np.repeat(np.arange(len(inicios)), np.diff(np.r_[inicios, len(escuela)]))
+    votos_escuela = np.add.reduceat(votos, inicios, axis=0)
+    denom_escuela = np.add.reduceat(denom, inicios)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_mesa = np.nan_to_num(votos / denom[:, None]) * 100
+        pct_escuela = np.nan_to_num(votos_escuela / denom_escuela[:, None])[local] * 100
+    desvio = pct_mesa - pct_escuela
+
+    marcadas = (desvio >= umbral_min) & (desvio <= umbral_max)
+    marcadas &= (denom > 0)[:, None]
+    filas, columnas = np.nonzero(marcadas)
+    return (
+        filas + inicio,
+        columnas,
+        pct_mesa[filas, columnas],
+        pct_escuela[filas, columnas],
+        desvio[filas, columnas],
+    )
+
+
+def _escanear_fragmento(tarea: tuple):
+    """
+    Tarea de un proceso hijo: abre los arreglos compartidos y escanea un rango
+    contiguo de mesas (uno o varios distritos completos).
+    """
+    *descriptores, inicio, fin, umbral_min, umbral_max = tarea
+    bloques = []
+    try:
+        arreglos = []
+        for descriptor in descriptores:
+            bloque, arreglo = _abrir(descriptor)
+            bloques.append(bloque)
+            arreglos.append(arreglo[inicio:fin])
+        resultado = _desvios_fragmento(*arreglos, inicio, umbral_min, umbral_max)
+        # Soltar las vistas sobre la memoria compartida antes de cerrarla
+        del arreglos, arreglo
+        return resultado
+    finally:
+        for bloque in bloques:
+            bloque.close()
+
+
+def fragmentos_por_distrito(inicios_distrito: np.ndarray, n_mesas: int, n_fragmentos: int):
+    """
+    Divide las mesas en rangos contiguos de tamaño parecido sin partir ningún
+    distrito. 'inicios_distrito' es la primera mesa de cada distrito.
+    """
+    limites = np.append(inicios_distrito, n_mesas)
+    objetivos = np.linspace(0, n_mesas, n_fragmentos + 1)
+    cortes = np.unique(limites[np.searchsorted(limites, objetivos)])
+    return list(zip(cortes[:-1], cortes[1:]))
+
+
+def escanear_en_paralelo(
+    votos_mesa: np.ndarray,
+    denom_mesa: np.ndarray,
+    escuela_mesa: np.ndarray,
+    inicios_distrito: np.ndarray,
+    umbral_min: float,
+    umbral_max: float,
+    procesos: int | None = None,
+):
+    """
+    Escaneo de desvíos de todos los partidos repartido por distritos en un
+    pool de procesos. Las matrices de votos se publican una vez en memoria
+    compartida; cada proceso recibe solo nombres y rangos de mesas.
+
+    Devuelve (filas, columnas, pct_mesa, pct_escuela, desvio) concatenados
+    en el orden de las mesas.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    n_mesas = len(denom_mesa)
+    fragmentos = fragmentos_por_distrito(inicios_distrito, n_mesas, procesos * 4)
+
+    bloques = []
+    try:
+        descriptores = []
+        for arreglo in (
+            votos_mesa.astype(np.int64, copy=False),
+            denom_mesa.astype(np.int64, copy=False),
+            escuela_mesa.astype(np.int64, copy=False),
+        ):
+            bloque, descriptor = _compartir(arreglo)
+            bloques.append(bloque)
+            descriptores.append(descriptor)
+
+        tareas = [
+            (*descriptores, inicio, fin, umbral_min, umbral_max)
+            for inicio, fin in fragmentos
+        ]
+        with ProcessPoolExecutor(
+            max_workers=procesos, mp_context=multiprocessing.get_context(METODO_INICIO)
+        ) as pool:
+            resultados = list(pool.map(_escanear_fragmento, tareas))
+    finally:
+        for bloque in bloques:
+            bloque.close()
+            bloque.unlink()
+
+    if not resultados:
+        vacio = np.zeros(0, dtype=np.int64)
+        return vacio, vacio, vacio * 1.0, vacio * 1.0, vacio * 1.0
+    return tuple(np.concatenate(partes) for partes in zip(*resultados))
@@ -0,0 +1,144 @@
+from __future__ import annotations
+from pathlib import Path
+from functools import lru_cache
+import sys
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from utils.constantes import BASE
+from src.funciones_streamlit.arbol_agregados import ancestro_de_mesa
+from src.funciones_streamlit.funciones import obtener_arbol_agregados, version_archivo
+
+# Benford para el primer dígito: P(d) = log10(1 + 1/d), d = 1..9
+BENFORD_PRIMER_DIGITO = np.log10(1 + 1 / np.arange(1, 10))
+# Último dígito: uniforme en 0..9
+UNIFORME_ULTIMO_DIGITO = np.full(10, 0.1)
+
+# Valores críticos de chi-cuadrado al 5 % (8 y 9 grados de libertad)
+CHI2_CRITICO = {"primer_digito": 15.507, "ultimo_digito": 16.919}
+
+NIVELES_DIGITOS = ["Provincia", "Seccion", "Distrito", "Establecimiento"]
+
+
+def primer_digito(votos: np.ndarray) -> np.ndarray:
+    """Primer dígito de cada valor (> 0) con aritmética entera, sin pasar a texto."""
+    votos = np.asarray(votos, dtype=np.int64)
+    potencia = np.ones_like(votos)
+    # Como mucho 19 dígitos en int64: dividir mientras quede más de uno
+    for _ in range(19):
+        mas = votos // potencia >= 10
+        if not mas.any():
+            break
+        potencia[mas] *= 10
+    return votos // potencia
+
+
+def _histogramas(grupo, partido, digito, n_grupos, n_partidos, n_digitos):
+    """Cuenta (grupo, partido, dígito) con un único bincount sobre claves enteras."""
+    clave = (grupo * n_partidos + partido) * n_digitos + digito
+    return np.bincount(clave, minlength=n_grupos * n_partidos * n_digitos).reshape(
+        n_grupos, n_partidos, n_digitos
+    )
+
+
+def chi_cuadrado(histogramas: np.ndarray, esperada: np.ndarray) -> np.ndarray:
+    """Estadístico chi-cuadrado de cada histograma (último eje) contra 'esperada'."""
+    n = histogramas.sum(axis=-1, keepdims=True)
+    esperados = n * esperada
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chi2 = np.nan_to_num(((histogramas - esperados) ** 2 / esperados)).sum(axis=-1)
+    return chi2
+
+
+def analisis_digitos(
+    arbol: dict,
+    nivel: str = "Distrito",
+    prueba: str = "primer_digito",
+    min_observaciones: int = 50,
+) -> pd.DataFrame:
+    """
+    Distribución de dígitos de los votos por mesa de cada partido, agrupada
+    por nodo del nivel pedido (provincia, sección, distrito o escuela).
+
+      - prueba='primer_digito': primer dígito contra Benford (mesas con ≥ 1 voto).
+      - prueba='ultimo_digito': último dígito contra uniforme (mesas con ≥ 10
+        votos, para que el último dígito no sea también el primero).
+
+    Todos los histogramas (nodo × partido) salen de un solo bincount.
+    'atipico' marca chi2 > valor crítico al 5 % con al menos
+    'min_observaciones' mesas.
+
+    Devuelve columnas:
+      claves del nivel | Agrupacion | n_mesas | d0..d9 (o d1..d9) | chi2 | atipico
+    """
+    if nivel not in NIVELES_DIGITOS:
+        raise ValueError(f"Nivel desconocido: {nivel}")
+    if prueba not in CHI2_CRITICO:
+        raise ValueError("prueba debe ser 'primer_digito' o 'ultimo_digito'")
+
+    votos = arbol["votos_partido"]["Mesa"]
+    n_mesas, n_partidos = votos.shape
+    n_grupos = len(arbol["claves"][nivel])
+    grupo_mesa = ancestro_de_mesa(arbol, nivel)
+
+    # Pares (mesa, partido) aplanados y filtrados según la prueba
+    plano = votos.ravel()
+    minimo = 1 if prueba == "primer_digito" else 10
+    validos = np.flatnonzero(plano >= minimo)
+    grupo = grupo_mesa[validos // n_partidos]
+    partido = validos % n_partidos
+
+    if prueba == "primer_digito":
+        digitos = primer_digito(plano[validos]) - 1
+        esperada, etiquetas = BENFORD_PRIMER_DIGITO, [f"d{d}" for d in range(1, 10)]
+    else:
+        digitos = plano[validos] % 10
+        esperada, etiquetas = UNIFORME_ULTIMO_DIGITO, [f"d{d}" for d in range(10)]
+
+    histogramas = _histogramas(
+        grupo, partido, digitos, n_grupos, n_partidos, len(esperada)
+    )
+    chi2 = chi_cuadrado(histogramas, esperada)
+    n_obs = histogramas.sum(axis=-1)
+
+    # Una fila por (nodo, partido) con al menos una mesa
+    grupos, partidos = np.nonzero(n_obs > 0)
+    resultado = arbol["claves"][nivel].iloc[grupos].reset_index(drop=True)
+    resultado["Agrupacion"] = np.asarray(arbol["partidos"], dtype=object)[partidos]
+    resultado["n_mesas"] = n_obs[grupos, partidos]
+    resultado = pd.concat(
+        [
+            resultado,
+            pd.DataFrame(histogramas[grupos, partidos], columns=etiquetas),
+        ],
+        axis=1,
+    )
+    resultado["chi2"] = chi2[grupos, partidos].round(2)
+    resultado["atipico"] = (resultado["chi2"] > CHI2_CRITICO[prueba]) & (
+        resultado["n_mesas"] >= min_observaciones
+    )
+    return resultado
+
+
+@lru_cache(maxsize=8)
+def _digitos_cacheados(nivel, prueba, min_observaciones, cargo, cargo2, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    if arbol is None:
+        return None
+    return analisis_digitos(arbol, nivel, prueba, min_observaciones)
+
+
+def obtener_analisis_digitos(
+    nivel="Distrito",
+    prueba="primer_digito",
+    min_observaciones=50,
+    cargo="DIPUTADOS PROVINCIALES",
+    cargo2="SENADORES PROVINCIALES",
+):
+    """Análisis de dígitos sobre la base completa, una vez por versión."""
+    return _digitos_cacheados(
+        nivel, prueba, int(min_observaciones), cargo, cargo2, version_archivo(BASE)
+    )
@@ -4,9 +4,11 @@ import sys
 import os
 import streamlit as st
 import pandas as pd
+import numpy as np
 import unicodedata
 from functools import lru_cache
 import hashlib
+import time
 
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
@@ -14,11 +16,20 @@ sys.path.append(str(project_root))
 # Cache global para dataframes procesados
 _CACHE_DATAFRAMES = {}
 _CACHE_VOTOS_PROCESADOS = {}
+_CACHE_ARBOLES = {}
 
 # Importar desde la ruta correcta
 
 from utils.constantes import DATA_PATH, BASE
 from utils.constantes import MUNICIPIOS_AMBA
+from src.funciones_streamlit.arbol_agregados import (
+    construir_arbol_agregados,
+    nivel_agregado,
+    huellas_por_mesa,
+    comparar_huellas,
+    actualizar_arbol,
+    completar_claves,
+)
 
 
 def _generar_cache_key(*args, **kwargs):
@@ -28,6 +39,18 @@ def _generar_cache_key(*args, **kwargs):
     return hashlib.md5("|".join(key_parts).encode()).hexdigest()
 
 
+def version_archivo(ruta=BASE) -> str:
+    """
+    Identifica la versión de un archivo de datos por su fecha de modificación
+    y tamaño. Cambia cada vez que se sube una base nueva.
+    """
+    try:
+        stat = Path(ruta).stat()
+    except OSError:
+        return "sin-archivo"
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
 @lru_cache(maxsize=32)
 def obtener_dataframe_procesado(cargo=None, cargo2=None):
     """
@@ -89,17 +112,123 @@ def _procesar_dataframe_para_analisis(df):
     return df_procesado
 
 
+def obtener_arbol_agregados(
+    cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
+):
+    """
+    Devuelve el árbol de agregados (Provincia → Seccion → Distrito →
+    Establecimiento → Mesa) calculado una sola vez por versión de la base.
+    Las vistas de secciones, municipios y escuelas leen de este árbol.
+    """
+    version = version_archivo(BASE)
+    clave = (cargo, cargo2)
+
+    entrada = _CACHE_ARBOLES.get(clave)
+    if entrada is not None and entrada["version"] == version:
+        return entrada["arbol"]
+
+    if entrada is not None:
+        # Cambió la base: descartar el dataframe de la versión anterior
+        _CACHE_DATAFRAMES.pop(_generar_cache_key(cargo, cargo2), None)
+        obtener_dataframe_procesado.cache_clear()
+
+    try:
+        df_procesado = obtener_dataframe_procesado(cargo, cargo2)
+
+        if df_procesado is None:
+            return None
+
+        df = df_procesado["dataframe"]
+        arbol = construir_arbol_agregados(df)
+        _CACHE_ARBOLES[clave] = {
+            "version": version,
+            "arbol": arbol,
+            "huellas": huellas_por_mesa(df),
+        }
+        return arbol
+
+    except Exception as e:
+        print(f"Error en obtener_arbol_agregados: {e}")
+        return None
+
+
+def ingerir_actualizacion(ruta=BASE) -> dict:
+    """
+    Ingesta incremental de una nueva versión de la base (recuento provisorio).
+
+    Para cada árbol ya cargado en memoria compara las huellas por mesa con la
+    versión anterior y aplica al árbol solo las mesas nuevas, modificadas o
+    eliminadas, en lugar de recalcular toda la provincia. Los árboles que
+    todavía no se cargaron se construyen de cero la primera vez que se piden.
+
+    Retorna un diccionario {(cargo, cargo2): resumen} con la cantidad de mesas
+    nuevas, modificadas y eliminadas y el tiempo de la actualización.
+    """
+    resumenes = {}
+    version = version_archivo(ruta)
+
+    for (cargo, cargo2), entrada in list(_CACHE_ARBOLES.items()):
+        inicio = time.perf_counter()
+        try:
+            df = crear_dataframe(ruta, ",", cargo, cargo2)
+            if df is None:
+                continue
+
+            huellas = huellas_por_mesa(df)
+            cambios = comparar_huellas(entrada["huellas"], huellas)
+
+            # Solo las filas de mesas nuevas o modificadas
+            mesas_cambiadas = cambios["nuevas"].append(cambios["modificadas"])
+            claves_filas = pd.MultiIndex.from_frame(
+                completar_claves(df, list(huellas.index.names))
+            )
+            df_cambios = df[claves_filas.isin(mesas_cambiadas)]
+
+            arbol = actualizar_arbol(
+                entrada["arbol"], df_cambios, cambios["eliminadas"]
+            )
+
+            # Actualizar caches con la nueva versión
+            cache_key = _generar_cache_key(cargo, cargo2)
+            _CACHE_DATAFRAMES[cache_key] = _procesar_dataframe_para_analisis(df)
+            _CACHE_ARBOLES[(cargo, cargo2)] = {
+                "version": version,
+                "arbol": arbol,
+                "huellas": huellas,
+            }
+
+            resumenes[(cargo, cargo2)] = {
+                "mesas_nuevas": len(cambios["nuevas"]),
+                "mesas_modificadas": len(cambios["modificadas"]),
+                "mesas_eliminadas": len(cambios["eliminadas"]),
+                "segundos": round(time.perf_counter() - inicio, 3),
+            }
+
+        except Exception as e:
+            print(f"Error en ingerir_actualizacion ({cargo}, {cargo2}): {e}")
+            _CACHE_ARBOLES.pop((cargo, cargo2), None)
+
+    obtener_dataframe_procesado.cache_clear()
+    return resumenes
+
+
 def limpiar_cache():
     """Limpia el cache cuando sea necesario."""
-    global _CACHE_DATAFRAMES, _CACHE_VOTOS_PROCESADOS
+    global _CACHE_DATAFRAMES, _CACHE_VOTOS_PROCESADOS, _CACHE_ARBOLES
     _CACHE_DATAFRAMES.clear()
     _CACHE_VOTOS_PROCESADOS.clear()
+    _CACHE_ARBOLES.clear()
     obtener_dataframe_procesado.cache_clear()
-    secciones_ganadas.cache_clear()
-    municipios_ganados.cache_clear()
-    votos_por_seccion.cache_clear()
-    analizar_rangos_votos.cache_clear()
-    obtener_secciones_ordenadas.cache_clear()
+    for agregado in (
+        _resumen_general_cacheado,
+        _votos_partido_por_seccion_cacheado,
+        _votos_por_seccion_cacheado,
+        _grafico_seccion_cacheado,
+        _secciones_ganadas_cacheado,
+        _municipios_ganados_cacheado,
+        _rangos_votos_cacheado,
+    ):
+        agregado.cache_clear()
 
 
 def limpiar_nombres_secciones(datos_dict):
@@ -134,12 +263,8 @@ def estadisticas_cache():
     """Devuelve estadísticas del uso del cache."""
     stats = {
         "dataframes_cacheados": len(_CACHE_DATAFRAMES),
+        "arboles_cacheados": len(_CACHE_ARBOLES),
         "cache_dataframe_maxsize": 32,
-        "cache_secciones_maxsize": 16,
-        "cache_municipios_maxsize": 16,
-        "cache_votos_seccion_maxsize": 32,
-        "cache_rangos_maxsize": 16,
-        "cache_secciones_ordenadas_maxsize": 16,
     }
     return stats
 
@@ -202,7 +327,6 @@ def ordenar_secciones(secciones, limpiar_nombres=True):
     return secciones_ordenadas
 
 
-@lru_cache(maxsize=16)
 def obtener_secciones_ordenadas(
     cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
 ):
@@ -213,16 +337,13 @@ def obtener_secciones_ordenadas(
         list: Lista ordenada de secciones
     """
     try:
-        # Obtener dataframe procesado
-        df_procesado = obtener_dataframe_procesado(cargo, cargo2)
+        # Las secciones son los nodos del primer nivel del árbol
+        arbol = obtener_arbol_agregados(cargo, cargo2)
 
-        if df_procesado is None:
+        if arbol is None:
             return []
 
-        df = df_procesado["dataframe"]
-
-        # Obtener secciones únicas y ordenarlas
-        secciones = df["Seccion"].unique()
+        secciones = arbol["claves"]["Seccion"]["Seccion"]
         return ordenar_secciones(list(secciones))
 
     except Exception as e:
@@ -605,6 +726,12 @@ def _norm_txt_safe(x: str) -> str:
     return s
 
 
+def _norm_por_valor(serie: pd.Series) -> pd.Series:
+    """Aplica _norm_txt_safe una vez por valor distinto y no por fila."""
+    valores = serie.astype(str)
+    return valores.map({valor: _norm_txt_safe(valor) for valor in valores.unique()})
+
+
 def detectar_mesas_atipicas_por_partido(
     df: pd.DataFrame,
     partido: str,
@@ -634,8 +761,8 @@ def detectar_mesas_atipicas_por_partido(
 
     # Normalizar
     df[col_votos] = pd.to_numeric(df[col_votos], errors="coerce").fillna(0)
-    tipo_norm = df[col_tipo].astype(str).apply(_norm_txt_safe)
-    part_norm = df[col_partido].astype(str).apply(_norm_txt_safe)
+    tipo_norm = _norm_por_valor(df[col_tipo])
+    part_norm = _norm_por_valor(df[col_partido])
     target_partido = _norm_txt_safe(partido)
     # Conjuntos de tipos
     es_positivo = tipo_norm.isin({"positivo", "positivos", "valido", "validos"})
@@ -645,13 +772,16 @@ def detectar_mesas_atipicas_por_partido(
     # (Solo líneas de positivos del partido; las filas de blancos no pertenecen a un partido)
     df_partido = df_partido[es_positivo.reindex(df_partido.index, fill_value=False)]
     if df_partido.empty:
-        # Mostrar partidos detectados (normalizados) para ver por qué no matchea
-        partidos_detectados = (
-            df[col_partido].astype(str).map(_norm_txt_safe).value_counts().head(20)
+        # Sugerir los partidos más parecidos al texto ingresado
+        from src.funciones_streamlit.indice_partidos import (
+            construir_indice_partidos,
+            sugerir_partidos,
         )
+
+        indice = construir_indice_partidos(df[col_partido].dropna().unique())
         st.warning(
             f"El partido '{partido}' no aparece tras normalizar. "
-            f"Algunos partidos encontrados: {list(partidos_detectados.index[:5])}"
+            f"Quizás quisiste decir: {sugerir_partidos(indice, partido)}"
         )
         return pd.DataFrame(
             columns=[
@@ -750,26 +880,40 @@ def detectar_mesas_atipicas_por_partido(
     return outliers[cols]
 
 
-@lru_cache(maxsize=16)
+def _votos_por_partido_en_nivel(arbol, nivel, columna):
+    """
+    Pasa a formato largo (columna | Agrupacion | votos) los votos positivos
+    de un nivel del árbol, agrupados por 'columna'.
+    """
+    votos = nivel_agregado(arbol, nivel)
+    largo = votos.melt(
+        id_vars=list(arbol["claves"][nivel].columns),
+        value_vars=arbol["partidos"],
+        var_name="Agrupacion",
+        value_name="votos",
+    )
+    return largo.groupby([columna, "Agrupacion"])["votos"].sum().reset_index()
+
+
 def municipios_ganados(
-    partidos_str,  # Cambiar a string para que sea hashable para lru_cache
+    partidos_str,  # String con la lista de partidos (mismo formato que antes)
     municipios_amba_str=None,  # String para municipios AMBA
     cargo="DIPUTADOS PROVINCIALES",
     cargo2="SENADORES PROVINCIALES",
 ):
     """
     Calcula cuántos municipios ganó cada partido de una lista.
-    Optimizada para usar cache y procesamiento compartido.
+    Lee los totales por distrito del árbol de agregados.
     """
     try:
         # Convertir strings de vuelta a objetos
         partidos = eval(partidos_str) if isinstance(partidos_str, str) else partidos_str
         municipios_amba = eval(municipios_amba_str) if municipios_amba_str else None
 
-        # Obtener dataframe procesado del cache
-        df_procesado = obtener_dataframe_procesado(cargo, cargo2)
+        # Obtener árbol de agregados del cache
+        arbol = obtener_arbol_agregados(cargo, cargo2)
 
-        if df_procesado is None:
+        if arbol is None:
             return (
                 pd.Series(dtype=int),
                 pd.Series(dtype=int),
@@ -777,8 +921,6 @@ def municipios_ganados(
                 pd.DataFrame(),
             )
 
-        df = df_procesado["dataframe"]
-
         # Función de normalización
         def normalizar_texto(texto):
             if pd.isna(texto):
@@ -788,8 +930,8 @@ def municipios_ganados(
         # Crear mapeo de partidos normalizados
         partidos_normalizados = {normalizar_texto(p): p for p in partidos}
 
-        # Usar índices optimizados
-        df_validos = df[df["tipoVoto_lower"] == "positivo"]
+        # Votos positivos por distrito y partido
+        df_validos = _votos_por_partido_en_nivel(arbol, "Distrito", "Distrito")
 
         if df_validos.empty:
             return (
@@ -799,33 +941,16 @@ def municipios_ganados(
                 pd.DataFrame(),
             )
 
-        # Limpiar valores NaN
-        df_validos = df_validos.dropna(subset=["Agrupacion"])
-
         # Normalizar partidos
-        df_validos = df_validos.copy()
         df_validos["partido_normalizado"] = df_validos["Agrupacion"].apply(
             normalizar_texto
         )
 
         # Filtrar partidos de interés
         partidos_norm_keys = list(partidos_normalizados.keys())
-        df_filtrado = df_validos[
+        resumen = df_validos[
             df_validos["partido_normalizado"].isin(partidos_norm_keys)
-        ]
-
-        if df_filtrado.empty:
-            return (
-                pd.Series(dtype=int),
-                pd.Series(dtype=int),
-                pd.DataFrame(),
-                pd.DataFrame(),
-            )
-
-        # Agrupar eficientemente
-        resumen = (
-            df_filtrado.groupby(["Distrito", "Agrupacion"])["votos"].sum().reset_index()
-        )
+        ][["Distrito", "Agrupacion", "votos"]]
 
         if resumen.empty:
             return (
@@ -887,14 +1012,13 @@ def municipios_ganados(
         )
 
 
-@lru_cache(maxsize=16)
 def analizar_rangos_votos(
     partidos_str, cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
 ):
     """
     Analiza los porcentajes de votos por municipio para partidos específicos
     y los clasifica en rangos predefinidos.
-    Optimizada para usar cache y procesamiento compartido.
+    Lee los totales por distrito del árbol de agregados.
     """
     try:
         # Convertir string de partidos a lista
@@ -902,42 +1026,34 @@ def analizar_rangos_votos(
             eval(partidos_str) if isinstance(partidos_str, str) else partidos_str
         )
 
-        # Obtener dataframe procesado del cache
-        df_procesado = obtener_dataframe_procesado(cargo, cargo2)
+        # Obtener árbol de agregados del cache
+        arbol = obtener_arbol_agregados(cargo, cargo2)
 
-        if df_procesado is None:
+        if arbol is None:
             return {}
 
-        df = df_procesado["dataframe"]
-
         # Función de normalización
         def normalizar_texto(texto):
             if pd.isna(texto):
                 return ""
             return str(texto).strip().upper()
 
-        # Usar índices optimizados
-        df_validos = df[df["tipoVoto_lower"] == "positivo"]
+        # Votos por partido y municipio
+        votos_partido_por_municipio = _votos_por_partido_en_nivel(
+            arbol, "Distrito", "Distrito"
+        )
 
-        if df_validos.empty:
+        if votos_partido_por_municipio.empty:
             return {}
 
-        # Limpiar valores NaN
-        df_validos = df_validos.dropna(subset=["Agrupacion"])
-
         # Calcular votos válidos totales por municipio
         votos_validos_por_municipio = (
-            df_validos.groupby("Distrito")["votos"]
+            votos_partido_por_municipio.groupby("Distrito")["votos"]
             .sum()
             .reset_index()
             .rename(columns={"votos": "votos_validos_total"})
         )
 
-        # Calcular votos por partido y municipio
-        votos_partido_por_municipio = (
-            df_validos.groupby(["Distrito", "Agrupacion"])["votos"].sum().reset_index()
-        )
-
         # Unir eficientemente
         df_completo = pd.merge(
             votos_partido_por_municipio,
@@ -1006,23 +1122,20 @@ def analizar_rangos_votos(
         return {}
 
 
-@lru_cache(maxsize=32)
 def votos_por_seccion(
     seccion, cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
 ):
     """
     Calcula los votos por partido para una sección específica.
-    Optimizada para usar cache y procesamiento compartido.
+    Lee la fila de la sección directamente del árbol de agregados.
     """
     try:
-        # Obtener dataframe procesado del cache
-        df_procesado = obtener_dataframe_procesado(cargo, cargo2)
+        # Obtener árbol de agregados del cache
+        arbol = obtener_arbol_agregados(cargo, cargo2)
 
-        if df_procesado is None:
+        if arbol is None:
             return {}
 
-        df = df_procesado["dataframe"]
-
         # Función de normalización
         def normalizar_texto(texto):
             if pd.isna(texto):
@@ -1038,31 +1151,32 @@ def votos_por_seccion(
         # Normalizar nombre de sección para comparación
         seccion_norm = normalizar_texto(seccion_completa)
 
-        # Filtrar por sección específica usando índices optimizados
-        df_seccion = df[
-            (df["tipoVoto_lower"] == "positivo")
-            & (df["Seccion"].apply(normalizar_texto) == seccion_norm)
-        ]
+        # Buscar la sección entre los nodos del árbol
+        secciones = arbol["claves"]["Seccion"]["Seccion"].apply(normalizar_texto)
+        posiciones = np.flatnonzero(secciones.to_numpy() == seccion_norm)
 
-        if df_seccion.empty:
+        if len(posiciones) == 0:
             print(f"ADVERTENCIA: No se encontraron datos para la sección {seccion}")
             return {}
 
-        # Limpiar valores NaN
-        df_seccion = df_seccion.dropna(subset=["Agrupacion"])
+        posicion = posiciones[0]
 
-        # Calcular votos por partido
-        votos_por_partido = (
-            df_seccion.groupby("Agrupacion")["votos"].sum().sort_values(ascending=False)
+        # Calcular votos por partido (sin partidos que no compitieron en la sección)
+        votos_por_partido = pd.Series(
+            arbol["votos_partido"]["Seccion"][posicion], index=arbol["partidos"]
         )
+        votos_por_partido = votos_por_partido[votos_por_partido > 0].sort_values(
+            ascending=False
+        )
+        votos_por_partido.index.name = "Agrupacion"
 
-        # Calcular votos en blanco (desde el dataframe original)
-        df_blancos = df[
-            (df["Seccion"].apply(normalizar_texto) == seccion_norm)
-            & (df["tipoVoto_lower"] == "blancos")
-        ]
-
-        votos_blancos = df_blancos["votos"].sum() if not df_blancos.empty else 0
+        # Votos en blanco de la sección
+        if "blancos" in arbol["tipos"]:
+            votos_blancos = int(
+                arbol["votos_tipo"]["Seccion"][posicion][arbol["tipos"].index("blancos")]
+            )
+        else:
+            votos_blancos = 0
 
         # Agregar votos en blanco al resultado
         if votos_blancos > 0:
@@ -1104,28 +1218,71 @@ def votos_por_seccion(
         return {}
 
 
-@lru_cache(maxsize=16)
+def grafico_votos_seccion(datos_seccion: dict, seccion, max_partidos: int = 10) -> dict:
+    """
+    Especificación Vega-Lite (para st.vega_lite_chart) de las barras
+    horizontales con el porcentaje de cada partido en la sección, a partir
+    del resultado de votos_por_seccion. Muestra los 'max_partidos' más
+    votados, el más votado arriba y el porcentaje al final de cada barra.
+    """
+    partidos = datos_seccion["partidos"][:max_partidos]
+    valores = [
+        {"Partido": partido, "Porcentaje": float(datos_seccion["porcentajes"][partido])}
+        for partido in partidos
+    ]
+
+    titulo = f"Distribución de votos en Sección {seccion}"
+    if datos_seccion.get("votos_blancos", 0) > 0:
+        titulo += " (incluye votos en blanco)"
+
+    eje_partido = {"field": "Partido", "type": "nominal", "sort": partidos, "title": None}
+    eje_porcentaje = {
+        "field": "Porcentaje",
+        "type": "quantitative",
+        "title": "Porcentaje de votos (%)",
+    }
+    return {
+        "title": titulo,
+        "data": {"values": valores},
+        "height": {"step": 28},
+        "encoding": {"y": eje_partido, "x": eje_porcentaje},
+        "layer": [
+            {
+                "mark": {"type": "bar"},
+                "encoding": {
+                    "tooltip": [
+                        {"field": "Partido", "type": "nominal"},
+                        {"field": "Porcentaje", "type": "quantitative", "format": ".1f"},
+                    ]
+                },
+            },
+            {
+                "mark": {"type": "text", "align": "left", "baseline": "middle", "dx": 3},
+                "encoding": {"text": {"field": "Porcentaje", "type": "quantitative", "format": ".1f"}},
+            },
+        ],
+    }
+
+
 def secciones_ganadas(
-    partidos_str,  # Cambiar a string para que sea hashable para lru_cache
+    partidos_str,  # String con la lista de partidos (mismo formato que antes)
     cargo="DIPUTADOS PROVINCIALES",
     cargo2="SENADORES PROVINCIALES",
 ):
     """
     Calcula cuántas secciones ganó cada partido de una lista.
-    Optimizada para usar cache y procesamiento compartido.
+    Lee los totales por sección del árbol de agregados.
     """
     try:
         # Convertir string de partidos de vuelta a lista
         partidos = eval(partidos_str) if isinstance(partidos_str, str) else partidos_str
 
-        # Obtener dataframe procesado del cache
-        df_procesado = obtener_dataframe_procesado(cargo, cargo2)
+        # Obtener árbol de agregados del cache
+        arbol = obtener_arbol_agregados(cargo, cargo2)
 
-        if df_procesado is None:
+        if arbol is None:
             return pd.Series(dtype=int), pd.DataFrame()
 
-        df = df_procesado["dataframe"]
-
         # Función de normalización
         def normalizar_texto(texto):
             if pd.isna(texto):
@@ -1135,34 +1292,22 @@ def secciones_ganadas(
         # Crear mapeo de partidos normalizados
         partidos_normalizados = {normalizar_texto(p): p for p in partidos}
 
-        # Usar índices optimizados para filtrado rápido
-        df_validos = df[df["tipoVoto_lower"] == "positivo"]
+        # Votos positivos por sección y partido
+        df_validos = _votos_por_partido_en_nivel(arbol, "Seccion", "Seccion")
 
         if df_validos.empty:
             return pd.Series(dtype=int), pd.DataFrame()
 
-        # Limpiar valores NaN
-        df_validos = df_validos.dropna(subset=["Agrupacion"])
-
         # Normalizar partidos para comparación
-        df_validos = df_validos.copy()
         df_validos["partido_normalizado"] = df_validos["Agrupacion"].apply(
             normalizar_texto
         )
 
         # Filtrar partidos de interés
         partidos_norm_keys = list(partidos_normalizados.keys())
-        df_filtrado = df_validos[
+        resumen = df_validos[
             df_validos["partido_normalizado"].isin(partidos_norm_keys)
-        ]
-
-        if df_filtrado.empty:
-            return pd.Series(dtype=int), pd.DataFrame()
-
-        # Agrupar eficientemente
-        resumen = (
-            df_filtrado.groupby(["Seccion", "Agrupacion"])["votos"].sum().reset_index()
-        )
+        ][["Seccion", "Agrupacion", "votos"]]
 
         if resumen.empty:
             return pd.Series(dtype=int), pd.DataFrame()
@@ -1184,3 +1329,132 @@ def secciones_ganadas(
     except Exception as e:
         print(f"ERROR en secciones_ganadas: {e}")
         return pd.Series(dtype=int), pd.DataFrame()
+
+
+# Agregados de las páginas, calculados una vez por versión de la base. Las
+# páginas los piden en cada rerun: después de la primera carga son lecturas
+# de cache. Los resultados son compartidos, no modificarlos.
+
+COLUMNAS_RESUMEN = ["Cargo", "Seccion", "Agrupacion", "tipoVoto", "votos"]
+
+
+def _dataframe_cargo(cargo, cargo2):
+    """
+    Filas de resultados del cargo ya cargadas. Pasa primero por el árbol, que
+    descarta el dataframe si la base cambió desde la última lectura.
+    """
+    if obtener_arbol_agregados(cargo, cargo2) is None:
+        return None
+    df_procesado = obtener_dataframe_procesado(cargo, cargo2)
+    if df_procesado is None:
+        return None
+    # Copia de las columnas usadas: las funciones de conteo reescriben 'votos'
+    return df_procesado["dataframe"][COLUMNAS_RESUMEN].copy()
+
+
+@lru_cache(maxsize=4)
+def _resumen_general_cacheado(cargo, cargo2, version):
+    df = _dataframe_cargo(cargo, cargo2)
+    if df is None:
+        return None
+    votos_por_tipo = contar_votos_por_tipo_eleccion(df)
+    return {
+        "votos_por_tipo": votos_por_tipo,
+        "total_votos": sumar_votos(votos_por_tipo, "votos_validos"),
+        "votos_por_partido": crear_diccionario_votos_por_partido(df),
+    }
+
+
+def obtener_resumen_general(
+    cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
+):
+    """
+    Votos válidos y nulos por cargo, total de votos válidos y votos por
+    partido: {"votos_por_tipo", "total_votos", "votos_por_partido"}.
+    """
+    return _resumen_general_cacheado(cargo, cargo2, version_archivo(BASE))
+
+
+@lru_cache(maxsize=16)
+def _votos_partido_por_seccion_cacheado(partido, cargo, cargo2, version):
+    df = _dataframe_cargo(cargo, cargo2)
+    if df is None:
+        return {}
+    return limpiar_nombres_secciones(votos_partido_y_validos_por_seccion(df, partido))
+
+
+def obtener_votos_partido_por_seccion(
+    partido, cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
+):
+    """votos_partido_y_validos_por_seccion con los nombres de sección limpios."""
+    return _votos_partido_por_seccion_cacheado(
+        partido, cargo, cargo2, version_archivo(BASE)
+    )
+
+
+@lru_cache(maxsize=32)
+def _votos_por_seccion_cacheado(seccion, cargo, cargo2, version):
+    return votos_por_seccion(seccion, cargo, cargo2)
+
+
+def obtener_votos_por_seccion(
+    seccion, cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
+):
+    """votos_por_seccion, una vez por sección y versión de la base."""
+    return _votos_por_seccion_cacheado(seccion, cargo, cargo2, version_archivo(BASE))
+
+
+@lru_cache(maxsize=32)
+def _grafico_seccion_cacheado(seccion, cargo, cargo2, version):
+    datos_seccion = _votos_por_seccion_cacheado(seccion, cargo, cargo2, version)
+    if not datos_seccion:
+        return None
+    return grafico_votos_seccion(datos_seccion, seccion)
+
+
+def obtener_grafico_seccion(
+    seccion, cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
+):
+    """Gráfico Vega-Lite de la sección, armado una vez por sección y versión."""
+    return _grafico_seccion_cacheado(seccion, cargo, cargo2, version_archivo(BASE))
+
+
+@lru_cache(maxsize=8)
+def _secciones_ganadas_cacheado(partidos_str, cargo, cargo2, version):
+    return secciones_ganadas(partidos_str, cargo, cargo2)
+
+
+def obtener_secciones_ganadas(
+    partidos_str, cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
+):
+    """secciones_ganadas, una vez por lista de partidos y versión de la base."""
+    return _secciones_ganadas_cacheado(partidos_str, cargo, cargo2, version_archivo(BASE))
+
+
+@lru_cache(maxsize=8)
+def _municipios_ganados_cacheado(partidos_str, municipios_amba_str, cargo, cargo2, version):
+    return municipios_ganados(partidos_str, municipios_amba_str, cargo, cargo2)
+
+
+def obtener_municipios_ganados(
+    partidos_str,
+    municipios_amba_str=None,
+    cargo="DIPUTADOS PROVINCIALES",
+    cargo2="SENADORES PROVINCIALES",
+):
+    """municipios_ganados, una vez por lista de partidos y versión de la base."""
+    return _municipios_ganados_cacheado(
+        partidos_str, municipios_amba_str, cargo, cargo2, version_archivo(BASE)
+    )
+
+
+@lru_cache(maxsize=8)
+def _rangos_votos_cacheado(partidos_str, cargo, cargo2, version):
+    return analizar_rangos_votos(partidos_str, cargo, cargo2)
+
+
+def obtener_rangos_votos(
+    partidos_str, cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
+):
+    """analizar_rangos_votos, una vez por lista de partidos y versión de la base."""
+    return _rangos_votos_cacheado(partidos_str, cargo, cargo2, version_archivo(BASE))
@@ -0,0 +1,96 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+# Columnas por las que filtra la página de electores
+COLUMNAS_FILTRO = ["tipo", "nombre_circuito", "seccion", "cod_circ"]
+
+
+def _listas_por_valor(serie: pd.Series) -> tuple:
+    """
+    Código de cada fila y, para cada valor distinto, la lista ordenada de
+    filas que lo tienen: {valor: (código, filas)}.
+    """
+    codigos, valores = pd.factorize(serie, sort=True)
+    orden = np.argsort(codigos, kind="stable").astype(np.int32)
+    cortes = np.cumsum(np.bincount(codigos[codigos >= 0], minlength=len(valores)))
+    # Los nulos (código -1) quedan al principio del orden y fuera de las listas
+    orden = orden[np.count_nonzero(codigos < 0) :]
+    listas = {
+        valor: (codigo, filas)
+        for codigo, (valor, filas) in enumerate(zip(valores, np.split(orden, cortes[:-1])))
+    }
+    return codigos, listas
+
+
+def construir_indice_filtros(df: pd.DataFrame, columnas=COLUMNAS_FILTRO) -> dict:
+    """
+    Índice para filtrar la base de mesas sin recorrerla: para cada columna de
+    'columnas' el código de cada fila y la lista de filas de cada valor.
+    También deja armados los valores de los desplegables y los totales del
+    encabezado, que no dependen del filtro.
+
+    Devuelve un diccionario con:
+      filas | codigos | listas | dominios | circuitos_por_tipo | resumen
+    """
+    indice = {"filas": len(df), "codigos": {}, "listas": {}, "dominios": {}}
+    for columna in columnas:
+        codigos, listas = _listas_por_valor(df[columna])
+        indice["codigos"][columna] = codigos
+        indice["listas"][columna] = listas
+        indice["dominios"][columna] = list(listas)
+
+    # Circuitos de cada tipo de mesa (el desplegable depende del tipo elegido)
+    circuitos = df["cod_circ"].to_numpy()
+    indice["circuitos_por_tipo"] = {
+        tipo: sorted(pd.unique(circuitos[filas]).tolist())
+        for tipo, (_, filas) in indice["listas"]["tipo"].items()
+    }
+
+    electores = df["cantidad_electores"]
+    por_tipo = electores.groupby(df["tipo"]).agg(["size", "sum"])
+    indice["resumen"] = {
+        "distritos": df["nombre_circuito"].nunique(),
+        "secciones": df["seccion"].nunique(),
+        "circuitos": df["cod_circ"].nunique(),
+        "escuelas": df["establecimiento"].nunique(),
+        "mesas": len(df),
+        "mesas_nativas": int(por_tipo["size"].get("NATIVA", 0)),
+        "mesas_extranjeras": int(por_tipo["size"].get("EXTRANJERA", 0)),
+        "electores_nativos": int(por_tipo["sum"].get("NATIVA", 0)),
+        "electores_extranjeros": int(por_tipo["sum"].get("EXTRANJERA", 0)),
+        "electores": int(electores.sum()),
+    }
+    return indice
+
+
+def filas_filtradas(indice: dict, filtros: dict):
+    """
+    Filas (ordenadas) que cumplen todos los filtros {columna: valor}; None
+    en un valor = sin filtro. Retorna None si no hay ningún filtro activo.
+
+    Parte de la lista más corta y descarta las filas cuyo código no coincide
+    en las demás columnas: el costo es el tamaño de esa lista, no el de la base.
+    """
+    activos = {columna: valor for columna, valor in filtros.items() if valor is not None}
+    if not activos:
+        return None
+
+    elegidos = []
+    for columna, valor in activos.items():
+        entrada = indice["listas"][columna].get(valor)
+        if entrada is None:
+            return np.zeros(0, dtype=np.int32)
+        elegidos.append((columna, *entrada))
+
+    elegidos.sort(key=lambda elegido: len(elegido[2]))
+    filas = elegidos[0][2]
+    for columna, codigo, _ in elegidos[1:]:
+        filas = filas[indice["codigos"][columna][filas] == codigo]
+    return filas
+
+
+def filtrar_mesas(df: pd.DataFrame, indice: dict, filtros: dict) -> pd.DataFrame:
+    """Mesas que cumplen los filtros: la base entera si no hay ninguno activo."""
+    filas = filas_filtradas(indice, filtros)
+    return df if filas is None else df.iloc[filas]
@@ -0,0 +1,257 @@
+from __future__ import annotations
+from pathlib import Path
+from functools import lru_cache
+import re
+import sys
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from utils.constantes import BASE, DATA_PATH, DISTRITOS
+from src.funciones_streamlit.funciones import (
+    _norm_txt_safe,
+    obtener_arbol_agregados,
+    version_archivo,
+)
+from src.funciones_streamlit.claves_mesa import SIN_CLAVE, desempaquetar_clave
+from src.funciones_streamlit.participacion import (
+    BASE_MESAS_NORMALIZADO,
+    claves_padron,
+    claves_resultados,
+)
+
+# Versión del formato de la clave: un índice guardado con otro formato se rearma
+# (v2: los distritos de resultados pasan por ALIAS_DISTRITOS)
+FORMATO_CLAVE = "empaquetada-v2"
+
+
+def separar_clave(claves: np.ndarray) -> pd.DataFrame:
+    """Distrito, nombre y número de mesa de cada clave (para los reportes)."""
+    campos = desempaquetar_clave(claves)
+    return pd.DataFrame(
+        {
+            "distrito": campos["distrito"],
+            "nombre_circuito": campos["distrito"].map(DISTRITOS).to_numpy(),
+            "nro_mesa": campos["nro_mesa"],
+        }
+    )
+
+
+def _primera_fila(posiciones: np.ndarray, n: int) -> np.ndarray:
+    """Primera fila de cada una de las n claves (-1 si ninguna fila la tiene)."""
+    primera = np.full(n, len(posiciones), dtype=np.int64)
+    filas = np.flatnonzero(posiciones >= 0)
+    np.minimum.at(primera, posiciones[filas], filas)
+    primera[primera == len(posiciones)] = -1
+    return primera
+
+
+def construir_indice_mesas(claves_res: np.ndarray, claves_pad: np.ndarray) -> dict:
+    """
+    Índice de cruce entre resultados y padrón sobre la clave canónica.
+
+      - claves: claves distintas de ambos lados (ordenadas)
+      - pos_resultados / pos_padron: posición en 'claves' de cada fila de cada
+        lado (-1 si la fila no tiene clave)
+      - fila_resultados: fila de resultados de cada clave (-1 si no hay)
+
+    Con esto cualquier valor por mesa se cruza con gathers y bincount, sin
+    joins de pandas: ver sumar_padron_por_mesa.
+    """
+    claves_res = np.asarray(claves_res, dtype=np.int64)
+    claves_pad = np.asarray(claves_pad, dtype=np.int64)
+    todas = np.concatenate([claves_res, claves_pad])
+    claves = np.unique(todas[todas != SIN_CLAVE])
+
+    def posiciones(lado):
+        pos = np.searchsorted(claves, lado)
+        pos[lado == SIN_CLAVE] = -1
+        return pos
+
+    pos_resultados = posiciones(claves_res)
+    return {
+        "claves": claves,
+        "pos_resultados": pos_resultados,
+        "pos_padron": posiciones(claves_pad),
+        # Mesa repetida en resultados: queda la primera fila
+        "fila_resultados": _primera_fila(pos_resultados, len(claves)),
+    }
+
+
+def sumar_padron_por_mesa(indice: dict, valores) -> tuple:
+    """
+    Suma 'valores' (una por fila del padrón) por clave y la lleva a las filas
+    de resultados. Retorna (suma por fila de resultados, tiene_padron).
+    """
+    n = len(indice["claves"])
+    pos = indice["pos_padron"]
+    validas = pos >= 0
+    suma = np.bincount(pos[validas], weights=np.asarray(valores, dtype=np.float64)[validas], minlength=n)
+    filas = np.bincount(pos[validas], minlength=n)
+
+    pos_res = indice["pos_resultados"]
+    tiene = np.zeros(len(pos_res), dtype=bool)
+    tiene[pos_res >= 0] = filas[pos_res[pos_res >= 0]] > 0
+    resultado = np.full(len(pos_res), np.nan)
+    resultado[tiene] = suma[pos_res[tiene]]
+    return resultado, tiene
+
+
+def primero_padron_por_mesa(indice: dict, valores) -> np.ndarray:
+    """Primer valor del padrón de cada clave, en las filas de resultados (None si no hay)."""
+    primera = _primera_fila(indice["pos_padron"], len(indice["claves"]))
+
+    valores = np.asarray(valores, dtype=object)
+    pos_res = indice["pos_resultados"]
+    resultado = np.full(len(pos_res), None, dtype=object)
+    con_clave = pos_res >= 0
+    fila = np.where(con_clave, primera[np.where(con_clave, pos_res, 0)], -1)
+    resultado[fila >= 0] = valores[fila[fila >= 0]]
+    return resultado
+
+
+def mesas_sin_par(indice: dict) -> dict:
+    """
+    Mesas que no cruzan, de cada lado:
+      - 'resultados': filas de resultados sin mesa en el padrón (o sin clave)
+      - 'padron': filas del padrón sin resultados (o sin clave)
+    Cada uno es un DataFrame con la fila original y la clave separada.
+    """
+    n = len(indice["claves"])
+    en_padron = np.bincount(indice["pos_padron"][indice["pos_padron"] >= 0], minlength=n) > 0
+    en_resultados = indice["fila_resultados"] >= 0
+
+    reportes = {}
+    for lado, posiciones, del_otro in (
+        ("resultados", indice["pos_resultados"], en_padron),
+        ("padron", indice["pos_padron"], en_resultados),
+    ):
+        # Posición -1 (fila sin clave) cae en el elemento agregado al final
+        sin_par = ~np.append(del_otro, False)[posiciones]
+        filas = np.flatnonzero(sin_par)
+        claves = np.append(indice["claves"], SIN_CLAVE)[posiciones[filas]]
+        reporte = separar_clave(claves)
+        reporte.insert(0, "fila", filas)
+        reporte = reporte.astype({"distrito": "Int64", "nro_mesa": "Int64"})
+        reporte.loc[claves == SIN_CLAVE, ["distrito", "nombre_circuito", "nro_mesa"]] = None
+        reportes[lado] = reporte
+    return reportes
+
+
+def ruta_indice(cargo, cargo2) -> Path:
+    """Archivo .npz del índice para un par de cargos."""
+    nombre = re.sub(r"[^a-z0-9]+", "_", _norm_txt_safe(f"{cargo} {cargo2}")).strip("_")
+    return DATA_PATH / f"indice_mesas_{nombre}.npz"
+
+
+def guardar_indice(indice: dict, ruta, version: str) -> None:
+    arreglos = {k: v for k, v in indice.items() if not k.startswith("_")}
+    temporal = Path(ruta).with_name(f".{Path(ruta).name}.tmp.npz")
+    try:
+        np.savez(temporal, version=np.array(version), **arreglos)
+        temporal.replace(ruta)
+    except OSError:
+        # Sin permiso de escritura: el índice queda solo en memoria
+        temporal.unlink(missing_ok=True)
+
+
+def cargar_indice(ruta, version: str):
+    """Índice guardado si existe y se armó con las mismas versiones de datos."""
+    try:
+        with np.load(ruta) as datos:
+            if str(datos["version"]) != version:
+                return None
+            return {k: datos[k] for k in datos.files if k != "version"}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=4)
+def _padron_mesas_cacheado(ruta, version):
+    try:
+        return pd.read_csv(ruta, dtype={"cod_circ": str})
+    except FileNotFoundError:
+        print(f"Error: el archivo '{ruta}' no fue encontrado")
+        return None
+
+
+def obtener_padron_mesas(ruta=BASE_MESAS_NORMALIZADO):
+    """Base de mesas normalizada, leída una vez por versión del archivo."""
+    return _padron_mesas_cacheado(str(ruta), version_archivo(ruta))
+
+
+@lru_cache(maxsize=4)
+def _indice_cacheado(cargo, cargo2, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    df_mesas = obtener_padron_mesas()
+    if arbol is None or df_mesas is None:
+        return None
+
+    # Las posiciones apuntan a las mesas del árbol y a las filas del padrón:
+    # con los mismos archivos son las mismas, así que no hace falta volver a
+    # calcular las claves para reusar el índice guardado
+    ruta = ruta_indice(cargo, cargo2)
+    indice = cargar_indice(ruta, version)
+    if (
+        indice is None
+        or len(indice["pos_resultados"]) != len(arbol["claves"]["Mesa"])
+        or len(indice["pos_padron"]) != len(df_mesas)
+    ):
+        indice = construir_indice_mesas(claves_resultados(arbol), claves_padron(df_mesas))
+        guardar_indice(indice, ruta, version)
+    return indice
+
+
+def obtener_indice_mesas(cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"):
+    """
+    Índice de cruce resultados ↔ padrón por mesa. Se guarda en disco y se
+    reconstruye solo si cambia la base de resultados o la de mesas.
+    """
+    version = f"{FORMATO_CLAVE}|{version_archivo(BASE)}|{version_archivo(BASE_MESAS_NORMALIZADO)}"
+    return _indice_cacheado(cargo, cargo2, version)
+
+
+def obtener_electores_por_mesa(cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"):
+    """Electores de cada mesa del árbol (NaN si no cruza con el padrón)."""
+    indice = obtener_indice_mesas(cargo, cargo2)
+    df_mesas = obtener_padron_mesas()
+    if indice is None or df_mesas is None:
+        return None
+    return sumar_padron_por_mesa(indice, df_mesas["cantidad_electores"])[0]
+
+
+def obtener_circuitos_por_mesa(cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"):
+    """Código de circuito (en mayúsculas) de cada mesa del árbol (None si no cruza)."""
+    indice = obtener_indice_mesas(cargo, cargo2)
+    df_mesas = obtener_padron_mesas()
+    if indice is None or df_mesas is None:
+        return None
+    circuitos = df_mesas["cod_circ"].astype(str).str.strip().str.upper()
+    return primero_padron_por_mesa(indice, circuitos)
+
+
+def obtener_mesas_sin_par(cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"):
+    """Reporte de mesas sin cruce de cada lado, con sus datos originales."""
+    indice = obtener_indice_mesas(cargo, cargo2)
+    df_mesas = obtener_padron_mesas()
+    if indice is None or df_mesas is None:
+        return None
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    reportes = mesas_sin_par(indice)
+    mesas = arbol["claves"]["Mesa"]
+    reportes["resultados"] = pd.concat(
+        [reportes["resultados"], mesas.iloc[reportes["resultados"]["fila"]].reset_index(drop=True)],
+        axis=1,
+    )
+    reportes["padron"] = pd.concat(
+        [
+            reportes["padron"],
+            df_mesas.iloc[reportes["padron"]["fila"]]
+            .reset_index(drop=True)
+            .add_suffix("_padron"),
+        ],
+        axis=1,
+    )
+    return reportes
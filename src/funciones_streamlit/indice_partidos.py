@@ -0,0 +1,177 @@
+from __future__ import annotations
+from pathlib import Path
+from functools import lru_cache
+import sys
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from utils.constantes import BASE
+from src.funciones_streamlit.funciones import (
+    _norm_txt_safe,
+    obtener_arbol_agregados,
+    version_archivo,
+)
+
+# Palabras que no cuentan para las siglas ("Frente DE Izquierda" → "FI")
+PALABRAS_VACIAS = {"de", "del", "la", "las", "el", "los", "y", "e", "para", "por", "en"}
+
+# Similitud mínima (Dice de trigramas) para aceptar una corrección automática
+SIMILITUD_MINIMA = 0.5
+
+
+def _trigramas(texto: str) -> set:
+    """Trigramas de caracteres de un texto normalizado, con bordes marcados."""
+    relleno = f"  {texto} "
+    return {relleno[i : i + 3] for i in range(len(relleno) - 2)}
+
+
+def _siglas(normalizado: str) -> set:
+    """Siglas posibles: iniciales de todas las palabras y sin palabras vacías."""
+    palabras = normalizado.split()
+    siglas = {"".join(p[0] for p in palabras)}
+    sin_vacias = [p for p in palabras if p not in PALABRAS_VACIAS]
+    if sin_vacias:
+        siglas.add("".join(p[0] for p in sin_vacias))
+    return {sigla for sigla in siglas if len(sigla) >= 2}
+
+
+def construir_indice_partidos(partidos) -> dict:
+    """
+    Arma un índice de búsqueda aproximada sobre los nombres de partidos:
+    nombre normalizado, siglas e índice invertido de trigramas de caracteres.
+    Se construye una sola vez sobre los nombres distintos (decenas), no sobre
+    las filas de la base.
+
+    Devuelve un diccionario con:
+      nombres | normalizados | exactos | siglas | trigramas | tamanios
+    """
+    nombres = sorted({str(p) for p in partidos if p is not None and str(p).strip()})
+    normalizados = [_norm_txt_safe(nombre) for nombre in nombres]
+
+    indice = {
+        "nombres": nombres,
+        "normalizados": normalizados,
+        "exactos": {},
+        "siglas": {},
+        "trigramas": {},
+        "tamanios": [],
+    }
+    for posicion, normalizado in enumerate(normalizados):
+        indice["exactos"].setdefault(normalizado, posicion)
+        for sigla in _siglas(normalizado):
+            indice["siglas"].setdefault(sigla, []).append(posicion)
+        trigramas = _trigramas(normalizado)
+        indice["tamanios"].append(len(trigramas))
+        for trigrama in trigramas:
+            indice["trigramas"].setdefault(trigrama, []).append(posicion)
+    return indice
+
+
+def _puntajes(indice: dict, normalizado: str) -> dict:
+    """Similitud de Dice entre los trigramas del texto y los de cada partido."""
+    trigramas = _trigramas(normalizado)
+    comunes = {}
+    for trigrama in trigramas:
+        for posicion in indice["trigramas"].get(trigrama, ()):
+            comunes[posicion] = comunes.get(posicion, 0) + 1
+    return {
+        posicion: 2 * n / (len(trigramas) + indice["tamanios"][posicion])
+        for posicion, n in comunes.items()
+    }
+
+
+def _por_sigla(indice: dict, normalizado: str, exacta: bool = True) -> set:
+    """Partidos cuya sigla es (o empieza con) el texto escrito."""
+    compacto = normalizado.replace(" ", "")
+    if exacta:
+        return set(indice["siglas"].get(compacto, ()))
+    if len(compacto) < 2:
+        return set()
+    return {
+        posicion
+        for sigla, posiciones in indice["siglas"].items()
+        if sigla.startswith(compacto)
+        for posicion in posiciones
+    }
+
+
+def sugerir_partidos(indice: dict, texto: str, n: int = 5) -> list:
+    """
+    Nombres de partidos más parecidos a 'texto', del más al menos parecido.
+    Primero las siglas que coinciden (exactas y luego por comienzo), después
+    los nombres que empiezan con el texto y al final el resto por similitud
+    de trigramas.
+    """
+    normalizado = _norm_txt_safe(texto)
+    if not normalizado:
+        return indice["nombres"][:n]
+
+    puntajes = _puntajes(indice, normalizado)
+    for posicion in _por_sigla(indice, normalizado, exacta=False):
+        puntajes[posicion] = 1.8
+    for posicion in _por_sigla(indice, normalizado):
+        puntajes[posicion] = 2.0
+    for posicion, nombre in enumerate(indice["normalizados"]):
+        if nombre.startswith(normalizado):
+            puntajes[posicion] = max(puntajes.get(posicion, 0), 1.5)
+
+    if not puntajes:
+        # Nada parecido: mostrar algunos partidos para orientar
+        return indice["nombres"][:n]
+    mejores = sorted(puntajes, key=lambda p: (-puntajes[p], indice["nombres"][p]))
+    return [indice["nombres"][posicion] for posicion in mejores[:n]]
+
+
+def resolver_partido(indice: dict, texto: str) -> str | None:
+    """
+    Devuelve el nombre canónico del partido escrito en 'texto', tolerando
+    mayúsculas, tildes, errores de tipeo y siglas ("FP", "LLA").
+    None si no hay una coincidencia clara.
+    """
+    normalizado = _norm_txt_safe(texto)
+    if not normalizado:
+        return None
+
+    # 1) Nombre exacto tras normalizar
+    if normalizado in indice["exactos"]:
+        return indice["nombres"][indice["exactos"][normalizado]]
+
+    # 2) Sigla (completa o su comienzo: "FIT" → "FITU") de un único partido
+    for exacta in (True, False):
+        candidatos = _por_sigla(indice, normalizado, exacta)
+        if len(candidatos) == 1:
+            return indice["nombres"][candidatos.pop()]
+
+    # 3) Prefijo de un único partido
+    prefijos = [
+        posicion
+        for posicion, nombre in enumerate(indice["normalizados"])
+        if nombre.startswith(normalizado)
+    ]
+    if len(prefijos) == 1:
+        return indice["nombres"][prefijos[0]]
+
+    # 4) El más parecido por trigramas, si es claramente parecido
+    puntajes = _puntajes(indice, normalizado)
+    if not puntajes:
+        return None
+    mejor = max(puntajes, key=puntajes.get)
+    if puntajes[mejor] < SIMILITUD_MINIMA:
+        return None
+    return indice["nombres"][mejor]
+
+
+@lru_cache(maxsize=8)
+def _indice_cacheado(cargo, cargo2, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    if arbol is None:
+        return None
+    return construir_indice_partidos(arbol["partidos"])
+
+
+def obtener_indice_partidos(
+    cargo="DIPUTADOS PROVINCIALES", cargo2="SENADORES PROVINCIALES"
+):
+    """Índice de partidos de la base, construido una vez por versión."""
+    return _indice_cacheado(cargo, cargo2, version_archivo(BASE))
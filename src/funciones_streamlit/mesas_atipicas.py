@@ -0,0 +1,790 @@
+from __future__ import annotations
+from pathlib import Path
+from functools import lru_cache
+import sys
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from utils.constantes import BASE
+from src.funciones_streamlit.arbol_agregados import (
+    TIPOS_POSITIVOS,
+    TIPOS_BLANCOS,
+    ancestro_de_mesa,
+)
+from src.funciones_streamlit.funciones import (
+    _norm_txt_safe,
+    obtener_arbol_agregados,
+    version_archivo,
+)
+from src.funciones_streamlit.deteccion_paralela import (
+    MIN_MESAS_PARALELO,
+    escanear_en_paralelo,
+)
+from src.funciones_streamlit.indice_mesas import (
+    obtener_circuitos_por_mesa,
+    obtener_electores_por_mesa,
+)
+
+# Escala del MAD para que sea comparable con el desvío estándar (normal)
+ESCALA_MAD = 0.6745
+REFERENCIAS_ROBUSTAS = ["Establecimiento", "Circuito"]
+
+# Grupos con menos mesas no se puntúan: su mediana y su MAD no dicen nada
+MIN_MESAS_ROBUSTO = 3
+# Piso del MAD (pp): en escuelas chicas y parejas el MAD sale casi 0 y
+# cualquier diferencia daría un |z| enorme
+PISO_MAD_PP = 0.5
+
+# Métricas por mesa: (tipos de voto del numerador, denominador).
+# "emitidos" = todos los tipos de voto; "electores" = padrón de la mesa.
+METRICAS_MESA = {
+    "Participación": ("emitidos", "electores"),
+    "Votos en blanco": (TIPOS_BLANCOS, "emitidos"),
+    "Votos nulos": ({"nulo", "nulos"}, "emitidos"),
+    "Votos recurridos": ({"recurrido", "recurridos"}, "emitidos"),
+    "Votos impugnados": ({"impugnado", "impugnados"}, "emitidos"),
+    "Votos de comando": ({"comando"}, "emitidos"),
+}
+
+COLUMNAS_METRICA = [
+    "Distrito",
+    "Establecimiento",
+    "Mesa",
+    "numerador",
+    "denominador",
+    "pct_mesa",
+    "pct_escuela",
+    "desvio_pp",
+    "z_robusto",
+]
+
+# Niveles de comparación, del más cercano a la mesa al más amplio
+REFERENCIAS_MULTINIVEL = ["Establecimiento", "Circuito", "Distrito", "Seccion"]
+SUFIJOS_REFERENCIA = {
+    "Establecimiento": "escuela",
+    "Circuito": "circuito",
+    "Distrito": "distrito",
+    "Seccion": "seccion",
+}
+
+COLUMNAS_DESVIO = [
+    "Distrito",
+    "Establecimiento",
+    "Mesa",
+    "votos_partido_mesa",
+    "denom_mesa",
+    "pct_mesa",
+    "votos_partido_escuela",
+    "denom_escuela",
+    "pct_escuela",
+    "desvio_pp",
+]
+
+# Columnas de tabla_desvios_multinivel (también cuando no hay partido)
+COLUMNAS_DESVIO_MULTINIVEL = [
+    "Distrito",
+    "Establecimiento",
+    "Mesa",
+    "votos_partido_mesa",
+    "denom_mesa",
+    "pct_mesa",
+    *[
+        f"{medida}_{SUFIJOS_REFERENCIA[nivel]}"
+        for nivel in REFERENCIAS_MULTINIVEL
+        for medida in ("pct", "desvio", "n_mesas")
+    ],
+    "referencia",
+    "desvio_pp",
+]
+
+
+def columnas_partido(arbol: dict, partido: str) -> np.ndarray:
+    """Posiciones de las columnas del árbol cuyo partido coincide tras normalizar."""
+    objetivo = _norm_txt_safe(partido)
+    return np.flatnonzero(
+        [_norm_txt_safe(nombre) == objetivo for nombre in arbol["partidos"]]
+    )
+
+
+def denominador_por_nivel(arbol: dict, nivel: str, incluir_blancos: bool) -> np.ndarray:
+    """Votos positivos (o válidos = positivos + blancos) de cada nodo del nivel."""
+    tipos = list(TIPOS_POSITIVOS)
+    if incluir_blancos:
+        tipos += list(TIPOS_BLANCOS)
+    columnas = np.isin(np.asarray(arbol["tipos"], dtype=object), tipos)
+    return arbol["votos_tipo"][nivel][:, columnas].sum(axis=1)
+
+
+def tabla_desvios_partido(
+    arbol: dict, partido: str, incluir_blancos: bool = False
+) -> pd.DataFrame:
+    """
+    Calcula, para todas las mesas, el desvío del porcentaje de 'partido' en la
+    mesa respecto del porcentaje en su escuela, leyendo del árbol de agregados.
+    No aplica umbrales: el resultado se cachea y se filtra con filtrar_desvios.
+
+    Devuelve columnas (sin redondear):
+      Distrito | Establecimiento | Mesa | votos_partido_mesa | denom_mesa | pct_mesa |
+      votos_partido_escuela | denom_escuela | pct_escuela | desvio_pp
+    """
+    columnas = columnas_partido(arbol, partido)
+    if len(columnas) == 0:
+        return pd.DataFrame(columns=COLUMNAS_DESVIO)
+
+    # Numeradores y denominadores por mesa; la escuela se obtiene con 'padre'
+    escuela = arbol["padre"]["Mesa"]
+    votos_mesa = arbol["votos_partido"]["Mesa"][:, columnas].sum(axis=1)
+    votos_escuela = arbol["votos_partido"]["Establecimiento"][:, columnas].sum(axis=1)
+    denom_mesa = denominador_por_nivel(arbol, "Mesa", incluir_blancos)
+    denom_escuela = denominador_por_nivel(arbol, "Establecimiento", incluir_blancos)
+
+    tabla = arbol["claves"]["Mesa"][["Distrito", "Establecimiento", "Mesa"]].copy()
+    tabla["votos_partido_mesa"] = votos_mesa
+    tabla["denom_mesa"] = denom_mesa
+    tabla["votos_partido_escuela"] = votos_escuela[escuela]
+    tabla["denom_escuela"] = denom_escuela[escuela]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tabla["pct_mesa"] = np.nan_to_num(votos_mesa / denom_mesa) * 100
+        tabla["pct_escuela"] = (
+            np.nan_to_num(votos_escuela / denom_escuela)[escuela] * 100
+        )
+    tabla["desvio_pp"] = tabla["pct_mesa"] - tabla["pct_escuela"]
+
+    # Solo mesas con votos en el denominador
+    tabla = tabla[tabla["denom_mesa"] > 0]
+    tabla = tabla.sort_values(["Distrito", "Establecimiento", "Mesa"], kind="stable")
+    return tabla[COLUMNAS_DESVIO].reset_index(drop=True)
+
+
+def filtrar_desvios(
+    tabla: pd.DataFrame, umbral_min: float = -5.0, umbral_max: float = 5.0
+) -> pd.DataFrame:
+    """Mesas con umbral_min ≤ desvío ≤ umbral_max, redondeadas para mostrar."""
+    desvio = tabla["desvio_pp"].to_numpy()
+    resultado = tabla[(desvio >= umbral_min) & (desvio <= umbral_max)].copy()
+    for columna in resultado.columns:
+        if columna.startswith(("pct_", "desvio_")):
+            resultado[columna] = resultado[columna].round(1)
+    return resultado
+
+
+def grupos_de_referencia(arbol: dict, circuitos: np.ndarray | None = None) -> dict:
+    """
+    Grupo de cada mesa en cada nivel de referencia. Escuela, distrito y sección
+    salen del árbol (ancestros); el circuito, del código de circuito por mesa
+    (identificado por distrito y código). Las mesas sin circuito quedan en -1.
+    """
+    grupos = {
+        nivel: ancestro_de_mesa(arbol, nivel)
+        for nivel in ["Establecimiento", "Distrito", "Seccion"]
+    }
+    if circuitos is None:
+        grupos["Circuito"] = np.full(len(arbol["claves"]["Mesa"]), -1, dtype=np.int64)
+    else:
+        codigo, _ = pd.factorize(
+            pd.MultiIndex.from_arrays(
+                [arbol["claves"]["Mesa"]["Distrito"], pd.Series(circuitos).fillna("")]
+            )
+        )
+        grupos["Circuito"] = np.where(pd.notna(circuitos), codigo, -1)
+    return grupos
+
+
+def tabla_desvios_multinivel(
+    arbol: dict,
+    partido: str,
+    incluir_blancos: bool = False,
+    circuitos: np.ndarray | None = None,
+    min_mesas: int = 3,
+) -> pd.DataFrame:
+    """
+    Desvío del porcentaje de 'partido' en cada mesa frente a su escuela,
+    circuito, distrito y sección a la vez. Cada referencia es una suma por
+    grupo (bincount) sobre el mismo arreglo de mesas, así que agregar niveles
+    no repite recorridos de la base.
+
+    'desvio_pp' usa la referencia más cercana que tenga al menos 'min_mesas'
+    mesas con votos: si la escuela tiene menos, se compara con el circuito;
+    si tampoco alcanza, con el distrito y por último con la sección.
+
+    Devuelve COLUMNAS_DESVIO_MULTINIVEL: los datos de la mesa, por referencia
+    pct_<nivel> | desvio_<nivel> | n_mesas_<nivel>, 'referencia' (la usada)
+    y 'desvio_pp'.
+    """
+    columnas = columnas_partido(arbol, partido)
+    if len(columnas) == 0:
+        return pd.DataFrame(columns=COLUMNAS_DESVIO_MULTINIVEL)
+
+    votos_mesa = arbol["votos_partido"]["Mesa"][:, columnas].sum(axis=1)
+    denom_mesa = denominador_por_nivel(arbol, "Mesa", incluir_blancos)
+    con_votos = denom_mesa > 0
+
+    tabla = arbol["claves"]["Mesa"][["Distrito", "Establecimiento", "Mesa"]].copy()
+    tabla["votos_partido_mesa"] = votos_mesa
+    tabla["denom_mesa"] = denom_mesa
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tabla["pct_mesa"] = np.nan_to_num(votos_mesa / denom_mesa) * 100
+
+    # Referencia elegida: la primera (más cercana) con suficientes mesas
+    grupos = grupos_de_referencia(arbol, circuitos)
+    elegida = np.full(len(tabla), len(REFERENCIAS_MULTINIVEL) - 1)
+    pendiente = np.ones(len(tabla), dtype=bool)
+    for orden, nivel in enumerate(REFERENCIAS_MULTINIVEL):
+        grupo = grupos[nivel]
+        sufijo = SUFIJOS_REFERENCIA[nivel]
+        conocido = grupo >= 0
+        indice = np.where(conocido, grupo, 0)
+        n_grupos = int(grupo.max()) + 1 if conocido.any() else 1
+
+        pesos = conocido & con_votos
+        votos_grupo = np.bincount(indice, weights=votos_mesa * pesos, minlength=n_grupos)
+        denom_grupo = np.bincount(indice, weights=denom_mesa * pesos, minlength=n_grupos)
+        mesas_grupo = np.bincount(indice, weights=pesos, minlength=n_grupos)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = np.nan_to_num(votos_grupo / denom_grupo)[indice] * 100
+        n_mesas = np.where(conocido, mesas_grupo[indice], 0).astype(np.int64)
+
+        tabla[f"pct_{sufijo}"] = np.where(conocido, pct, np.nan)
+        tabla[f"desvio_{sufijo}"] = tabla["pct_mesa"] - tabla[f"pct_{sufijo}"]
+        tabla[f"n_mesas_{sufijo}"] = n_mesas
+
+        alcanza = pendiente & (n_mesas >= min_mesas)
+        elegida[alcanza] = orden
+        pendiente &= ~alcanza
+
+    desvios = tabla[
+        [f"desvio_{SUFIJOS_REFERENCIA[nivel]}" for nivel in REFERENCIAS_MULTINIVEL]
+    ].to_numpy()
+    tabla["referencia"] = np.asarray(REFERENCIAS_MULTINIVEL, dtype=object)[elegida]
+    tabla["desvio_pp"] = desvios[np.arange(len(tabla)), elegida]
+
+    tabla = tabla.loc[con_votos, COLUMNAS_DESVIO_MULTINIVEL]
+    return tabla.sort_values(
+        ["Distrito", "Establecimiento", "Mesa"], kind="stable"
+    ).reset_index(drop=True)
+
+
+def matriz_desvios(arbol: dict, incluir_blancos: bool = False) -> dict:
+    """
+    Desvío de todos los partidos a la vez: porcentaje de cada partido en cada
+    mesa menos su porcentaje en la escuela, como matriz (mesas × partidos).
+
+    Devuelve {"pct_mesa", "pct_escuela", "desvio_pp"} (matrices) y "denom_mesa".
+    """
+    escuela = arbol["padre"]["Mesa"]
+    denom_mesa = denominador_por_nivel(arbol, "Mesa", incluir_blancos)
+    denom_escuela = denominador_por_nivel(arbol, "Establecimiento", incluir_blancos)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_mesa = (
+            np.nan_to_num(arbol["votos_partido"]["Mesa"] / denom_mesa[:, None]) * 100
+        )
+        pct_escuela = (
+            np.nan_to_num(
+                arbol["votos_partido"]["Establecimiento"] / denom_escuela[:, None]
+            )[escuela]
+            * 100
+        )
+
+    return {
+        "pct_mesa": pct_mesa,
+        "pct_escuela": pct_escuela,
+        "desvio_pp": pct_mesa - pct_escuela,
+        "denom_mesa": denom_mesa,
+    }
+
+
+def escanear_todos_los_partidos(
+    arbol: dict,
+    umbral_min: float = -5.0,
+    umbral_max: float = 5.0,
+    incluir_blancos: bool = False,
+    matriz: dict | None = None,
+) -> pd.DataFrame:
+    """
+    Recorre todos los partidos en una sola pasada sobre la matriz de desvíos y
+    devuelve los pares (mesa, partido) con umbral_min ≤ desvío ≤ umbral_max.
+
+    Devuelve columnas:
+      Distrito | Establecimiento | Mesa | Agrupacion | votos_partido_mesa |
+      denom_mesa | pct_mesa | pct_escuela | desvio_pp
+    """
+    if matriz is None:
+        matriz = matriz_desvios(arbol, incluir_blancos)
+
+    desvio = matriz["desvio_pp"]
+    marcadas = (desvio >= umbral_min) & (desvio <= umbral_max)
+    marcadas &= (matriz["denom_mesa"] > 0)[:, None]
+    filas, columnas = np.nonzero(marcadas)
+
+    return _tabla_pares(
+        arbol,
+        filas,
+        columnas,
+        matriz["denom_mesa"][filas],
+        matriz["pct_mesa"][filas, columnas],
+        matriz["pct_escuela"][filas, columnas],
+        desvio[filas, columnas],
+    )
+
+
+def escanear_todos_los_partidos_paralelo(
+    arbol: dict,
+    umbral_min: float = -5.0,
+    umbral_max: float = 5.0,
+    incluir_blancos: bool = False,
+    procesos: int | None = None,
+) -> pd.DataFrame:
+    """
+    Igual que escanear_todos_los_partidos, pero repartido por distritos en un
+    pool de procesos (ver deteccion_paralela), para scripts por lotes sobre
+    bases mucho más grandes que una provincia. Con pocas mesas corre en el
+    proceso actual porque levantar el pool cuesta más que el escaneo.
+    """
+    n_mesas = len(arbol["claves"]["Mesa"])
+    if n_mesas < MIN_MESAS_PARALELO or procesos == 1:
+        return escanear_todos_los_partidos(
+            arbol, umbral_min, umbral_max, incluir_blancos
+        )
+
+    # Primera mesa de cada distrito: distrito → escuelas → mesas
+    inicios_distrito = arbol["hijos"]["Establecimiento"][arbol["hijos"]["Distrito"][:-1]]
+    denom_mesa = denominador_por_nivel(arbol, "Mesa", incluir_blancos)
+
+    filas, columnas, pct_mesa, pct_escuela, desvio = escanear_en_paralelo(
+        arbol["votos_partido"]["Mesa"],
+        denom_mesa,
+        arbol["padre"]["Mesa"],
+        inicios_distrito,
+        umbral_min,
+        umbral_max,
+        procesos,
+    )
+    return _tabla_pares(
+        arbol, filas, columnas, denom_mesa[filas], pct_mesa, pct_escuela, desvio
+    )
+
+
+def _tabla_pares(arbol, filas, columnas, denom, pct_mesa, pct_escuela, desvio):
+    """Arma la tabla de pares (mesa, partido) marcados por el escaneo."""
+    claves = arbol["claves"]["Mesa"][["Distrito", "Establecimiento", "Mesa"]]
+    resultado = claves.iloc[filas].reset_index(drop=True)
+    resultado["Agrupacion"] = np.asarray(arbol["partidos"], dtype=object)[columnas]
+    resultado["votos_partido_mesa"] = arbol["votos_partido"]["Mesa"][filas, columnas]
+    resultado["denom_mesa"] = denom
+    resultado["pct_mesa"] = np.round(pct_mesa, 1)
+    resultado["pct_escuela"] = np.round(pct_escuela, 1)
+    resultado["desvio_pp"] = np.round(desvio, 1)
+
+    return resultado.sort_values(
+        ["Distrito", "Establecimiento", "Mesa", "Agrupacion"], kind="stable"
+    ).reset_index(drop=True)
+
+
+def _mediana_por_grupo(valores: np.ndarray, grupos: np.ndarray):
+    """
+    Mediana de 'valores' dentro de cada grupo, sin recorrer los grupos en Python:
+    se ordena una vez por (grupo, valor) y la mediana de cada grupo se toma por
+    aritmética de índices sobre su rango contiguo.
+
+    Devuelve (mediana alineada a cada elemento, tamaño del grupo de cada elemento).
+    """
+    orden = np.lexsort((valores, grupos))
+    grupos_ordenados = grupos[orden]
+    valores_ordenados = valores[orden]
+
+    inicios = np.flatnonzero(np.r_[True, grupos_ordenados[1:] != grupos_ordenados[:-1]])
+    tamanios = np.diff(np.r_[inicios, len(grupos_ordenados)])
+    medianas = (
+        valores_ordenados[inicios + (tamanios - 1) // 2]
+        + valores_ordenados[inicios + tamanios // 2]
+    ) / 2
+
+    mediana = np.empty(len(valores), dtype=np.float64)
+    tamanio = np.empty(len(valores), dtype=np.int64)
+    mediana[orden] = np.repeat(medianas, tamanios)
+    tamanio[orden] = np.repeat(tamanios, tamanios)
+    return mediana, tamanio
+
+
+def z_robusto(
+    valores: np.ndarray,
+    grupos: np.ndarray,
+    min_mesas: int = MIN_MESAS_ROBUSTO,
+    denominadores: np.ndarray | None = None,
+    piso_mad: float = PISO_MAD_PP,
+) -> dict:
+    """
+    Z robusto de cada valor (porcentaje) respecto de su grupo:
+    0.6745 × (valor − mediana) / MAD, con MAD = mediana(|valor − mediana|).
+
+    El MAD se acota por abajo con 'piso_mad' y, si se pasan 'denominadores'
+    (votos de cada mesa), con el error binomial del porcentaje en la mediana
+    del grupo llevado a escala MAD (0.6745 × EE): una mesa no es atípica por
+    variar lo que varía el azar. Los grupos con menos de 'min_mesas' mesas
+    quedan con z = NaN y no entran en el ranking.
+    """
+    mediana, tamanio = _mediana_por_grupo(valores, grupos)
+    mad, _ = _mediana_por_grupo(np.abs(valores - mediana), grupos)
+
+    piso = np.full(len(valores), float(piso_mad))
+    if denominadores is not None:
+        proporcion = np.clip(mediana / 100, 0, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            error = np.sqrt(proporcion * (1 - proporcion) / denominadores) * 100
+        piso = np.fmax(piso, ESCALA_MAD * np.nan_to_num(error))
+    mad = np.maximum(mad, piso)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(mad > 0, ESCALA_MAD * (valores - mediana) / mad, 0.0)
+    z[tamanio < min_mesas] = np.nan
+    return {"z": z, "mediana": mediana, "mad": mad, "n_mesas": tamanio}
+
+
+def puntajes_robustos(
+    arbol: dict,
+    referencia: str = "Establecimiento",
+    incluir_blancos: bool = False,
+    circuitos: np.ndarray | None = None,
+    min_mesas: int = MIN_MESAS_ROBUSTO,
+) -> dict:
+    """
+    Z robusto del porcentaje de cada partido en cada mesa respecto de la
+    mediana de las mesas de su escuela o de su circuito, para todos los
+    partidos a la vez (grupo = referencia × partido). Los grupos de menos de
+    'min_mesas' mesas quedan sin puntaje; el MAD tiene piso (ver z_robusto).
+
+    Solo entran mesas con votos en el denominador y, para circuitos, mesas
+    con circuito conocido. Devuelve arreglos planos alineados por (mesa, partido):
+      fila | partido | circuito | pct_mesa | mediana | mad | n_mesas | z
+    """
+    if referencia not in REFERENCIAS_ROBUSTAS:
+        raise ValueError(f"Referencia desconocida: {referencia}")
+
+    matriz = matriz_desvios(arbol, incluir_blancos)
+    validas = matriz["denom_mesa"] > 0
+
+    if referencia == "Establecimiento":
+        grupo_mesa = arbol["padre"]["Mesa"].astype(np.int64)
+    else:
+        if circuitos is None:
+            raise ValueError("La referencia 'Circuito' requiere los circuitos por mesa")
+        con_circuito = pd.notna(circuitos)
+        validas &= con_circuito
+        # Un circuito se identifica por (distrito, código)
+        grupo_mesa, _ = pd.factorize(
+            pd.MultiIndex.from_arrays(
+                [arbol["claves"]["Mesa"]["Distrito"], pd.Series(circuitos).fillna("")]
+            )
+        )
+        grupo_mesa = grupo_mesa.astype(np.int64)
+
+    filas = np.flatnonzero(validas)
+    n_partidos = len(arbol["partidos"])
+    pct = matriz["pct_mesa"][filas]
+
+    # Grupo combinado (referencia, partido) como entero compacto
+    grupos = (grupo_mesa[filas][:, None] * n_partidos + np.arange(n_partidos)).ravel()
+    puntajes = z_robusto(
+        pct.ravel(),
+        grupos,
+        min_mesas,
+        np.repeat(matriz["denom_mesa"][filas], n_partidos),
+    )
+
+    puntajes["fila"] = np.repeat(filas, n_partidos)
+    puntajes["partido"] = np.tile(np.arange(n_partidos), len(filas))
+    puntajes["pct_mesa"] = pct.ravel()
+    puntajes["circuito"] = (
+        circuitos[puntajes["fila"]] if circuitos is not None else None
+    )
+    return puntajes
+
+
+def top_k_anomalas(
+    arbol: dict, puntajes: dict, k: int = 50, partido: str | None = None
+) -> pd.DataFrame:
+    """
+    Selecciona las k combinaciones (mesa, partido) con mayor |z| robusto con
+    argpartition (sin ordenar todas) y ordena solo esas k. Las mesas sin
+    puntaje (grupo con pocas mesas) no se consideran.
+    'partido' restringe la búsqueda a un partido (comparado tras normalizar).
+
+    Devuelve columnas:
+      Distrito | Establecimiento | [Circuito] | Mesa | Agrupacion | pct_mesa |
+      mediana_referencia | mad_referencia | n_mesas_referencia | z_robusto
+    """
+    candidatos = np.flatnonzero(np.isfinite(puntajes["z"]))
+    if partido is not None:
+        columnas = columnas_partido(arbol, partido)
+        candidatos = candidatos[np.isin(puntajes["partido"][candidatos], columnas)]
+
+    absoluto = np.abs(puntajes["z"][candidatos])
+    k = min(int(k), len(candidatos))
+    if k <= 0:
+        seleccion = candidatos[:0]
+    else:
+        mejores = np.argpartition(-absoluto, k - 1)[:k]
+        seleccion = candidatos[mejores[np.argsort(-absoluto[mejores], kind="stable")]]
+
+    filas = puntajes["fila"][seleccion]
+    claves = arbol["claves"]["Mesa"][["Distrito", "Establecimiento", "Mesa"]]
+    resultado = claves.iloc[filas].reset_index(drop=True)
+    if puntajes["circuito"] is not None:
+        resultado.insert(2, "Circuito", puntajes["circuito"][seleccion])
+    resultado["Agrupacion"] = np.asarray(arbol["partidos"], dtype=object)[
+        puntajes["partido"][seleccion]
+    ]
+    resultado["pct_mesa"] = puntajes["pct_mesa"][seleccion].round(1)
+    resultado["mediana_referencia"] = puntajes["mediana"][seleccion].round(1)
+    resultado["mad_referencia"] = puntajes["mad"][seleccion].round(2)
+    resultado["n_mesas_referencia"] = puntajes["n_mesas"][seleccion]
+    resultado["z_robusto"] = puntajes["z"][seleccion].round(2)
+    return resultado
+
+
+def matriz_metricas(arbol: dict, electores_mesa: np.ndarray | None = None) -> dict:
+    """
+    Numeradores y denominadores de todas las métricas de METRICAS_MESA para
+    todas las mesas, a partir de la matriz (mesas × tipo de voto) del árbol:
+    los numeradores salen de un único producto con una matriz de selección
+    (tipo de voto × métrica).
+
+    'electores_mesa' (electores del padrón por mesa, NaN si no se encontró)
+    hace falta solo para la participación.
+
+    Devuelve {"metricas": nombres, "numeradores": (mesas × métricas),
+    "denominadores": (mesas × métricas)}.
+    """
+    votos_tipo = arbol["votos_tipo"]["Mesa"].astype(np.float64)
+    tipos = list(arbol["tipos"])
+    metricas = list(METRICAS_MESA)
+
+    seleccion = np.zeros((len(tipos), len(metricas)))
+    for j, (numerador, _) in enumerate(METRICAS_MESA.values()):
+        if numerador == "emitidos":
+            seleccion[:, j] = 1
+        else:
+            seleccion[:, j] = np.isin(np.asarray(tipos, dtype=object), list(numerador))
+
+    emitidos = votos_tipo.sum(axis=1)
+    if electores_mesa is None:
+        electores_mesa = np.full(len(emitidos), np.nan)
+    denominadores = np.column_stack(
+        [
+            emitidos if denominador == "emitidos" else electores_mesa
+            for _, denominador in METRICAS_MESA.values()
+        ]
+    )
+    return {
+        "metricas": metricas,
+        "numeradores": votos_tipo @ seleccion,
+        "denominadores": denominadores.astype(np.float64),
+    }
+
+
+def tabla_metrica(arbol: dict, matriz: dict, metrica: str) -> pd.DataFrame:
+    """
+    Porcentaje de 'metrica' en cada mesa frente al de su escuela (desvío en
+    puntos porcentuales) y z robusto frente a las demás mesas de la escuela
+    (vacío si la escuela tiene menos de MIN_MESAS_ROBUSTO mesas). Las mesas sin denominador (p. ej. sin electores en el padrón) se omiten,
+    tanto de la tabla como del total de su escuela.
+
+    Devuelve columnas (sin redondear):
+      Distrito | Establecimiento | Mesa | numerador | denominador | pct_mesa |
+      pct_escuela | desvio_pp | z_robusto
+    """
+    if metrica not in matriz["metricas"]:
+        raise ValueError(f"Métrica desconocida: {metrica}")
+
+    j = matriz["metricas"].index(metrica)
+    numerador = matriz["numeradores"][:, j]
+    denominador = matriz["denominadores"][:, j]
+    validas = np.flatnonzero(np.nan_to_num(denominador) > 0)
+
+    escuela = arbol["padre"]["Mesa"][validas]
+    n_escuelas = len(arbol["claves"]["Establecimiento"])
+    num_escuela = np.bincount(escuela, weights=numerador[validas], minlength=n_escuelas)
+    den_escuela = np.bincount(escuela, weights=denominador[validas], minlength=n_escuelas)
+
+    pct_mesa = numerador[validas] / denominador[validas] * 100
+    pct_escuela = num_escuela[escuela] / den_escuela[escuela] * 100
+
+    tabla = (
+        arbol["claves"]["Mesa"][["Distrito", "Establecimiento", "Mesa"]]
+        .iloc[validas]
+        .reset_index(drop=True)
+    )
+    tabla["numerador"] = numerador[validas].astype(np.int64)
+    tabla["denominador"] = denominador[validas].astype(np.int64)
+    tabla["pct_mesa"] = pct_mesa
+    tabla["pct_escuela"] = pct_escuela
+    tabla["desvio_pp"] = pct_mesa - pct_escuela
+    tabla["z_robusto"] = z_robusto(
+        pct_mesa, escuela.astype(np.int64), denominadores=denominador[validas]
+    )["z"].round(2)
+    return tabla.sort_values(
+        ["Distrito", "Establecimiento", "Mesa"], kind="stable"
+    ).reset_index(drop=True)
+
+
+@lru_cache(maxsize=16)
+def _desvios_cacheados(partido_norm, incluir_blancos, cargo, cargo2, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    if arbol is None:
+        return None
+    return tabla_desvios_partido(arbol, partido_norm, incluir_blancos)
+
+
+def obtener_desvios_partido(
+    partido: str,
+    incluir_blancos: bool = False,
+    cargo="DIPUTADOS PROVINCIALES",
+    cargo2="SENADORES PROVINCIALES",
+):
+    """
+    Tabla de desvíos por mesa de 'partido', calculada una vez por versión de
+    la base, partido (normalizado) y denominador. Cambiar los umbrales no
+    recalcula: solo filtra esta tabla.
+    """
+    return _desvios_cacheados(
+        _norm_txt_safe(partido),
+        bool(incluir_blancos),
+        cargo,
+        cargo2,
+        version_archivo(BASE),
+    )
+
+
+@lru_cache(maxsize=16)
+def _multinivel_cacheado(partido_norm, incluir_blancos, min_mesas, cargo, cargo2, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    if arbol is None:
+        return None
+    # Circuito de cada mesa cruzado con el padrón por el índice de mesas
+    circuitos = obtener_circuitos_por_mesa(cargo, cargo2)
+    return tabla_desvios_multinivel(
+        arbol, partido_norm, incluir_blancos, circuitos, min_mesas
+    )
+
+
+def obtener_desvios_multinivel(
+    partido: str,
+    incluir_blancos: bool = False,
+    min_mesas: int = 3,
+    cargo="DIPUTADOS PROVINCIALES",
+    cargo2="SENADORES PROVINCIALES",
+):
+    """
+    Tabla de desvíos de 'partido' contra escuela, circuito, distrito y sección,
+    calculada una vez por versión, partido, denominador y mínimo de mesas.
+    """
+    return _multinivel_cacheado(
+        _norm_txt_safe(partido),
+        bool(incluir_blancos),
+        int(min_mesas),
+        cargo,
+        cargo2,
+        version_archivo(BASE),
+    )
+
+
+@lru_cache(maxsize=4)
+def _matriz_cacheada(incluir_blancos, cargo, cargo2, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    if arbol is None:
+        return None
+    return matriz_desvios(arbol, incluir_blancos)
+
+
+def obtener_escaneo_partidos(
+    umbral_min: float = -5.0,
+    umbral_max: float = 5.0,
+    incluir_blancos: bool = False,
+    cargo="DIPUTADOS PROVINCIALES",
+    cargo2="SENADORES PROVINCIALES",
+):
+    """
+    Pares (mesa, partido) dentro del rango de desvío para todos los partidos.
+    La matriz de desvíos se calcula una vez por versión y denominador.
+    """
+    matriz = _matriz_cacheada(
+        bool(incluir_blancos), cargo, cargo2, version_archivo(BASE)
+    )
+    if matriz is None:
+        return None
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    return escanear_todos_los_partidos(
+        arbol, umbral_min, umbral_max, incluir_blancos, matriz=matriz
+    )
+
+
+@lru_cache(maxsize=4)
+def _puntajes_cacheados(referencia, incluir_blancos, min_mesas, cargo, cargo2, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    if arbol is None:
+        return None
+    circuitos = None
+    if referencia == "Circuito":
+        circuitos = obtener_circuitos_por_mesa(cargo, cargo2)
+        if circuitos is None:
+            return None
+    return puntajes_robustos(arbol, referencia, incluir_blancos, circuitos, min_mesas)
+
+
+def obtener_top_anomalas(
+    k: int = 50,
+    referencia: str = "Establecimiento",
+    partido: str | None = None,
+    incluir_blancos: bool = False,
+    min_mesas: int = MIN_MESAS_ROBUSTO,
+    cargo="DIPUTADOS PROVINCIALES",
+    cargo2="SENADORES PROVINCIALES",
+):
+    """
+    Las k mesas más anómalas por z robusto (respecto de la escuela o del
+    circuito, si tiene al menos 'min_mesas' mesas). Los puntajes se calculan
+    una vez por versión, referencia, denominador y mínimo de mesas; cambiar
+    k o el partido solo repite la selección.
+    """
+    puntajes = _puntajes_cacheados(
+        referencia, bool(incluir_blancos), int(min_mesas), cargo, cargo2, version_archivo(BASE)
+    )
+    if puntajes is None:
+        return None
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    return top_k_anomalas(arbol, puntajes, k, partido)
+
+
+@lru_cache(maxsize=4)
+def _metricas_cacheadas(cargo, cargo2, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    if arbol is None:
+        return None
+    return matriz_metricas(arbol, obtener_electores_por_mesa(cargo, cargo2))
+
+
+@lru_cache(maxsize=16)
+def _tabla_metrica_cacheada(metrica, cargo, cargo2, version):
+    matriz = _metricas_cacheadas(cargo, cargo2, version)
+    if matriz is None:
+        return None
+    return tabla_metrica(obtener_arbol_agregados(cargo, cargo2), matriz, metrica)
+
+
+def obtener_tabla_metrica(
+    metrica: str = "Participación",
+    cargo="DIPUTADOS PROVINCIALES",
+    cargo2="SENADORES PROVINCIALES",
+):
+    """
+    Tabla de desvíos por mesa de una métrica (participación, blancos, nulos,
+    recurridos, impugnados, comando). La matriz de todas las métricas se arma
+    una vez por versión; cada métrica se cachea y se filtra con filtrar_desvios.
+    """
+    return _tabla_metrica_cacheada(metrica, cargo, cargo2, version_archivo(BASE))
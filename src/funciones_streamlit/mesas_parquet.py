@@ -0,0 +1,137 @@
+# Base de mesas como dataset Parquet particionado por sección (una carpeta
+# seccion=... por sección), ordenado por nombre_circuito, cod_circ y
+# nro_mesa y con columnas tipadas. leer_mesas puede leer con filtros que
+# pyarrow aplica sobre las particiones y los row groups, sin cargar el resto;
+# la página de Electores lo carga entero una vez por versión y filtra en
+# memoria con indice_filtros.py.
+#
+# Uso (convierte el CSV normalizado existente):
+#     python src/funciones_streamlit/mesas_parquet.py
+
+from __future__ import annotations
+from pathlib import Path
+import os
+import shutil
+import sys
+import pandas as pd
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from utils.constantes import DATA_PATH
+
+CSV_MESAS = DATA_PATH / "base_mesas_electores_normalizado.csv"
+DATASET_MESAS = DATA_PATH / "base_mesas_electores"
+
+COLUMNAS_MESAS = [
+    "cod_circ",
+    "distrito",
+    "nombre_circuito",
+    "seccion",
+    "establecimiento",
+    "nro_mesa",
+    "cantidad_electores",
+    "tipo",
+]
+ORDEN_MESAS = ["nombre_circuito", "cod_circ", "nro_mesa"]
+
+# Filas por row group: con el orden de arriba cada grupo cubre pocos
+# distritos y las estadísticas min/max permiten saltear el resto
+FILAS_POR_GRUPO = 4096
+
+
+def tipar_mesas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Columnas con su tipo: texto para claves y nombres, enteros para números.
+    Los enteros admiten nulos (Int16/Int32): una mesa sin distrito o sin
+    número queda vacía en vez de cortar la conversión.
+    """
+    return pd.DataFrame(
+        {
+            "cod_circ": df["cod_circ"].astype(str),
+            "distrito": pd.to_numeric(df["distrito"]).astype("Int16"),
+            "nombre_circuito": df["nombre_circuito"].astype(str),
+            "seccion": df["seccion"].astype(str),
+            "establecimiento": df["establecimiento"].astype(str),
+            "nro_mesa": pd.to_numeric(df["nro_mesa"]).astype("Int32"),
+            "cantidad_electores": pd.to_numeric(df["cantidad_electores"]).astype("Int32"),
+            "tipo": df["tipo"].astype(str),
+        }
+    )
+
+
+def escribir_dataset_mesas(df: pd.DataFrame, carpeta=DATASET_MESAS) -> Path:
+    """
+    Escribe el dataset particionado por sección. Se arma en una carpeta
+    temporal y recién al final reemplaza a la anterior, para que la página
+    nunca lea un dataset a medio escribir.
+    """
+    carpeta = Path(carpeta)
+    temporal = carpeta.with_name(f".{carpeta.name}.tmp")
+    viejo = carpeta.with_name(f".{carpeta.name}.old")
+    for resto in (temporal, viejo):
+        if resto.exists():
+            shutil.rmtree(resto)
+
+    tabla = tipar_mesas(df).sort_values(ORDEN_MESAS, kind="stable")
+    tabla.to_parquet(
+        temporal,
+        engine="pyarrow",
+        partition_cols=["seccion"],
+        index=False,
+        row_group_size=FILAS_POR_GRUPO,
+    )
+
+    if carpeta.exists():
+        os.replace(carpeta, viejo)
+    os.replace(temporal, carpeta)
+    if viejo.exists():
+        shutil.rmtree(viejo)
+    return carpeta
+
+
+def filtros_mesas(seccion=None, nombre_circuito=None, cod_circ=None, tipo=None):
+    """Filtros de pyarrow para los valores elegidos (None = sin filtro)."""
+    filtros = [
+        (columna, "==", valor)
+        for columna, valor in (
+            ("seccion", seccion),
+            ("nombre_circuito", nombre_circuito),
+            ("cod_circ", cod_circ),
+            ("tipo", tipo),
+        )
+        if valor is not None
+    ]
+    return filtros or None
+
+
+def leer_mesas(
+    carpeta=DATASET_MESAS,
+    seccion=None,
+    nombre_circuito=None,
+    cod_circ=None,
+    tipo=None,
+    columnas=None,
+) -> pd.DataFrame:
+    """
+    Lee solo las mesas que cumplen los filtros (sin filtros, el dataset
+    completo): la sección elige la partición y el resto se aplica sobre los
+    row groups al leer. Las columnas salen en el orden de COLUMNAS_MESAS.
+    """
+    df = pd.read_parquet(
+        carpeta,
+        engine="pyarrow",
+        columns=columnas,
+        filters=filtros_mesas(seccion, nombre_circuito, cod_circ, tipo),
+    )
+    if "seccion" in df.columns:
+        # La columna de partición vuelve como categoría
+        df["seccion"] = df["seccion"].astype(str)
+    columnas_presentes = [c for c in COLUMNAS_MESAS if c in df.columns]
+    return df[columnas_presentes].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    df = pd.read_csv(CSV_MESAS, dtype={"cod_circ": str})
+    carpeta = escribir_dataset_mesas(df)
+    print(f"✅ Dataset escrito: {carpeta} ({len(df):,} mesas)")
@@ -0,0 +1,191 @@
+from __future__ import annotations
+from pathlib import Path
+from functools import lru_cache
+import sys
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from utils.constantes import ALIAS_DISTRITOS, BASE, DISTRITOS, ELECTORES_PATH, DATA_PATH
+from src.funciones_streamlit.funciones import (
+    _norm_txt_safe,
+    obtener_arbol_agregados,
+    version_archivo,
+)
+from src.funciones_streamlit.arbol_agregados import TIPOS_BLANCOS, TIPOS_POSITIVOS
+from src.funciones_streamlit.claves_mesa import empaquetar_clave, proyectar_clave
+
+BASE_MESAS_NORMALIZADO = DATA_PATH / "base_mesas_electores_normalizado.csv"
+
+# Códigos de distrito por nombre normalizado ('Jose C. Paz' → 'jose c paz')
+CODIGO_POR_DISTRITO = {_norm_txt_safe(nombre): codigo for codigo, nombre in DISTRITOS.items()}
+
+# Otras grafías normalizadas → nombre normalizado de DISTRITOS ('pilar' → 'del pilar')
+NOMBRE_POR_ALIAS = {
+    _norm_txt_safe(alias): _norm_txt_safe(nombre) for alias, nombre in ALIAS_DISTRITOS.items()
+}
+
+
+def _normalizar_nombres(serie: pd.Series) -> pd.Series:
+    """Normaliza nombres (municipios, secciones) una vez por valor distinto."""
+    valores = serie.astype(str)
+    distintos = valores.unique()
+    mapeo = {valor: _norm_txt_safe(valor) for valor in distintos}
+    return valores.map(mapeo)
+
+
+def _normalizar_distritos(serie: pd.Series) -> pd.Series:
+    """Como _normalizar_nombres, con las otras grafías llevadas al nombre de DISTRITOS."""
+    return _normalizar_nombres(serie).replace(NOMBRE_POR_ALIAS)
+
+
+def _normalizar_seccion(serie: pd.Series) -> pd.Series:
+    """'Sección Séptima', 'SEPTIMA' y 'Septima' quedan como 'septima'."""
+    return _normalizar_nombres(serie).str.replace(r"^seccion\s*", "", regex=True)
+
+
+def indexar_electores(df_electores: pd.DataFrame) -> pd.DataFrame:
+    """
+    Indexa ELECTORES.csv por municipio normalizado (con las otras grafías
+    llevadas al nombre de DISTRITOS, igual que los resultados). La columna
+    'Electores' (con punto como separador de miles) se limpia una sola vez.
+
+    Devuelve un DataFrame indexado por 'municipio_norm' con las columnas
+    Municipio | seccion_norm | electores
+    """
+    df = df_electores[df_electores["Municipio"].notna()]
+
+    electores = pd.to_numeric(
+        df["Electores"]
+        .astype(str)
+        .str.replace(".", "", regex=False)
+        .str.replace(",", "", regex=False),
+        errors="coerce",
+    )
+    indice = pd.DataFrame(
+        {
+            "Municipio": df["Municipio"].to_numpy(),
+            "municipio_norm": _normalizar_distritos(df["Municipio"]).to_numpy(),
+            "seccion_norm": _normalizar_seccion(df["Seccion"]).to_numpy(),
+            "electores": electores.fillna(0).astype("int64").to_numpy(),
+        }
+    )
+    return indice.groupby("municipio_norm").agg(
+        Municipio=("Municipio", "first"),
+        seccion_norm=("seccion_norm", "first"),
+        electores=("electores", "sum"),
+    )
+
+
+def claves_padron(df_mesas: pd.DataFrame) -> np.ndarray:
+    """
+    Clave empaquetada de cada fila de la base de mesas, reducida a distrito y
+    número de mesa (los resultados no traen circuito ni tipo de mesa).
+    """
+    return proyectar_clave(
+        empaquetar_clave(df_mesas["distrito"], df_mesas["cod_circ"], df_mesas["nro_mesa"], df_mesas["tipo"])
+    )
+
+
+@lru_cache(maxsize=4)
+def _indice_electores_cacheado(ruta, version):
+    try:
+        # 'Electores' como texto: el punto es separador de miles, no decimal
+        df = pd.read_csv(ruta, sep=";", dtype={"Electores": str})
+    except FileNotFoundError:
+        print(f"Error: el archivo '{ruta}' no fue encontrado")
+        return None
+    return indexar_electores(df)
+
+
+def obtener_indice_electores(ruta=ELECTORES_PATH):
+    """Índice de electores por municipio, construido una vez por versión del archivo."""
+    return _indice_electores_cacheado(str(ruta), version_archivo(ruta))
+
+
+def claves_resultados(arbol: dict) -> np.ndarray:
+    """
+    Clave empaquetada (distrito y número de mesa) de cada mesa del árbol. El
+    distrito viene por nombre (o por otra grafía, ver ALIAS_DISTRITOS) y se
+    pasa a su código de DISTRITOS.
+    """
+    mesas = arbol["claves"]["Mesa"]
+    distrito = _normalizar_distritos(mesas["Distrito"]).map(CODIGO_POR_DISTRITO)
+    return proyectar_clave(empaquetar_clave(distrito, None, mesas["Mesa"], None))
+
+
+def _votos_por_nodo(arbol: dict, nivel: str) -> pd.DataFrame:
+    """Votos emitidos (todos los tipos) y válidos (positivos + blancos) por nodo."""
+    tipos = np.asarray(arbol["tipos"], dtype=object)
+    es_valido = np.isin(tipos, list(TIPOS_POSITIVOS | TIPOS_BLANCOS))
+    votos_tipo = arbol["votos_tipo"][nivel]
+
+    votos = arbol["claves"][nivel].copy()
+    votos["votos_emitidos"] = votos_tipo.sum(axis=1)
+    votos["votos_validos"] = votos_tipo[:, es_valido].sum(axis=1)
+    return votos
+
+
+def _agregar_participacion(df: pd.DataFrame) -> pd.DataFrame:
+    df["participacion"] = (df["votos_emitidos"] / df["electores"] * 100).round(2)
+    return df
+
+
+def participacion_por_nivel(arbol: dict, indice_electores: pd.DataFrame) -> dict:
+    """
+    Calcula la participación por distrito, sección y provincia con un único
+    join entre los votos por distrito del árbol y el índice de electores.
+
+    Las secciones y la provincia suman solo los electores de los distritos
+    que tienen resultados, así la participación no queda subestimada cuando
+    el cargo no se vota en todos los municipios (p. ej. concejales).
+
+    Devuelve {"Distrito": df, "Seccion": df, "Provincia": df}. Los distritos
+    sin electores en el padrón quedan con 'electores' vacío.
+    """
+    distritos = _votos_por_nodo(arbol, "Distrito")
+    distritos["municipio_norm"] = _normalizar_distritos(distritos["Distrito"])
+    distritos = distritos.join(
+        indice_electores["electores"], on="municipio_norm", how="left"
+    )
+
+    columnas = ["votos_emitidos", "votos_validos", "electores"]
+    con_padron = distritos[distritos["electores"].notna()]
+    secciones = con_padron.groupby("Seccion", sort=False)[columnas].sum().reset_index()
+    provincia = con_padron[columnas].sum().to_frame().T
+
+    return {
+        "Distrito": _agregar_participacion(distritos.drop(columns="municipio_norm")),
+        "Seccion": _agregar_participacion(secciones),
+        "Provincia": _agregar_participacion(provincia),
+    }
+
+
+@lru_cache(maxsize=4)
+def _participacion_cacheada(cargo, cargo2, ruta_electores, version):
+    arbol = obtener_arbol_agregados(cargo, cargo2)
+    indice_electores = obtener_indice_electores(ruta_electores)
+    if arbol is None or indice_electores is None:
+        return None
+    return participacion_por_nivel(arbol, indice_electores)
+
+
+def obtener_participacion_por_nivel(
+    cargo="DIPUTADOS PROVINCIALES",
+    cargo2="SENADORES PROVINCIALES",
+    ruta_electores=ELECTORES_PATH,
+):
+    """
+    participacion_por_nivel del cargo, calculada una vez por versión de la
+    base de resultados y de ELECTORES.csv. None si falta alguno de los dos.
+    """
+    version = f"{version_archivo(BASE)}|{version_archivo(ruta_electores)}"
+    return _participacion_cacheada(cargo, cargo2, str(ruta_electores), version)
+
+
+def distritos_sin_padron(participacion: dict) -> list:
+    """Distritos con resultados que no se pudieron cruzar con ELECTORES.csv."""
+    distritos = participacion["Distrito"]
+    return sorted(distritos.loc[distritos["electores"].isna(), "Distrito"].unique())
@@ -0,0 +1,304 @@
+import argparse
+import json
+import numpy as np
+import pandas as pd
+
+# Filas que se leen por vez
+TAMANIO_BLOQUE = 500_000
+
+# HyperLogLog: 2**12 registros (error típico ≈ 1.6 %)
+PRECISION_HLL = 12
+
+# Distintos valores numéricos que se guardan para la mediana exacta; por
+# encima de esto (ids, por ejemplo) no se informa mediana
+LIMITE_VALORES_MEDIANA = 100_000
+
+# Columnas con hasta esta cantidad de valores distintos informan la
+# frecuencia exacta de cada uno
+LIMITE_VALORES_FRECUENTES = 20
+
+EJEMPLOS_POR_CLASE = 5
+
+# Clases de formato, en orden de prioridad (la primera que coincide)
+CLASES_PATRON = [
+    ("vacio", r"\s*"),
+    ("entero_con_ceros", r"0\d+"),
+    ("entero", r"-?\d+"),
+    ("entero_con_punto_cero", r"-?\d+\.0+"),
+    ("decimal", r"-?\d*\.\d+"),
+    ("alfanumerico", r"[0-9A-Za-z]+"),
+]
+
+# Rasgos que se cuentan aparte de la clase (un valor puede tener varios)
+RASGOS = {
+    "con_acentos": r"[áéíóúÁÉÍÓÚñÑüÜ]",
+    "con_numeros": r"\d",
+    "con_letras": r"[a-zA-Z]",
+    "con_simbolos": r"[^\w\s]",
+    "con_espacios": r" ",
+}
+
+# Reglas por defecto para la base de mesas (ver verificar_reporte)
+REGLAS_BASE_MESAS = {
+    "cod_circ": {"max_nulos": 0},
+    "distrito": {"max_nulos": 0, "clases": ["entero", "entero_con_punto_cero"]},
+    "establecimiento": {"max_nulos": 0},
+    "nro_mesa": {"max_nulos": 0, "clases": ["entero", "entero_con_punto_cero"]},
+    "cantidad_electores": {"max_nulos": 0, "minimo": 1},
+    "tipo": {"max_nulos": 0, "valores": ["NATIVA", "EXTRANJERA"]},
+}
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Cantidad de bits significativos de cada uint64 (búsqueda binaria)."""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for desplazamiento in (32, 16, 8, 4, 2, 1):
+        mayor = x >= np.uint64(1 << desplazamiento)
+        n[mayor] += desplazamiento
+        x[mayor] >>= np.uint64(desplazamiento)
+    return n + (x > 0)
+
+
+def _actualizar_hll(registros: np.ndarray, valores: pd.Series) -> None:
+    """Agrega valores a un HyperLogLog (alcanza con pasar cada valor una vez)."""
+    if len(valores) == 0:
+        return
+    hashes = pd.util.hash_pandas_object(valores, index=False).to_numpy()
+    resto_bits = 64 - PRECISION_HLL
+    indice = (hashes >> np.uint64(resto_bits)).astype(np.int64)
+    resto = hashes & np.uint64((1 << resto_bits) - 1)
+    rango = resto_bits - _bit_length(resto) + 1
+    np.maximum.at(registros, indice, rango.astype(registros.dtype))
+
+
+def estimar_distintos(registros: np.ndarray) -> int:
+    """Estimación de HyperLogLog con la corrección para conteos chicos."""
+    m = len(registros)
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimado = alfa * m * m / np.sum(2.0 ** -registros.astype(np.float64))
+    ceros = int((registros == 0).sum())
+    if estimado <= 2.5 * m and ceros > 0:
+        estimado = m * np.log(m / ceros)
+    return int(round(estimado))
+
+
+def _clasificar(valores: pd.Series) -> np.ndarray:
+    """Clase de formato de cada valor (se aplica a valores distintos, no a filas)."""
+    condiciones = [valores.str.fullmatch(patron) for _, patron in CLASES_PATRON]
+    return np.select(condiciones, [clase for clase, _ in CLASES_PATRON], "texto")
+
+
+def _nuevo_perfil() -> dict:
+    return {
+        "filas": 0,
+        "nulos": 0,
+        "longitudes": {},
+        "patrones": {},
+        "rasgos": dict.fromkeys(RASGOS, 0),
+        "espacios_extremos": 0,
+        "ejemplos": {},
+        "numerico": {"n": 0, "minimo": None, "maximo": None, "total": 0.0},
+        "_valores": {},
+        "_valores_numericos": pd.Series(dtype=np.float64),
+        "_registros": np.zeros(1 << PRECISION_HLL, dtype=np.int8),
+    }
+
+
+def _sumar(conteos: dict, claves, cantidades) -> None:
+    for clave, cantidad in zip(claves, cantidades):
+        conteos[clave] = conteos.get(clave, 0) + int(cantidad)
+
+
+def _actualizar_perfil(perfil: dict, columna: pd.Series) -> None:
+    """
+    Suma un bloque al perfil de una columna. Todo sale de un único
+    value_counts: las métricas se calculan sobre los valores distintos del
+    bloque, pesadas por su frecuencia.
+    """
+    conteos = columna.value_counts(dropna=False)
+    nulos = conteos.index.isna()
+    perfil["filas"] += len(columna)
+    perfil["nulos"] += int(conteos[nulos].sum())
+
+    conteos = conteos[~nulos]
+    valores = pd.Series(conteos.index.astype(str), dtype=str)
+    frecuencias = conteos.to_numpy()
+    if len(valores) == 0:
+        return
+
+    if perfil["_valores"] is not None:
+        _sumar(perfil["_valores"], valores, frecuencias)
+        if len(perfil["_valores"]) > LIMITE_VALORES_FRECUENTES:
+            perfil["_valores"] = None
+
+    longitudes = valores.str.len().to_numpy()
+    suma_longitud = pd.Series(frecuencias).groupby(longitudes).sum()
+    _sumar(perfil["longitudes"], suma_longitud.index, suma_longitud.to_numpy())
+
+    clases = _clasificar(valores)
+    suma_clase = pd.Series(frecuencias).groupby(clases).sum()
+    _sumar(perfil["patrones"], suma_clase.index, suma_clase.to_numpy())
+    for clase in suma_clase.index:
+        ejemplos = perfil["ejemplos"].setdefault(clase, [])
+        faltan = EJEMPLOS_POR_CLASE - len(ejemplos)
+        if faltan > 0:
+            ejemplos.extend(valores[clases == clase].head(faltan).tolist())
+
+    for rasgo, patron in RASGOS.items():
+        perfil["rasgos"][rasgo] += int(frecuencias[valores.str.contains(patron).to_numpy()].sum())
+    perfil["espacios_extremos"] += int(
+        frecuencias[(valores != valores.str.strip()).to_numpy()].sum()
+    )
+
+    numeros = pd.to_numeric(valores, errors="coerce").to_numpy(dtype=np.float64)
+    es_numero = ~np.isnan(numeros)
+    if es_numero.any():
+        numerico = perfil["numerico"]
+        numeros, pesos = numeros[es_numero], frecuencias[es_numero]
+        numerico["n"] += int(pesos.sum())
+        numerico["total"] += float(np.dot(numeros, pesos))
+        minimo, maximo = float(numeros.min()), float(numeros.max())
+        numerico["minimo"] = minimo if numerico["minimo"] is None else min(numerico["minimo"], minimo)
+        numerico["maximo"] = maximo if numerico["maximo"] is None else max(numerico["maximo"], maximo)
+        acumulados = perfil["_valores_numericos"]
+        if acumulados is not None:
+            bloque = pd.Series(pesos, index=numeros).groupby(level=0).sum()
+            acumulados = acumulados.add(bloque, fill_value=0)
+            perfil["_valores_numericos"] = (
+                acumulados if len(acumulados) <= LIMITE_VALORES_MEDIANA else None
+            )
+
+    _actualizar_hll(perfil["_registros"], valores)
+
+
+def _mediana(valores_numericos: pd.Series):
+    """Mediana exacta a partir de la frecuencia de cada valor."""
+    if valores_numericos is None or valores_numericos.empty:
+        return None
+    serie = valores_numericos.sort_index()
+    acumulado = serie.cumsum().to_numpy()
+    total = acumulado[-1]
+    baja = serie.index[np.searchsorted(acumulado, (total + 1) // 2)]
+    alta = serie.index[np.searchsorted(acumulado, total // 2 + 1)]
+    return float((baja + alta) / 2)
+
+
+def _cerrar_perfil(perfil: dict) -> dict:
+    """Convierte el acumulador en un diccionario serializable a JSON."""
+    numerico = perfil["numerico"]
+    if numerico["n"]:
+        numerico["promedio"] = numerico["total"] / numerico["n"]
+        numerico["mediana"] = _mediana(perfil["_valores_numericos"])
+    else:
+        numerico = None
+    cerrado = {
+        "filas": perfil["filas"],
+        "nulos": perfil["nulos"],
+        "distintos_aprox": estimar_distintos(perfil["_registros"]),
+        "longitudes": {str(k): v for k, v in sorted(perfil["longitudes"].items())},
+        "patrones": dict(sorted(perfil["patrones"].items(), key=lambda x: -x[1])),
+        "rasgos": perfil["rasgos"],
+        "espacios_extremos": perfil["espacios_extremos"],
+        "numerico": numerico,
+        "ejemplos": perfil["ejemplos"],
+    }
+    if perfil["_valores"] is not None:
+        cerrado["valores"] = perfil["_valores"]
+    return cerrado
+
+
+def perfilar_csv(ruta, columnas=None, tamanio_bloque=TAMANIO_BLOQUE, encoding="utf-8"):
+    """
+    Perfil de todas las columnas de un CSV en una sola lectura por bloques:
+    nulos, histograma de longitudes, clases de formato (entero, con ceros
+    iniciales, '.0', alfanumérico...), rasgos (acentos, símbolos, espacios),
+    resumen numérico, cantidad aproximada de distintos (HyperLogLog) y, para
+    columnas con pocos valores, la frecuencia de cada uno.
+
+    Los valores se leen como texto para ver el formato tal como viene.
+    Retorna un diccionario serializable a JSON.
+    """
+    perfiles = {}
+    filas = 0
+    lector = pd.read_csv(
+        ruta, dtype=str, usecols=columnas, encoding=encoding, chunksize=tamanio_bloque
+    )
+    for bloque in lector:
+        filas += len(bloque)
+        for columna in bloque.columns:
+            _actualizar_perfil(perfiles.setdefault(columna, _nuevo_perfil()), bloque[columna])
+
+    return {
+        "archivo": str(ruta),
+        "filas": filas,
+        "columnas": {columna: _cerrar_perfil(perfil) for columna, perfil in perfiles.items()},
+    }
+
+
+def verificar_reporte(reporte: dict, reglas=REGLAS_BASE_MESAS) -> list:
+    """
+    Compara un reporte con reglas por columna y devuelve la lista de
+    problemas encontrados (vacía si todo está bien). Reglas posibles:
+    max_nulos, clases (clases de formato permitidas), minimo, valores.
+    """
+    problemas = []
+    for columna, regla in reglas.items():
+        perfil = reporte["columnas"].get(columna)
+        if perfil is None:
+            problemas.append(f"{columna}: falta la columna")
+            continue
+        if "max_nulos" in regla and perfil["nulos"] > regla["max_nulos"]:
+            problemas.append(f"{columna}: {perfil['nulos']:,} valores nulos")
+        if "clases" in regla:
+            otras = {
+                clase: n
+                for clase, n in perfil["patrones"].items()
+                if clase not in regla["clases"]
+            }
+            if otras:
+                problemas.append(f"{columna}: formatos no esperados {otras}")
+        if "minimo" in regla:
+            numerico = perfil["numerico"]
+            if numerico is None or numerico["n"] < perfil["filas"] - perfil["nulos"]:
+                problemas.append(f"{columna}: hay valores no numéricos")
+            elif numerico["minimo"] < regla["minimo"]:
+                problemas.append(f"{columna}: mínimo {numerico['minimo']} < {regla['minimo']}")
+        if "valores" in regla:
+            valores = perfil.get("valores")
+            if valores is None:
+                problemas.append(f"{columna}: demasiados valores distintos")
+            else:
+                otros = sorted(set(valores) - set(regla["valores"]))
+                if otros:
+                    problemas.append(f"{columna}: valores no esperados {otros}")
+    return problemas
+
+
+def guardar_reporte(reporte: dict, ruta) -> None:
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfil de columnas de un CSV")
+    parser.add_argument("csv")
+    parser.add_argument("--salida", default=None, help="Archivo JSON para el reporte")
+    parser.add_argument(
+        "--verificar",
+        action="store_true",
+        help="Salir con error si no se cumplen las reglas de la base de mesas",
+    )
+    args = parser.parse_args()
+
+    reporte = perfilar_csv(args.csv)
+    if args.salida:
+        guardar_reporte(reporte, args.salida)
+    else:
+        print(json.dumps(reporte, ensure_ascii=False, indent=1))
+
+    if args.verificar:
+        problemas = verificar_reporte(reporte)
+        for problema in problemas:
+            print(f"⚠️ {problema}")
+        raise SystemExit(1 if problemas else 0)
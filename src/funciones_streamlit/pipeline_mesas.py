@@ -0,0 +1,287 @@
+# Pipeline de la base de mesas: arma base_mesas_electores_normalizado.csv en
+# una sola corrida y en memoria, en lugar de encadenar a mano
+# crear_base_mesas.py → verificar_duplicados_normalizado.py →
+# agregar_nombre_circuito.py → agregar_seccion.py (cada uno leyendo y
+# reescribiendo el CSV completo).
+#
+# Con --incremental guarda junto a la salida un manifiesto con el hash de
+# contenido de cada distrito del padrón y, en la corrida siguiente, solo
+# vuelve a procesar los distritos cuyo hash cambió.
+#
+# Además del CSV escribe el dataset Parquet particionado por sección que lee
+# la página de Electores (mesas_parquet.py).
+#
+# Uso:
+#     python src/funciones_streamlit/pipeline_mesas.py [--checkpoints DIR] [--incremental]
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from utils.constantes import DATA_PATH
+from src.funciones_streamlit.claves_mesa import clave_mesa_df
+from src.funciones_streamlit.crear_base_mesas import clave_distrito, crear_base_mesas
+from src.funciones_streamlit.verificar_duplicados_normalizado import (
+    consolidar_duplicados_normalizados,
+)
+from src.funciones_streamlit.agregar_nombre_circuito import agregar_nombre_circuito_df
+from src.funciones_streamlit.agregar_seccion import agregar_columna_seccion_df
+from src.funciones_streamlit.mesas_parquet import DATASET_MESAS, escribir_dataset_mesas
+
+PADRON_NATIVOS = DATA_PATH / "padron_2025.zip"
+PADRON_EXTRANJEROS = DATA_PATH / "padron_extranjeros_2025.zip"
+SALIDA_NORMALIZADA = DATA_PATH / "base_mesas_electores_normalizado.csv"
+
+# Orden de los tipos en la salida (el mismo en que crear_base los concatena)
+ORDEN_TIPOS = ["NATIVA", "EXTRANJERA"]
+
+
+def _reemplazar_atomico(ruta, escribir) -> None:
+    """
+    Escribe en un archivo temporal del mismo directorio y lo reemplaza de una
+    vez (os.replace): nunca queda un archivo a medio escribir.
+    """
+    ruta = Path(ruta)
+    temporal = ruta.with_name(f".{ruta.name}.tmp")
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    finally:
+        if temporal.exists():
+            temporal.unlink()
+
+
+def escribir_csv_atomico(df: pd.DataFrame, ruta) -> None:
+    """Escribe el CSV de forma atómica."""
+    _reemplazar_atomico(ruta, lambda temporal: df.to_csv(temporal, index=False, encoding="utf-8"))
+
+
+def ordenar_salida(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Orden canónico de la base: tipo (ORDEN_TIPOS), clave empaquetada de la
+    mesa y, para las filas sin clave válida, cod_circ y nro_mesa como texto.
+    No depende de cómo se armó el DataFrame, así que una corrida incremental
+    escribe las filas en el mismo orden que una completa.
+    """
+    tipos = pd.Categorical(df["tipo"], categories=ORDEN_TIPOS).codes
+    orden = np.lexsort(
+        (
+            df["nro_mesa"].astype(str).to_numpy(),
+            df["cod_circ"].astype(str).to_numpy(),
+            clave_mesa_df(df),
+            tipos,
+        )
+    )
+    return df.iloc[orden].reset_index(drop=True)
+
+
+def ruta_manifiesto(salida) -> Path:
+    """Manifiesto de hashes por distrito que acompaña a la salida."""
+    return Path(salida).with_suffix(".manifiesto.json")
+
+
+def leer_manifiesto(ruta):
+    """Hashes por tipo y distrito de la corrida anterior, o None si no hay."""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)["hashes"]
+
+
+def escribir_manifiesto(ruta, hashes: dict) -> None:
+    """Guarda {tipo: {distrito: hash}} de forma atómica."""
+
+    def escribir(temporal):
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"hashes": hashes}, f, indent=1, sort_keys=True)
+
+    _reemplazar_atomico(ruta, escribir)
+
+
+def distritos_cambiados(anteriores: dict, actuales: dict) -> set:
+    """
+    Distritos cuyo contenido cambió en algún padrón (nativos o extranjeros),
+    incluidos los que aparecen o desaparecen.
+    """
+    cambiados = set()
+    for tipo in set(anteriores) | set(actuales):
+        previo, nuevo = anteriores.get(tipo, {}), actuales.get(tipo, {})
+        cambiados |= {
+            distrito
+            for distrito in set(previo) | set(nuevo)
+            if previo.get(distrito) != nuevo.get(distrito)
+        }
+    return cambiados
+
+
+def _salida_anterior(salida):
+    """
+    (DataFrame, hashes) de la corrida anterior si existen la salida y su
+    manifiesto; None en otro caso (se reconstruye todo).
+    """
+    if salida is None or not Path(salida).exists():
+        return None
+    hashes = leer_manifiesto(ruta_manifiesto(salida))
+    if hashes is None:
+        return None
+    df = pd.read_csv(
+        salida,
+        dtype={
+            "cod_circ": str,
+            "distrito": str,
+            "establecimiento": str,
+            "nro_mesa": str,
+        },
+    )
+    return df, hashes
+
+
+def guardar_checkpoint(df: pd.DataFrame, carpeta, etapa: str) -> Path:
+    """Guarda el resultado de una etapa en Parquet (requiere pyarrow)."""
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / f"{etapa}.parquet"
+    # cod_circ mezcla números y letras: se guarda como texto
+    df.astype({"cod_circ": str}).to_parquet(ruta, index=False)
+    return ruta
+
+
+def etapas_pipeline(
+    padron_nativos=PADRON_NATIVOS, padron_extranjeros=PADRON_EXTRANJEROS, hashes=None
+):
+    """
+    Etapas en orden: (nombre, función DataFrame → DataFrame). Si se pasa
+    'hashes' (dict), crear_base lo completa con los hashes por distrito.
+    """
+    return [
+        (
+            "crear_base",
+            lambda _: crear_base_mesas(
+                str(padron_nativos), str(padron_extranjeros), hashes=hashes
+            ),
+        ),
+        ("consolidar_duplicados", lambda df: consolidar_duplicados_normalizados(df)[0]),
+        ("nombre_circuito", agregar_nombre_circuito_df),
+        ("seccion", agregar_columna_seccion_df),
+    ]
+
+
+def ejecutar_pipeline(
+    padron_nativos=PADRON_NATIVOS,
+    padron_extranjeros=PADRON_EXTRANJEROS,
+    salida=SALIDA_NORMALIZADA,
+    carpeta_checkpoints=None,
+    incremental=False,
+    dataset=DATASET_MESAS,
+):
+    """
+    Corre todas las etapas sobre un único DataFrame en memoria, mide cada
+    una y escribe la salida una sola vez al final (de forma atómica).
+    Con 'carpeta_checkpoints' guarda además el resultado de cada etapa en
+    Parquet para poder inspeccionarlo.
+
+    Con 'incremental' la lectura del padrón calcula también un hash de
+    contenido por distrito. Si hay una salida anterior con su manifiesto,
+    después de crear_base solo siguen los distritos cuyo hash cambió; las
+    mesas del resto se toman de la salida anterior.
+
+    Con 'dataset' (carpeta) escribe también la base en Parquet particionada
+    por sección.
+
+    Retorna (DataFrame final, {etapa: segundos}).
+    """
+    tiempos = {}
+    hashes = {} if incremental else None
+    anterior = _salida_anterior(salida) if incremental else None
+    cambiados = None
+
+    df = None
+    for etapa, funcion in etapas_pipeline(padron_nativos, padron_extranjeros, hashes):
+        inicio = time.perf_counter()
+        df = funcion(df)
+
+        if etapa == "crear_base" and anterior is not None:
+            cambiados = distritos_cambiados(anterior[1], hashes)
+            print(f"🔁 Distritos con cambios: {len(cambiados):,}")
+            if not cambiados:
+                tiempos[etapa] = round(time.perf_counter() - inicio, 3)
+                print("✅ Sin cambios en el padrón: se conserva la salida anterior")
+                if dataset is not None and not Path(dataset).exists():
+                    escribir_dataset_mesas(anterior[0], dataset)
+                return anterior[0], tiempos
+            df = df[clave_distrito(df["distrito"]).isin(cambiados)]
+
+        tiempos[etapa] = round(time.perf_counter() - inicio, 3)
+        print(f"⏱️ {etapa}: {tiempos[etapa]} s ({len(df):,} filas)")
+
+        if carpeta_checkpoints is not None:
+            ruta = guardar_checkpoint(df, carpeta_checkpoints, etapa)
+            print(f"  💾 Checkpoint: {ruta}")
+
+    if cambiados is not None:
+        previo = anterior[0]
+        reutilizadas = previo[~clave_distrito(previo["distrito"]).isin(cambiados)]
+        print(f"♻️ Mesas reutilizadas de la salida anterior: {len(reutilizadas):,}")
+        df = pd.concat([reutilizadas, df], ignore_index=True)
+
+    df = ordenar_salida(df)
+
+    if salida is not None:
+        inicio = time.perf_counter()
+        escribir_csv_atomico(df, salida)
+        if incremental:
+            # El manifiesto va después de la salida: si algo falla antes, la
+            # próxima corrida compara contra los hashes viejos y rehace
+            escribir_manifiesto(ruta_manifiesto(salida), hashes)
+        tiempos["escritura"] = round(time.perf_counter() - inicio, 3)
+        print(f"✅ Archivo escrito: {salida}")
+
+    if dataset is not None:
+        inicio = time.perf_counter()
+        escribir_dataset_mesas(df, dataset)
+        tiempos["parquet"] = round(time.perf_counter() - inicio, 3)
+        print(f"✅ Dataset Parquet escrito: {dataset}")
+
+    return df, tiempos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arma la base de mesas normalizada")
+    parser.add_argument("--nativos", default=PADRON_NATIVOS)
+    parser.add_argument("--extranjeros", default=PADRON_EXTRANJEROS)
+    parser.add_argument("--salida", default=SALIDA_NORMALIZADA)
+    parser.add_argument(
+        "--checkpoints", default=None, help="Carpeta para guardar cada etapa en Parquet"
+    )
+    parser.add_argument(
+        "--dataset",
+        default=DATASET_MESAS,
+        help="Carpeta del dataset Parquet por sección ('' para no escribirlo)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reprocesar solo los distritos cuyo contenido cambió",
+    )
+    args = parser.parse_args()
+
+    print("=== PIPELINE BASE DE MESAS ===")
+    _, tiempos = ejecutar_pipeline(
+        args.nativos,
+        args.extranjeros,
+        args.salida,
+        args.checkpoints,
+        args.incremental,
+        args.dataset or None,
+    )
+    print(f"⏱️ Total: {round(sum(tiempos.values()), 3)} s")
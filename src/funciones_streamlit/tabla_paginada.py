@@ -0,0 +1,127 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Opciones de filas por página
+TAMANIOS_PAGINA = [25, 50, 100, 250, 500]
+
+SIN_ORDEN = "(sin ordenar)"
+
+
+def firma_tabla(df: pd.DataFrame) -> tuple:
+    """
+    Identifica un resultado por su tamaño, columnas y contenido (hash de los
+    valores y del índice). Recorre todo el DataFrame: se calcula una vez al
+    producir el resultado, no en cada rerun. Si el resultado ya se identifica
+    por los parámetros que lo generan (filtros, versión de los datos), basta
+    con esos parámetros.
+    """
+    huella = pd.util.hash_pandas_object(df, index=True).to_numpy().sum()
+    return (len(df), tuple(df.columns), int(huella))
+
+
+def posiciones_ordenadas(df: pd.DataFrame, columna=None, descendente=False) -> np.ndarray:
+    """Posiciones de las filas ordenadas por 'columna' (vacíos al final)."""
+    if columna is None:
+        return np.arange(len(df))
+    ordenada = (
+        df[columna]
+        .reset_index(drop=True)
+        .sort_values(ascending=not descendente, kind="stable", na_position="last")
+    )
+    return ordenada.index.to_numpy()
+
+
+def cantidad_paginas(filas: int, tamanio: int) -> int:
+    return max(1, -(-filas // tamanio))
+
+
+def pagina_tabla(df: pd.DataFrame, posiciones: np.ndarray, numero: int, tamanio: int) -> pd.DataFrame:
+    """Filas de la página 'numero' (desde 1) en el orden de 'posiciones'."""
+    inicio = (numero - 1) * tamanio
+    return df.iloc[posiciones[inicio : inicio + tamanio]]
+
+
+def _orden_cacheado(df: pd.DataFrame, clave: str, firma: tuple, columna, descendente) -> np.ndarray:
+    """
+    Orden de las filas guardado en la sesión: se recalcula solo si cambia el
+    resultado o la columna de orden, no al pasar de página.
+    """
+    firma_orden = (firma, columna, descendente)
+    guardado = st.session_state.get(f"{clave}_orden")
+    if guardado is None or guardado[0] != firma_orden:
+        guardado = (firma_orden, posiciones_ordenadas(df, columna, descendente))
+        st.session_state[f"{clave}_orden"] = guardado
+    return guardado[1]
+
+
+def mostrar_tabla_paginada(
+    df: pd.DataFrame,
+    clave: str,
+    firma,
+    column_config=None,
+    hide_index=True,
+    tamanios=TAMANIOS_PAGINA,
+):
+    """
+    Muestra 'df' de a una página. El orden, el tamaño y el número de página se
+    eligen con widgets y se resuelven acá: al navegador solo viaja la página
+    visible. 'clave' distingue los widgets de cada tabla de la página.
+
+    'firma' identifica el resultado (ver firma_tabla) y la guarda quien lo
+    produce: con otra firma se vuelve a la primera página y se recalcula el
+    orden; con la misma, pasar de página no toca el resto del DataFrame.
+
+    Retorna el DataFrame de la página mostrada.
+    """
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    with col1:
+        columna = st.selectbox(
+            "Ordenar por", [SIN_ORDEN, *df.columns], key=f"{clave}_columna"
+        )
+    with col2:
+        descendente = st.radio(
+            "Sentido",
+            ["Ascendente", "Descendente"],
+            horizontal=True,
+            key=f"{clave}_sentido",
+        ) == "Descendente"
+    with col3:
+        tamanio = st.selectbox("Filas por página", tamanios, key=f"{clave}_tamanio")
+
+    total_paginas = cantidad_paginas(len(df), tamanio)
+
+    # Con otro resultado, tamaño u orden se vuelve a la primera página (un
+    # resultado más corto no puede dejar la página fuera de rango)
+    clave_pagina = f"{clave}_pagina"
+    vista = (firma, tamanio, columna, descendente)
+    if st.session_state.get(f"{clave}_vista") != vista:
+        st.session_state[f"{clave}_vista"] = vista
+        st.session_state[clave_pagina] = 1
+    with col4:
+        numero = st.number_input(
+            "Página",
+            min_value=1,
+            max_value=total_paginas,
+            step=1,
+            key=clave_pagina,
+        )
+
+    posiciones = _orden_cacheado(
+        df, clave, firma, None if columna == SIN_ORDEN else columna, descendente
+    )
+    visible = pagina_tabla(df, posiciones, int(numero), tamanio)
+
+    st.dataframe(
+        visible,
+        column_config=column_config,
+        use_container_width=True,
+        hide_index=hide_index,
+    )
+    inicio = (int(numero) - 1) * tamanio
+    st.caption(
+        f"Página {int(numero):,} de {total_paginas:,} · filas "
+        f"{min(inicio + 1, len(df)):,}–{inicio + len(visible):,} de {len(df):,}"
+    )
+    return visible
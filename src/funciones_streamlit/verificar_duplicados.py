@@ -1,5 +1,17 @@
 import pandas as pd
 import os
+import sys
+
+# Agregar la ruta del proyecto para poder importar los módulos del paquete
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from src.funciones_streamlit.claves_mesa import (
+    COLUMNAS_CLAVE_MESA,
+    consolidar_por_clave,
+    describir_clave,
+    grupos_por_clave,
+    mascara_duplicados,
+)
 
 
 def verificar_duplicados():
@@ -15,26 +27,17 @@ def verificar_duplicados():
     print(f"📋 Columnas: {list(df.columns)}")
     print()
 
-    # Crear clave única convirtiendo todo a string
-    print("🔑 Creando clave única...")
-    df["clave_unica"] = (
-        df["cod_circ"].astype(str)
-        + "|"
-        + df["distrito"].astype(str)
-        + "|"
-        + df["establecimiento"].astype(str)
-        + "|"
-        + df["nro_mesa"].astype(str)
-        + "|"
-        + df["tipo"].astype(str)
-    )
-
-    print(f"🎯 Total de claves únicas creadas: {len(df):,}")
-    print(f"🔢 Claves únicas distintas: {df['clave_unica'].nunique():,}")
+    # Agrupar por las columnas de la clave (hash de 64 bits por fila)
+    print("🔑 Agrupando por clave de mesa...")
+    grupos, n_grupos = grupos_por_clave(df, COLUMNAS_CLAVE_MESA)
+    es_duplicado = mascara_duplicados(grupos, n_grupos)
+
+    print(f"🎯 Total de claves creadas: {len(df):,}")
+    print(f"🔢 Claves únicas distintas: {n_grupos:,}")
     print()
 
     # Verificar duplicados
-    duplicados = df[df.duplicated(subset=["clave_unica"], keep=False)]
+    duplicados = df[es_duplicado]
     duplicados_count = len(duplicados)
 
     print(f"🚨 Filas con claves duplicadas: {duplicados_count:,}")
@@ -42,23 +45,18 @@ def verificar_duplicados():
     if duplicados_count > 0:
         print("\n📋 Ejemplos de duplicados encontrados:")
         # Mostrar algunos ejemplos
-        ejemplos_duplicados = duplicados.groupby("clave_unica").head(2)
+        grupos_duplicados = pd.Series(grupos[es_duplicado], index=duplicados.index)
+        ejemplos_duplicados = duplicados.groupby(grupos_duplicados).head(2)
         for _, row in ejemplos_duplicados.head(6).iterrows():
-            print(f"  Clave: {row['clave_unica']}")
+            print(f"  Clave: {describir_clave(row)}")
             print(f"  Electores: {row['cantidad_electores']}")
             print()
 
         # Estadísticas por tipo de duplicado
         print("📊 Estadísticas de duplicados:")
-        stats_duplicados = (
-            duplicados.groupby("clave_unica")
-            .agg({"cantidad_electores": ["count", "sum", "min", "max", list]})
-            .reset_index()
-        )
-
-        print(f"🔍 Total de mesas duplicadas: {len(stats_duplicados):,}")
+        print(f"🔍 Total de mesas duplicadas: {grupos_duplicados.nunique():,}")
         print(
-            f"💰 Suma total de electores en duplicados: {stats_duplicados[('cantidad_electores', 'sum')].sum():,}"
+            f"💰 Suma total de electores en duplicados: {duplicados['cantidad_electores'].sum():,}"
         )
         print()
 
@@ -66,46 +64,20 @@ def verificar_duplicados():
     if duplicados_count > 0:
         print("\n🔄 Procesando duplicados - sumando electores...")
 
-        # Separar mesas únicas y duplicadas
-        df_unicos = df[~df.duplicated(subset=["clave_unica"], keep=False)].copy()
-        df_duplicados = df[df.duplicated(subset=["clave_unica"], keep=False)].copy()
-
-        print(f"📊 Mesas sin duplicados: {len(df_unicos):,}")
-        print(f"📊 Mesas con duplicados: {len(df_duplicados.groupby('clave_unica')):,}")
-
-        # Agrupar duplicados y sumar electores
-        df_duplicados_agrupados = (
-            df_duplicados.groupby("clave_unica")
-            .agg(
-                {
-                    "cod_circ": "first",
-                    "distrito": "first",
-                    "establecimiento": "first",
-                    "nro_mesa": "first",
-                    "tipo": "first",
-                    "cantidad_electores": "sum",  # Sumar los electores
-                }
-            )
-            .reset_index()
-        )
-
-        print(
-            f"💰 Electores totales en mesas únicas: {df_unicos['cantidad_electores'].sum():,}"
-        )
+        print(f"📊 Mesas sin duplicados: {int((~es_duplicado).sum()):,}")
+        print(f"📊 Mesas con duplicados: {grupos_duplicados.nunique():,}")
         print(
-            f"💰 Electores totales en mesas duplicadas (sumados): {df_duplicados_agrupados['cantidad_electores'].sum():,}"
+            f"💰 Electores totales en mesas únicas: {df.loc[~es_duplicado, 'cantidad_electores'].sum():,}"
         )
         print(
-            f"💰 Electores totales en mesas duplicadas (original): {df_duplicados['cantidad_electores'].sum():,}"
+            f"💰 Electores totales en mesas duplicadas (original): {duplicados['cantidad_electores'].sum():,}"
         )
 
-        # Combinar mesas únicas con duplicadas agrupadas
-        df_final = pd.concat([df_unicos, df_duplicados_agrupados], ignore_index=True)
+        # Una fila por clave, sumando los electores de las repetidas
+        df_final = consolidar_por_clave(df, grupos, n_grupos)
 
         print(f"\n✅ DataFrame final creado con {len(df_final):,} filas")
-        print(
-            f"📊 Verificación: claves únicas en final: {df_final['clave_unica'].nunique():,}"
-        )
+        print(f"📊 Verificación: claves únicas en final: {n_grupos:,}")
 
     else:
         df_final = df.copy()
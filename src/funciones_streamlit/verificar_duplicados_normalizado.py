@@ -1,20 +1,48 @@
 import pandas as pd
 import os
+import sys
+
+# Agregar la ruta del proyecto para poder importar los módulos del paquete
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from src.funciones_streamlit.claves_mesa import (
+    COLUMNAS_CLAVE_MESA,
+    SIN_CLAVE,
+    clave_mesa_df,
+    consolidar_por_clave,
+    desempaquetar_clave,
+    describir_clave,
+    grupos_por_clave,
+    grupos_por_clave_empaquetada,
+    mascara_duplicados,
+)
+
+# Columnas que forman la clave normalizada (para mostrar ejemplos)
+COLUMNAS_CLAVE_NORMALIZADA = [
+    "cod_circ_norm",
+    "distrito_norm",
+    "nro_mesa_norm",
+    "tipo",
+]
 
 
 def normalizar_valores(df):
-    """Normaliza los valores para crear claves consistentes"""
+    """
+    Normaliza los valores para crear claves consistentes. La clave de cada
+    mesa es el entero empaquetado de claves_mesa ('clave_mesa'); las columnas
+    *_norm son sus campos en forma canónica ('0933c' → '933C', 4.0 → 4).
+    Las filas sin clave válida conservan sus valores originales como texto.
+    """
 
     df_norm = df.copy()
+    df_norm["clave_mesa"] = clave_mesa_df(df)
 
-    # Normalizar cod_circ: quitar ceros iniciales
-    df_norm["cod_circ_norm"] = df["cod_circ"].astype(str).str.lstrip("0")
-
-    # Normalizar distrito: quitar .0
-    df_norm["distrito_norm"] = df["distrito"].astype(str).str.replace(".0", "")
-
-    # Normalizar nro_mesa: quitar .0
-    df_norm["nro_mesa_norm"] = df["nro_mesa"].astype(str).str.replace(".0", "")
+    campos = desempaquetar_clave(df_norm["clave_mesa"].to_numpy())
+    validas = (df_norm["clave_mesa"] != SIN_CLAVE).to_numpy()
+    for columna in ("cod_circ", "distrito", "nro_mesa"):
+        df_norm[f"{columna}_norm"] = (
+            campos[columna].astype(str).where(validas, df[columna].astype(str).to_numpy()).to_numpy()
+        )
 
     # Normalizar establecimiento: quitar espacios extra y estandarizar mayúsculas
     df_norm["establecimiento_norm"] = (
@@ -24,14 +52,13 @@ def normalizar_valores(df):
     return df_norm
 
 
-def verificar_duplicados_normalizado():
-    """Verifica duplicados usando normalización de datos"""
-
-    ruta_original = os.path.join("utils", "data", "base_mesas_electores.csv")
-
-    print("🔍 Leyendo archivo CSV...")
-    df = pd.read_csv(ruta_original)
+def consolidar_duplicados_normalizados(df):
+    """
+    Normaliza las claves de mesa y consolida los duplicados sumando electores,
+    sin leer ni escribir archivos.
 
+    Retorna (DataFrame consolidado, cantidad de filas con clave duplicada).
+    """
     print(f"📊 Archivo original: {len(df):,} filas")
     print()
 
@@ -39,73 +66,47 @@ def verificar_duplicados_normalizado():
     print("🔄 Normalizando datos...")
     df_norm = normalizar_valores(df)
 
-    # Crear clave normalizada
-    print("🔑 Creando clave normalizada...")
-    df_norm["clave_normalizada"] = (
-        df_norm["cod_circ_norm"]
-        + "|"
-        + df_norm["distrito_norm"]
-        + "|"
-        + df_norm["establecimiento_norm"]
-        + "|"
-        + df_norm["nro_mesa_norm"]
-        + "|"
-        + df_norm["tipo"].astype(str)
-    )
+    # Agrupar por la clave empaquetada (las filas sin clave no se juntan)
+    print("🔑 Agrupando por clave normalizada...")
+    grupos, n_grupos = grupos_por_clave_empaquetada(df_norm["clave_mesa"].to_numpy())
+    es_duplicado = mascara_duplicados(grupos, n_grupos)
 
     print(f"🎯 Total de claves normalizadas creadas: {len(df_norm):,}")
-    print(f"🔢 Claves únicas normalizadas: {df_norm['clave_normalizada'].nunique():,}")
+    print(f"🔢 Claves únicas normalizadas: {n_grupos:,}")
     print()
 
     # Comparar con clave original
-    df["clave_original"] = (
-        df["cod_circ"].astype(str)
-        + "|"
-        + df["distrito"].astype(str)
-        + "|"
-        + df["establecimiento"].astype(str)
-        + "|"
-        + df["nro_mesa"].astype(str)
-        + "|"
-        + df["tipo"].astype(str)
-    )
+    _, n_grupos_original = grupos_por_clave(df, COLUMNAS_CLAVE_MESA)
 
-    print(f"📊 Claves únicas originales: {df['clave_original'].nunique():,}")
-    diferencia = df_norm["clave_normalizada"].nunique() - df["clave_original"].nunique()
+    print(f"📊 Claves únicas originales: {n_grupos_original:,}")
+    diferencia = n_grupos - n_grupos_original
     print(
         f"📈 Diferencia por normalización: {diferencia:,} mesas adicionales detectadas"
     )
     print()
 
     # Verificar duplicados con clave normalizada
-    duplicados_norm = df_norm[
-        df_norm.duplicated(subset=["clave_normalizada"], keep=False)
-    ]
+    duplicados_norm = df_norm[es_duplicado]
     duplicados_count_norm = len(duplicados_norm)
 
     print(f"🚨 Filas con claves duplicadas (normalizadas): {duplicados_count_norm:,}")
 
     if duplicados_count_norm > 0:
-        print("\n📋 Estadísticas de duplicados normalizados:")
-        stats_duplicados_norm = (
-            duplicados_norm.groupby("clave_normalizada")
-            .agg({"cantidad_electores": ["count", "sum", "min", "max"]})
-            .reset_index()
-        )
+        grupos_duplicados = pd.Series(grupos[es_duplicado], index=duplicados_norm.index)
+        mesas_duplicadas = grupos_duplicados.nunique()
 
+        print("\n📋 Estadísticas de duplicados normalizados:")
+        print(f"🔍 Total de mesas duplicadas (normalizadas): {mesas_duplicadas:,}")
         print(
-            f"🔍 Total de mesas duplicadas (normalizadas): {len(stats_duplicados_norm):,}"
-        )
-        print(
-            f"💰 Suma total de electores en duplicados: {stats_duplicados_norm[('cantidad_electores', 'sum')].sum():,}"
+            f"💰 Suma total de electores en duplicados: {duplicados_norm['cantidad_electores'].sum():,}"
         )
         print()
 
         # Mostrar algunos ejemplos
         print("📝 Ejemplos de duplicados encontrados:")
-        ejemplos = duplicados_norm.groupby("clave_normalizada").head(2)
+        ejemplos = duplicados_norm.groupby(grupos_duplicados).head(2)
         for _, row in ejemplos.head(8).iterrows():
-            print(f"  Mesa: {row['clave_normalizada']}")
+            print(f"  Mesa: {describir_clave(row, COLUMNAS_CLAVE_NORMALIZADA)}")
             print(f"  Electores: {row['cantidad_electores']}")
             print(
                 f"  Original cod_circ: {row['cod_circ']} -> Normalizado: {row['cod_circ_norm']}"
@@ -115,46 +116,18 @@ def verificar_duplicados_normalizado():
     # Procesar duplicados sumando electores
     if duplicados_count_norm > 0:
         print("\n🔄 Procesando duplicados normalizados - sumando electores...")
-        # Separar mesas únicas y duplicadas
-        df_unicos_norm = df_norm[
-            ~df_norm.duplicated(subset=["clave_normalizada"], keep=False)
-        ].copy()
-        df_duplicados_norm = df_norm[
-            df_norm.duplicated(subset=["clave_normalizada"], keep=False)
-        ].copy()
-
-        print(f"📊 Mesas sin duplicados: {len(df_unicos_norm):,}")
-        print(
-            f"📊 Mesas con duplicados: {len(df_duplicados_norm.groupby('clave_normalizada')):,}"
-        )
-
-        # Agrupar duplicados y sumar electores
-        df_duplicados_agrupados_norm = (
-            df_duplicados_norm.groupby("clave_normalizada")
-            .agg(
-                {
-                    "cod_circ_norm": "first",
-                    "distrito_norm": "first",
-                    "establecimiento_norm": "first",
-                    "nro_mesa_norm": "first",
-                    "tipo": "first",
-                    "cantidad_electores": "sum",  # Sumar los electores
-                }
-            )
-            .reset_index()
-        )
 
+        print(f"📊 Mesas sin duplicados: {int((~es_duplicado).sum()):,}")
+        print(f"📊 Mesas con duplicados: {mesas_duplicadas:,}")
         print(
-            f"💰 Electores totales en mesas únicas: {df_unicos_norm['cantidad_electores'].sum():,}"
+            f"💰 Electores totales en mesas únicas: {df_norm.loc[~es_duplicado, 'cantidad_electores'].sum():,}"
         )
         print(
-            f"💰 Electores totales en mesas duplicadas (sumados): {df_duplicados_agrupados_norm['cantidad_electores'].sum():,}"
+            f"💰 Electores totales en mesas duplicadas (sumados): {duplicados_norm['cantidad_electores'].sum():,}"
         )
 
-        # Combinar mesas únicas con duplicadas agrupadas
-        df_final_norm = pd.concat(
-            [df_unicos_norm, df_duplicados_agrupados_norm], ignore_index=True
-        )
+        # Una fila por clave normalizada, sumando los electores de las repetidas
+        df_final_norm = consolidar_por_clave(df_norm, grupos, n_grupos)
 
         # Crear DataFrame final con columnas originales normalizadas
         df_final_norm["cod_circ"] = df_final_norm["cod_circ_norm"]
@@ -188,6 +161,20 @@ def verificar_duplicados_normalizado():
     print(f"💰 Total electores finales: {df_final_norm['cantidad_electores'].sum():,}")
     print()
 
+    return df_final_norm, duplicados_count_norm
+
+
+def verificar_duplicados_normalizado():
+    """Verifica duplicados usando normalización de datos"""
+
+    ruta_original = os.path.join("utils", "data", "base_mesas_electores.csv")
+
+    print("🔍 Leyendo archivo CSV...")
+    df = pd.read_csv(ruta_original)
+
+    df_final_norm, duplicados_count_norm = consolidar_duplicados_normalizados(df)
+    mesas_finales_norm = len(df_final_norm)
+
     # Crear nuevo archivo normalizado
     ruta_normalizado = os.path.join(
         "utils", "data", "base_mesas_electores_normalizado.csv"
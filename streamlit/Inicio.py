@@ -8,8 +8,11 @@ import pandas as pd
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
-from src.funciones_streamlit.funciones import guardar_archivo_subido
-from utils.constantes import DATA_PATH
+from src.funciones_streamlit.funciones import (
+    guardar_archivo_subido,
+    ingerir_actualizacion,
+)
+from utils.constantes import DATA_PATH, BASE
 # Configuración general de la página
 st.set_page_config(page_title="Elecciones 2025", layout="wide")
 st.title("RESULTADOS ELECTORALES")
@@ -34,17 +37,34 @@ if archivo:
     # Mostrar nombre original
     st.success(f"Archivo subido: {archivo.name}")
 
-    # Guardar archivo en carpeta local
-    ruta_guardada_dipsen = guardar_archivo_subido(archivo, archivo.name, DATA_PATH)
+    # Procesar cada archivo una sola vez (el uploader lo conserva entre reruns)
+    identificador = (archivo.name, archivo.size)
+    if st.session_state.get("ultimo_archivo") != identificador:
+        # Guardar archivo en carpeta local
+        ruta_guardada_dipsen = guardar_archivo_subido(archivo, archivo.name, DATA_PATH)
+
+        if ruta_guardada_dipsen:
+            st.info(f"Guardado en: {ruta_guardada_dipsen}")
+            st.session_state["ultimo_archivo"] = identificador
 
-    if ruta_guardada_dipsen:
-        st.info(f"Guardado en: {ruta_guardada_dipsen}")
+            if archivo.name == BASE.name:
+                # Recuento provisorio: aplicar solo las mesas nuevas o modificadas
+                resumenes = ingerir_actualizacion(ruta_guardada_dipsen)
+                for (cargo, cargo2), resumen in resumenes.items():
+                    st.info(
+                        f"{cargo} / {cargo2}: {resumen['mesas_nuevas']:,} mesas nuevas, "
+                        f"{resumen['mesas_modificadas']:,} modificadas, "
+                        f"{resumen['mesas_eliminadas']:,} eliminadas "
+                        f"({resumen['segundos']} s)"
+                    )
+            else:
+                st.session_state["datos_actualizados"] = True
 
 st.info(
     """
 **📂 Archivos necesarios:**
 
-- `Base_Elecciones.csv`    
+- `Base_Elecciones.zip` (se puede volver a subir durante el recuento: solo se procesan las mesas nuevas o modificadas)
 - `ELECTORES.csv`  
 
 **⚠️ Importante:** *Respetar el nombre exacto de los archivos*
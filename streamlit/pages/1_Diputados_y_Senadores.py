@@ -1,9 +1,9 @@
 from __future__ import annotations
 from pathlib import Path
 import sys
+import time
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 from importlib import reload
 import streamlit.components.v1 as components
 import json
@@ -12,25 +12,28 @@ from datetime import datetime as dt
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
-from utils.constantes import BASE, ELECTORES_PATH, MUNICIPIOS_AMBA
+from utils.constantes import MUNICIPIOS_AMBA
 
 from src.funciones_streamlit.funciones import (
-    crear_dataframe,
-    contar_votos_por_tipo_eleccion,
-    contar_total_electores,
-    sumar_votos,
-    crear_diccionario_votos_por_partido,
     calcular_porcentaje_partidos,
     mostrar_diccionario_como_tabla,
-    votos_partido_y_validos_por_seccion,
     calcular_porcentaje_partido_por_seccion,
-    secciones_ganadas,
-    municipios_ganados,
-    analizar_rangos_votos,
-    votos_por_seccion,
+    obtener_resumen_general,
+    obtener_votos_partido_por_seccion,
+    obtener_secciones_ganadas,
+    obtener_municipios_ganados,
+    obtener_rangos_votos,
+    obtener_votos_por_seccion,
+    obtener_grafico_seccion,
     obtener_secciones_ordenadas,
-    limpiar_nombres_secciones,
 )
+from src.funciones_streamlit.participacion import (
+    obtener_participacion_por_nivel,
+    distritos_sin_padron,
+)
+
+# Tiempo de este rerun (carga de datos + armado de la página)
+inicio_rerun = time.perf_counter()
 
 
 st.set_page_config(layout="wide")
@@ -44,17 +47,29 @@ pagina = st.sidebar.selectbox(
     ["General", "Análisis por secciones", "Municipios", "Bancas"],
 )
 
-df = crear_dataframe(BASE, ",", "DIPUTADOS PROVINCIALES", "SENADORES PROVINCIALES")
-# df = crear_dataframe(BASE, ",", "CONCEJALES")
-df_electores = crear_dataframe(ELECTORES_PATH, ";")
-if df is None:
+# Datos y agregados cacheados por versión de los archivos: la base se lee una
+# sola vez y los reruns (cambiar de vista, de sección) solo leen del cache
+resumen = obtener_resumen_general("DIPUTADOS PROVINCIALES", "SENADORES PROVINCIALES")
+if resumen is None:
+    st.error("No se pudieron cargar los datos necesarios")
+    st.stop()
+
+total_votos = resumen["total_votos"]
+
+# Participación: votos emitidos sobre electores de los distritos con resultados
+niveles_participacion = obtener_participacion_por_nivel(
+    "DIPUTADOS PROVINCIALES", "SENADORES PROVINCIALES"
+)
+if niveles_participacion is None:
     st.error("No se pudieron cargar los datos necesarios")
     st.stop()
 
-df_resumen = contar_votos_por_tipo_eleccion(df)
-total_votos = sumar_votos(df_resumen, "votos_validos")
+st.sidebar.caption(
+    f"⏱️ Datos cargados en {(time.perf_counter() - inicio_rerun) * 1000:,.0f} ms"
+)
 
-participacion = (total_votos / 14227683) * 100
+total_electores = int(niveles_participacion["Provincia"]["electores"].iloc[0])
+participacion = niveles_participacion["Provincia"]["participacion"].iloc[0]
 if pagina == "General":
     st.subheader("Analisis General")
     col1, col2, col3 = st.columns(3)
@@ -67,14 +82,28 @@ if pagina == "General":
         )
 
     with col2:
-        st.metric(label="Votantes habilitados", value="14.227.683")
+        st.metric(
+            label="Votantes habilitados",
+            value=f"{total_electores:,}".replace(",", "."),
+        )
 
     with col3:
         st.metric(label="Participación", value=f"{round(participacion)}%")
 
+    with st.expander("📊 Participación por sección y por distrito"):
+        st.dataframe(
+            niveles_participacion["Seccion"], use_container_width=True, hide_index=True
+        )
+        st.dataframe(
+            niveles_participacion["Distrito"], use_container_width=True, hide_index=True
+        )
+        sin_padron = distritos_sin_padron(niveles_participacion)
+        if sin_padron:
+            st.warning(f"Distritos sin electores en el padrón: {sin_padron}")
+
     st.divider()
 
-    dicc_general = crear_diccionario_votos_por_partido(df)
+    dicc_general = resumen["votos_por_partido"]
     mostrar_diccionario_como_tabla(dicc_general)
 
     serie = calcular_porcentaje_partidos(dicc_general)
@@ -90,9 +119,7 @@ elif pagina == "Análisis por secciones":
 """,
         unsafe_allow_html=True,
     )
-    datos_FP = votos_partido_y_validos_por_seccion(df, "FUERZA PATRIA")
-    # Limpiar nombres de secciones
-    datos_FP = limpiar_nombres_secciones(datos_FP)
+    datos_FP = obtener_votos_partido_por_seccion("FUERZA PATRIA")
     solo_votos_partido_fp = {
         seccion: datos["votos_partido"] for seccion, datos in datos_FP.items()
     }
@@ -112,9 +139,7 @@ elif pagina == "Análisis por secciones":
 """,
         unsafe_allow_html=True,
     )
-    datos_LLA = votos_partido_y_validos_por_seccion(df, "LA LIBERTAD AVANZA")
-    # Limpiar nombres de secciones
-    datos_LLA = limpiar_nombres_secciones(datos_LLA)
+    datos_LLA = obtener_votos_partido_por_seccion("LA LIBERTAD AVANZA")
     solo_votos_partido_lla = {
         seccion: datos["votos_partido"] for seccion, datos in datos_LLA.items()
     }
@@ -135,7 +160,7 @@ elif pagina == "Análisis por secciones":
         unsafe_allow_html=True,
     )
     partidos = ["Fuerza Patria", "La Libertad Avanza"]
-    conteo, ganadores = secciones_ganadas(str(partidos))
+    conteo, ganadores = obtener_secciones_ganadas(str(partidos))
 
     # Tabla resumen
     st.subheader("Secciones ganadas por partido")
@@ -159,7 +184,7 @@ elif pagina == "Análisis por secciones":
 
     if seccion_seleccionada:
         # Calcular datos para la sección seleccionada
-        datos_seccion = votos_por_seccion(seccion_seleccionada)
+        datos_seccion = obtener_votos_por_seccion(seccion_seleccionada)
 
         if datos_seccion:
             col1, col2 = st.columns([2, 1])
@@ -169,48 +194,12 @@ elif pagina == "Análisis por secciones":
                     f"📊 Porcentajes de votos - Sección {seccion_seleccionada}"
                 )
 
-                # Crear gráfico de barras con porcentajes
-                import pandas as pd
-
-                df_grafico = pd.DataFrame(
-                    {
-                        "Partido": datos_seccion["partidos"][:10],  # Top 10 partidos
-                        "Porcentaje": [
-                            datos_seccion["porcentajes"][partido]
-                            for partido in datos_seccion["partidos"][:10]
-                        ],
-                    }
+                # Gráfico Vega-Lite armado una vez por sección y versión de la base
+                st.vega_lite_chart(
+                    obtener_grafico_seccion(seccion_seleccionada),
+                    use_container_width=True,
                 )
 
-                # Crear gráfico de barras usando matplotlib
-                import matplotlib.pyplot as plt
-
-                fig, ax = plt.subplots(figsize=(10, 6))
-                bars = ax.barh(df_grafico["Partido"], df_grafico["Porcentaje"])
-
-                # Personalizar el gráfico
-                ax.set_xlabel("Porcentaje de votos (%)")
-                titulo = f"Distribución de votos en Sección {seccion_seleccionada}"
-                if datos_seccion.get("votos_blancos", 0) > 0:
-                    titulo += " (incluye votos en blanco)"
-                ax.set_title(titulo)
-                ax.grid(True, alpha=0.3)
-
-                # Agregar etiquetas con los valores
-                for bar, valor in zip(bars, df_grafico["Porcentaje"]):
-                    ax.text(
-                        bar.get_width() + 0.1,
-                        bar.get_y() + bar.get_height() / 2,
-                        f"{valor:.1f}%",
-                        ha="left",
-                        va="center",
-                    )
-
-                # Invertir el eje Y para que el partido con más votos aparezca arriba
-                ax.invert_yaxis()
-
-                st.pyplot(fig)
-
             with col2:
                 titulo_tabla = f"📋 Votos por partido - Sección {seccion_seleccionada}"
                 if datos_seccion.get("votos_blancos", 0) > 0:
@@ -285,7 +274,7 @@ elif pagina == "Municipios":
         "Esp. Abierto Para El Des. Y La Int. Social",
         "Fte De Izq. Y De Trabajadores - Unidad",
     ]
-    conteo_total, conteo_amba, ganadores_total, ganadores_amba = municipios_ganados(
+    conteo_total, conteo_amba, ganadores_total, ganadores_amba = obtener_municipios_ganados(
         str(partidos), str(MUNICIPIOS_AMBA)
     )
 
@@ -335,7 +324,7 @@ elif pagina == "Municipios":
 
     # Calcular rangos de votos para los partidos principales
     partidos_rangos = ["Fuerza Patria", "La Libertad Avanza"]
-    rangos_resultados = analizar_rangos_votos(str(partidos_rangos))
+    rangos_resultados = obtener_rangos_votos(str(partidos_rangos))
 
     if rangos_resultados:
         # Crear tabla comparativa
@@ -374,3 +363,7 @@ elif pagina == "Municipios":
         st.dataframe(
             tabla_amba[["Distrito", "Agrupacion", "votos"]], use_container_width=True
         )
+
+st.sidebar.caption(
+    f"⏱️ Página armada en {(time.perf_counter() - inicio_rerun) * 1000:,.0f} ms"
+)
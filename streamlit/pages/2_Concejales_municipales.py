@@ -12,17 +12,15 @@ from datetime import datetime as dt
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
-from utils.constantes import(
-    BASE_CONCEJALES,
-    ELECTORES_PATH
-)
+from utils.constantes import ELECTORES_PATH
 
-from src.funciones_streamlit.funciones import (
-    crear_dataframe,
-    contar_votos_por_tipo_eleccion,
-    contar_total_electores,
-    sumar_votos_validos,
-    sumar_votos_nulos)
+from src.funciones_streamlit.funciones import obtener_arbol_agregados
+from src.funciones_streamlit.participacion import (
+    obtener_indice_electores,
+    participacion_por_nivel,
+    distritos_sin_padron,
+)
+from src.funciones_streamlit.corte_boleta import obtener_corte_de_boleta
 
 
 st.set_page_config(layout="wide")
@@ -34,18 +32,18 @@ if st.session_state.get("datos_actualizados", False):
 
 st.divider()
 
-df = crear_dataframe(BASE_CONCEJALES)
-df_electores = crear_dataframe(ELECTORES_PATH)
-if df is None:
+arbol = obtener_arbol_agregados("CONCEJALES", None)
+indice_electores = obtener_indice_electores(ELECTORES_PATH)
+if arbol is None or indice_electores is None:
     st.error("No se pudieron cargar los datos necesarios")
-    st.stop
-total_electores = contar_total_electores(df_electores)
-df_resumen = contar_votos_por_tipo_eleccion(df)
-total_validos = sumar_votos_validos(df_resumen)
-total_nulos = sumar_votos_nulos(df_resumen)
-total_votos = total_validos + total_nulos
+    st.stop()
 
-participacion = (total_votos / total_electores) * 100
+# Solo cuentan los electores de los municipios que eligen concejales
+niveles_participacion = participacion_por_nivel(arbol, indice_electores)
+provincia = niveles_participacion["Provincia"].iloc[0]
+total_votos = int(provincia["votos_emitidos"])
+total_electores = int(provincia["electores"])
+participacion = provincia["participacion"]
 
 col1, col2, col3 = st.columns(3)
 
@@ -57,3 +55,38 @@ with col2:
 
 with col3:
     st.metric(label="Participación", value=f"{round(participacion)}%")
+
+st.divider()
+st.subheader("Participación por distrito")
+st.dataframe(
+    niveles_participacion["Distrito"], use_container_width=True, hide_index=True
+)
+sin_padron = distritos_sin_padron(niveles_participacion)
+if sin_padron:
+    st.warning(f"Distritos sin electores en el padrón: {sin_padron}")
+
+st.divider()
+st.subheader("Corte de boleta: legisladores vs. concejales")
+st.caption(
+    "Diferencia por partido entre el voto a diputados/senadores y el voto a "
+    "concejales en las mismas mesas. Valores positivos: el partido sacó más "
+    "en la categoría legislativa."
+)
+nivel_corte = st.selectbox(
+    "Nivel", ["Distrito", "Establecimiento", "Mesa"], key="nivel_corte"
+)
+corte = obtener_corte_de_boleta(nivel=nivel_corte)
+if corte is None or corte.empty:
+    st.info("No hay mesas con votos para ambas categorías")
+else:
+    corte = corte.rename(
+        columns={
+            "votos_a": "Votos legisladores",
+            "votos_b": "Votos concejales",
+            "pct_a": "% legisladores",
+            "pct_b": "% concejales",
+            "diferencia_pp": "Diferencia (pp)",
+        }
+    )
+    orden = corte["Diferencia (pp)"].abs().sort_values(ascending=False).index
+    st.dataframe(corte.loc[orden], use_container_width=True, hide_index=True)
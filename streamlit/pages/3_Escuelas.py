@@ -6,15 +6,30 @@ import streamlit as st
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
-from src.funciones_streamlit.funciones import (
-    detectar_mesas_atipicas_por_partido,
-    crear_dataframe,
+from utils.constantes import BASE
+from src.funciones_streamlit.funciones import obtener_arbol_agregados, version_archivo
+from src.funciones_streamlit.mesas_atipicas import (
+    obtener_desvios_partido,
+    obtener_desvios_multinivel,
+    obtener_escaneo_partidos,
+    obtener_top_anomalas,
+    obtener_tabla_metrica,
+    METRICAS_MESA,
+    filtrar_desvios,
+)
+from src.funciones_streamlit.forense_digitos import obtener_analisis_digitos
+from src.funciones_streamlit.indice_mesas import obtener_mesas_sin_par
+from src.funciones_streamlit.participacion import BASE_MESAS_NORMALIZADO
+from src.funciones_streamlit.tabla_paginada import mostrar_tabla_paginada
+from src.funciones_streamlit.indice_partidos import (
+    obtener_indice_partidos,
+    resolver_partido,
+    sugerir_partidos,
 )
 
-from utils.constantes import BASE
-# Cargar datos
-df = crear_dataframe(BASE, ",", "DIPUTADOS PROVINCIALES", "SENADORES PROVINCIALES")
-if df is None or df.empty:
+# Cargar datos (árbol de agregados, una vez por versión de la base)
+arbol = obtener_arbol_agregados("DIPUTADOS PROVINCIALES", "SENADORES PROVINCIALES")
+if arbol is None or len(arbol["claves"]["Mesa"]) == 0:
     st.error("No se pudo cargar el dataset. Verificá la ruta/archivo en Streamlit Cloud.")
     st.stop()
 
@@ -22,7 +37,22 @@ st.title("Análisis de mesas por escuela")
 
 # ----- FORM para inputs + botón APLICAR -----
 with st.form("filtro_mesas"):
-    partido = st.text_input("Partido a analizar", "FUERZA PATRIA")
+    modo = st.radio(
+        "Modo",
+        [
+            "Un partido",
+            "Todos los partidos",
+            "Puntaje robusto (top-k)",
+            "Métrica de la mesa",
+        ],
+        index=0,
+        horizontal=True,
+    )
+    partido = st.text_input(
+        "Partido a analizar",
+        "FUERZA PATRIA",
+        help="Acepta siglas (FP, LLA), nombres parciales y errores de tipeo.",
+    )
 
     col1, col2 = st.columns(2)
     with col1:
@@ -38,37 +68,221 @@ with st.form("filtro_mesas"):
     )
     incluir_blancos = denominador == "Válidos (positivos + blancos)"
 
+    # Solo para el modo "Métrica de la mesa"
+    metrica = st.selectbox(
+        "Métrica (modo 'Métrica de la mesa')",
+        list(METRICAS_MESA),
+        help="Participación = votos emitidos ÷ electores del padrón de la mesa. "
+        "El resto se mide sobre los votos emitidos.",
+    )
+
+    # Solo para el modo "Un partido"
+    col5, col6 = st.columns(2)
+    with col5:
+        multinivel = st.checkbox(
+            "Comparar también con circuito, distrito y sección", value=False
+        )
+    with col6:
+        min_mesas = st.number_input(
+            "Mínimo de mesas de la referencia",
+            min_value=1,
+            value=3,
+            help="Si la escuela tiene menos mesas, se compara con el circuito; "
+            "si tampoco alcanza, con el distrito y luego con la sección. "
+            "En el puntaje robusto, las escuelas o circuitos con menos mesas "
+            "no se puntúan.",
+        )
+
+    # Solo para el modo "Puntaje robusto (top-k)"
+    col3, col4 = st.columns(2)
+    with col3:
+        referencia = st.radio(
+            "Comparar cada mesa contra",
+            ["Establecimiento", "Circuito"],
+            index=0,
+            horizontal=True,
+        )
+    with col4:
+        top_k = st.number_input(
+            "Cantidad de mesas (top-k)", min_value=1, max_value=1000, value=50
+        )
+
     # Botón que DISPARA el cálculo
     aplicar = st.form_submit_button("Aplicar")
 
-# No hacer nada hasta que se apriete Aplicar
+# No hacer nada hasta que se apriete Aplicar (el último resultado queda en la
+# sesión para poder paginarlo sin volver a aplicar)
 if not aplicar:
-    st.info("Ajustá los parámetros y hacé clic en **Aplicar**.")
+    if "resultado_mesas" not in st.session_state:
+        st.info("Ajustá los parámetros y hacé clic en **Aplicar**.")
 
 else:
     # Validación simple de rango
-    if min_desvio > max_desvio:
+    if modo != "Puntaje robusto (top-k)" and min_desvio > max_desvio:
         st.error("El desvío mínimo no puede ser mayor que el máximo.")
         st.stop()
 
+    if modo == "Un partido" and not partido.strip():
+        st.warning("Escribí el partido a analizar.")
+        st.stop()
+
+    # Resolver el partido escrito contra el índice de nombres
+    if modo in ("Un partido", "Puntaje robusto (top-k)") and partido.strip():
+        indice_partidos = obtener_indice_partidos()
+        canonico = resolver_partido(indice_partidos, partido)
+        if canonico is None:
+            st.warning(
+                f"No se encontró el partido '{partido}'. "
+                f"Quizás quisiste decir: {sugerir_partidos(indice_partidos, partido)}"
+            )
+            st.stop()
+        if canonico != partido.strip():
+            st.caption(f"Se analiza **{canonico}** (escrito: '{partido}')")
+        partido = canonico
+
     # ----- CÁLCULO (solo corre después de 'Aplicar') -----
-    outliers = detectar_mesas_atipicas_por_partido(
-        df,
-        partido=partido,
-        umbral_min=min_desvio,
-        umbral_max=max_desvio,
-        incluir_blancos_en_denominador=incluir_blancos,
+    if modo == "Puntaje robusto (top-k)":
+        # Z robusto (mediana/MAD) de cada mesa frente a su escuela o circuito;
+        # vacío en el campo de partido = todos los partidos
+        outliers = obtener_top_anomalas(
+            int(top_k),
+            referencia,
+            partido.strip() or None,
+            incluir_blancos,
+            int(min_mesas),
+        )
+        if outliers is None:
+            st.error("No se pudieron calcular los puntajes")
+            st.stop()
+        titulo = (
+            f"Las {len(outliers)} mesas más atípicas frente a su "
+            f"{referencia.lower()} en {partido.strip() or 'todos los partidos'}"
+        )
+    elif modo == "Métrica de la mesa":
+        # Todas las métricas salen de la misma matriz (mesas × tipo de voto)
+        metricas = obtener_tabla_metrica(metrica)
+        if metricas is None:
+            st.error("No se pudieron calcular las métricas por mesa")
+            st.stop()
+        outliers = filtrar_desvios(metricas, min_desvio, max_desvio)
+        titulo = f"Mesas con {min_desvio} ≤ desvío ≤ {max_desvio} pp en {metrica.lower()}"
+    elif modo == "Todos los partidos":
+        # Una sola pasada sobre la matriz (mesas × partidos)
+        outliers = obtener_escaneo_partidos(min_desvio, max_desvio, incluir_blancos)
+        titulo = f"Mesas con {min_desvio} ≤ desvío ≤ {max_desvio} pp en todos los partidos"
+    else:
+        # La tabla de desvíos se cachea por partido y denominador;
+        # cambiar los umbrales solo vuelve a filtrar
+        if multinivel:
+            desvios = obtener_desvios_multinivel(partido, incluir_blancos, min_mesas)
+        else:
+            desvios = obtener_desvios_partido(partido, incluir_blancos)
+        if desvios is None:
+            st.error("No se pudieron calcular los desvíos")
+            st.stop()
+
+        outliers = filtrar_desvios(desvios, min_desvio, max_desvio)
+        titulo = f"Mesas con {min_desvio} ≤ desvío ≤ {max_desvio} pp en {partido}"
+
+    # El resultado queda identificado por sus parámetros y la versión de la
+    # base: la firma se arma una vez acá, no al pasar de página
+    firma = (
+        modo,
+        partido,
+        min_desvio,
+        max_desvio,
+        incluir_blancos,
+        metrica,
+        multinivel,
+        min_mesas,
+        referencia,
+        top_k,
+        version_archivo(BASE),
     )
+    st.session_state["resultado_mesas"] = (titulo, outliers, firma)
+
+if "resultado_mesas" in st.session_state:
+    titulo, outliers, firma = st.session_state["resultado_mesas"]
 
     # KPI con cantidad de mesas resultantes
     st.metric("Cantidad de mesas mostradas", len(outliers))
 
-    st.subheader(f"Mesas con {min_desvio} ≤ desvío ≤ {max_desvio} pp en {partido}")
+    st.subheader(titulo)
+
+    # Solo se envía al navegador la página visible
+    mostrar_tabla_paginada(outliers, "tabla_atipicas", firma, hide_index=False)
 
-    try:
-        st.dataframe(outliers, width="stretch")
-    except TypeError:
-        st.dataframe(outliers, use_container_width=True)
+# ----- Análisis forense de dígitos -----
+with st.expander("🔢 Análisis de dígitos (Benford y último dígito)"):
+    with st.form("forense_digitos"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            nivel_digitos = st.selectbox(
+                "Agrupar por", ["Distrito", "Establecimiento", "Seccion", "Provincia"]
+            )
+        with col2:
+            prueba = st.radio(
+                "Prueba",
+                ["Primer dígito (Benford)", "Último dígito (uniforme)"],
+                index=0,
+            )
+        with col3:
+            min_observaciones = st.number_input(
+                "Mínimo de mesas por grupo", min_value=1, value=50
+            )
+        solo_atipicos = st.checkbox("Mostrar solo grupos atípicos", value=True)
+        analizar = st.form_submit_button("Analizar dígitos")
+
+    if analizar:
+        digitos = obtener_analisis_digitos(
+            nivel_digitos,
+            "primer_digito" if prueba.startswith("Primer") else "ultimo_digito",
+            min_observaciones,
+        )
+        if digitos is None:
+            st.error("No se pudo calcular el análisis de dígitos")
+        else:
+            if solo_atipicos:
+                digitos = digitos[digitos["atipico"]]
+            st.metric("Grupos mostrados", len(digitos))
+            st.dataframe(
+                digitos.sort_values("chi2", ascending=False),
+                width="stretch",
+                hide_index=True,
+            )
+            st.caption(
+                "Chi-cuadrado contra la distribución esperada; se marca atípico "
+                "si supera el valor crítico al 5 % (15,51 para el primer dígito, "
+                "16,92 para el último). El último dígito usa mesas con 10 votos o más."
+            )
+
+# ----- Cruce de mesas entre resultados y padrón -----
+with st.expander("🔗 Mesas sin cruce entre resultados y padrón"):
+    st.caption(
+        "Las mesas se cruzan por distrito y número de mesa. Una mesa de resultados "
+        "sin par queda sin electores (participación vacía) y sin circuito."
+    )
+    # Checkbox (no botón): el reporte queda visible al cambiar de página
+    if st.checkbox("Mostrar mesas sin cruce", value=False):
+        sin_par = obtener_mesas_sin_par()
+        if sin_par is None:
+            st.error("No se pudo cargar la base de mesas del padrón")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Mesas de resultados sin padrón", len(sin_par["resultados"]))
+            with col2:
+                st.metric("Mesas del padrón sin resultados", len(sin_par["padron"]))
+            lado = st.radio(
+                "Ver",
+                ["Resultados sin padrón", "Padrón sin resultados"],
+                horizontal=True,
+            )
+            mostrar_tabla_paginada(
+                sin_par["resultados" if lado == "Resultados sin padrón" else "padron"],
+                "tabla_sin_par",
+                (lado, version_archivo(BASE), version_archivo(BASE_MESAS_NORMALIZADO)),
+            )
 
 st.markdown(
     """
@@ -93,5 +307,20 @@ st.markdown(
 
    *Ejemplo:* 20 % (mesa) − 25 % (escuela) = **−5 pp**  
    ⇒ el partido rinde peor en esa mesa que en el promedio de su escuela.
+
+   Con **varios niveles**, si la escuela tiene menos mesas que el mínimo indicado,
+   el desvío se mide contra el circuito, el distrito o la sección (columna `referencia`).
+
+---
+
+4. **Puntaje robusto (`z_robusto`)**  
+   0,6745 × (Porcentaje en la mesa − mediana de las mesas de la escuela o circuito) ÷ MAD  
+
+   El MAD es la mediana de las distancias a la mediana. Valores de |z| mayores a 3,5 suelen
+   considerarse atípicos; una mesa anómala no mueve la mediana como sí mueve el promedio.
+
+   El MAD tiene un piso de 0,5 pp (o el error de muestreo del porcentaje, si es mayor), y las
+   escuelas o circuitos con menos mesas que el mínimo indicado no se puntúan: con pocas mesas
+   casi iguales el MAD sale casi cero y cualquier diferencia daría un |z| enorme.
 """
 )
@@ -1,6 +1,17 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from src.funciones_streamlit.mesas_parquet import leer_mesas
+from src.funciones_streamlit.funciones import version_archivo
+from src.funciones_streamlit.indice_filtros import (
+    construir_indice_filtros,
+    filtrar_mesas,
+)
+from src.funciones_streamlit.tabla_paginada import mostrar_tabla_paginada
 
 st.set_page_config(page_title="📊 Mesas Electorales", page_icon="🗳️", layout="wide")
 
@@ -8,26 +19,62 @@ st.title("📊 MESAS ELECTORALES - PADRON 2025")
 st.markdown("---")
 
 
-@st.cache_data
-def cargar_datos():
-    """Carga los datos del archivo CSV de mesas electores normalizado con nombres de distrito"""
+def encontrar_raiz():
+    """Directorio raíz del proyecto (el que contiene utils/data), o None"""
     # Método más robusto para encontrar el directorio raíz del proyecto
     current_dir = os.path.dirname(os.path.abspath(__file__))
 
     # Buscar hacia arriba hasta encontrar el directorio raíz del proyecto
-    project_root = None
     for _ in range(10):  # Máximo 10 niveles hacia arriba
         if os.path.exists(
             os.path.join(
                 current_dir, "utils", "data", "base_mesas_electores_normalizado.csv"
             )
         ):
-            project_root = current_dir
-            break
+            return current_dir
         parent = os.path.dirname(current_dir)
         if parent == current_dir:  # Llegamos a la raíz del sistema
             break
         current_dir = parent
+    return None
+
+
+def ruta_dataset():
+    """Carpeta del dataset Parquet por sección, si ya fue generado"""
+    project_root = encontrar_raiz() or "."
+    ruta = os.path.join(project_root, "utils", "data", "base_mesas_electores")
+    return ruta if os.path.isdir(ruta) else None
+
+
+def version_dataset(ruta):
+    # Cada escritura reemplaza la carpeta entera: su mtime identifica la versión
+    return os.stat(ruta).st_mtime_ns
+
+
+def version_datos():
+    """Versión de los datos de mesas: la del dataset Parquet o la del CSV"""
+    dataset = ruta_dataset()
+    if dataset:
+        return f"parquet-{version_dataset(dataset)}"
+    project_root = encontrar_raiz() or "."
+    return version_archivo(
+        os.path.join(project_root, "utils", "data", "base_mesas_electores_normalizado.csv")
+    )
+
+
+# cache_resource: la base y su índice se comparten entre reruns sin copiarse;
+# max_entries=1 libera la versión anterior cuando cambian los archivos
+@st.cache_resource(max_entries=1)
+def cargar_indice(version):
+    """Índice de filtros de la base de mesas, armado una vez por versión"""
+    df = cargar_datos(version)
+    return None if df is None else construir_indice_filtros(df)
+
+
+@st.cache_resource(max_entries=1)
+def cargar_datos(version):
+    """Carga los datos del archivo CSV de mesas electores normalizado con nombres de distrito"""
+    project_root = encontrar_raiz()
 
     if project_root:
         ruta_csv = os.path.join(
@@ -38,7 +85,13 @@ def cargar_datos():
         ruta_csv = os.path.join("utils", "data", "base_mesas_electores_normalizado.csv")
 
     try:
-        df = pd.read_csv(ruta_csv)
+        # Preferir el dataset Parquet (tipado) si la ETL ya lo generó
+        dataset = ruta_dataset()
+        df = (
+            leer_mesas(dataset)
+            if dataset
+            else pd.read_csv(ruta_csv, dtype={"cod_circ": str})
+        )
 
         # Verificar que todas las columnas necesarias existan
         columnas_requeridas = [
@@ -93,33 +146,34 @@ def cargar_datos():
 
 
 # Cargar datos
-df = cargar_datos()
+version = version_datos()
+df = cargar_datos(version)
+indice = cargar_indice(version) if df is not None else None
 
-if df is not None:
-    # Separar datos de mesas nativas y extranjeras
-    df_nativas = df[df["tipo"] == "NATIVA"]
-    df_extranjeras = df[df["tipo"] == "EXTRANJERA"]
+if df is not None and indice is not None:
+    # Totales de la base (calculados al armar el índice)
+    resumen = indice["resumen"]
 
     # Métricas principales
     col1, col2, col3, col4, col5, col6 = st.columns(6)
 
     with col1:
-        st.metric("🏛️ Distritos", f"{df['nombre_circuito'].nunique():,}")
+        st.metric("🏛️ Distritos", f"{resumen['distritos']:,}")
 
     with col2:
-        st.metric("🏛️ Secciones", f"{df['seccion'].nunique():,}")
+        st.metric("🏛️ Secciones", f"{resumen['secciones']:,}")
 
     with col3:
-        st.metric("📋 Mesas Totales", f"{len(df):,}")
+        st.metric("📋 Mesas Totales", f"{resumen['mesas']:,}")
 
     with col4:
-        st.metric("🏠 Mesas Nativas", f"{len(df_nativas):,}")
+        st.metric("🏠 Mesas Nativas", f"{resumen['mesas_nativas']:,}")
 
     with col5:
-        st.metric("🌍 Mesas Extranjeras", f"{len(df_extranjeras):,}")
+        st.metric("🌍 Mesas Extranjeras", f"{resumen['mesas_extranjeras']:,}")
 
     with col6:
-        st.metric("👥 Electores Totales", f"{df['cantidad_electores'].sum():,}")
+        st.metric("👥 Electores Totales", f"{resumen['electores']:,}")
 
     st.markdown("---")
 
@@ -137,7 +191,7 @@ if df is not None:
         )
 
     with col2:
-        distritos = ["Todos"] + sorted(df["nombre_circuito"].unique().tolist())
+        distritos = ["Todos"] + indice["dominios"]["nombre_circuito"]
         distrito_seleccionado = st.selectbox(
             "🏛️ Filtrar por Distrito:",
             distritos,
@@ -145,7 +199,7 @@ if df is not None:
         )
 
     with col3:
-        secciones = ["Todos"] + sorted(df["seccion"].unique().tolist())
+        secciones = ["Todos"] + indice["dominios"]["seccion"]
         seccion_seleccionada = st.selectbox(
             "🏛️ Filtrar por Sección:",
             secciones,
@@ -158,13 +212,13 @@ if df is not None:
     with col4:
         # Filtrar circuitos según el tipo de mesa seleccionado
         if tipo_mesa == "Solo mesas nativas":
-            circuitos_base = df_nativas["cod_circ"].unique().tolist()
+            circuitos_base = indice["circuitos_por_tipo"].get("NATIVA", [])
         elif tipo_mesa == "Solo mesas extranjeras":
-            circuitos_base = df_extranjeras["cod_circ"].unique().tolist()
+            circuitos_base = indice["circuitos_por_tipo"].get("EXTRANJERA", [])
         else:
-            circuitos_base = df["cod_circ"].unique().tolist()
+            circuitos_base = indice["dominios"]["cod_circ"]
 
-        circuitos = ["Todos"] + sorted(circuitos_base)
+        circuitos = ["Todos"] + circuitos_base
         circuito_seleccionado = st.selectbox(
             "🗳️ Filtrar por Circuito:",
             circuitos,
@@ -172,24 +226,22 @@ if df is not None:
         )
 
     # Aplicar filtros
-    df_filtrado = df.copy()
-
-    # Aplicar filtro de tipo de mesa
-    if tipo_mesa == "Solo mesas nativas":
-        df_filtrado = df_filtrado[df_filtrado["tipo"] == "NATIVA"]
-    elif tipo_mesa == "Solo mesas extranjeras":
-        df_filtrado = df_filtrado[df_filtrado["tipo"] == "EXTRANJERA"]
-
-    if distrito_seleccionado != "Todos":
-        df_filtrado = df_filtrado[
-            df_filtrado["nombre_circuito"] == distrito_seleccionado
-        ]
-
-    if seccion_seleccionada != "Todos":
-        df_filtrado = df_filtrado[df_filtrado["seccion"] == seccion_seleccionada]
+    tipo_filtro = {
+        "Solo mesas nativas": "NATIVA",
+        "Solo mesas extranjeras": "EXTRANJERA",
+    }.get(tipo_mesa)
+    filtros = {
+        "seccion": None if seccion_seleccionada == "Todos" else seccion_seleccionada,
+        "nombre_circuito": (
+            None if distrito_seleccionado == "Todos" else distrito_seleccionado
+        ),
+        "tipo": tipo_filtro,
+        "cod_circ": None if circuito_seleccionado == "Todos" else circuito_seleccionado,
+    }
 
-    if circuito_seleccionado != "Todos":
-        df_filtrado = df_filtrado[df_filtrado["cod_circ"] == circuito_seleccionado]
+    # Intersección de las listas de filas de cada filtro: solo se tocan las
+    # filas de la selección, sin recorrer ni copiar la base
+    df_filtrado = filtrar_mesas(df, indice, filtros)
 
     # Mostrar estadísticas del filtro
     if tipo_mesa == "Solo mesas extranjeras":
@@ -211,7 +263,7 @@ if df is not None:
                 f"{df_filtrado[df_filtrado['tipo'] == 'NATIVA']['cantidad_electores'].sum():,}",
             )
         with col3:
-            st.metric("Total electores", f"{df['cantidad_electores'].sum():,}")
+            st.metric("Total electores", f"{resumen['electores']:,}")
 
     st.markdown("---")
 
@@ -229,11 +281,13 @@ if df is not None:
         "tipo": st.column_config.TextColumn("Tipo", width="medium"),
     }
 
-    st.dataframe(
+    # Solo se envía al navegador la página visible de la selección
+    # La selección queda identificada por la versión de los datos y los filtros
+    mostrar_tabla_paginada(
         df_filtrado,
+        "tabla_mesas",
+        (version, tuple(filtros.items())),
         column_config=column_config,
-        use_container_width=True,
-        hide_index=True,
     )
 
     # Información adicional
@@ -241,16 +295,16 @@ if df is not None:
         st.markdown(
             f"""
         **📊 Estadísticas del Dataset:**
-        - **Total de mesas:** {len(df):,}
-        - **Mesas nativas:** {len(df_nativas):,}
-        - **Mesas extranjeras:** {len(df_extranjeras):,}
-        - **Distritos únicos:** {df['nombre_circuito'].nunique()}
-        - **Secciones únicas:** {df['seccion'].nunique()}
-        - **Circuitos únicos:** {df['cod_circ'].nunique()}
-        - **Escuelas únicas:** {df['establecimiento'].nunique()}
-        - **Electores nativos:** {df_nativas['cantidad_electores'].sum():,}
-        - **Extranjeros:** {df_extranjeras['cantidad_electores'].sum():,}
-        - **Total de electores:** {df['cantidad_electores'].sum():,}
+        - **Total de mesas:** {resumen['mesas']:,}
+        - **Mesas nativas:** {resumen['mesas_nativas']:,}
+        - **Mesas extranjeras:** {resumen['mesas_extranjeras']:,}
+        - **Distritos únicos:** {resumen['distritos']}
+        - **Secciones únicas:** {resumen['secciones']}
+        - **Circuitos únicos:** {resumen['circuitos']}
+        - **Escuelas únicas:** {resumen['escuelas']}
+        - **Electores nativos:** {resumen['electores_nativos']:,}
+        - **Extranjeros:** {resumen['electores_extranjeros']:,}
+        - **Total de electores:** {resumen['electores']:,}
 
         **📋 Columnas disponibles:**
         - `nombre_circuito`: Nombre del distrito/municipio
@@ -336,3 +336,16 @@ DISTRITOS = {
     134: "HURLINGHAM",
     135: "LEZAMA",
 }
+
+# Otras grafías de los distritos en los resultados y en ELECTORES.csv, con su
+# nombre en DISTRITOS (SECCION_MUNICIPIOS lista ambas formas de varios)
+ALIAS_DISTRITOS = {
+    "PILAR": "DEL PILAR",
+    "PINAMAR": "PARTIDO DE PINAMAR",
+    "VILLA GESELL": "PARTIDO DE VILLA GESELL",
+    "MONTE HERMOSO": "PARTIDO DE MONTE HERMOSO",
+    "LA COSTA": "PARTIDO DE LA COSTA",
+    "25 DE MAYO": "VEINTICINCO DE MAYO",
+    "9 DE JULIO": "NUEVE DE JULIO",
+    "CORONEL DE MARINA L. ROSALES": "CORONEL ROSALES",
+}